@@ -1,15 +1,25 @@
 import sys
+import multiprocessing
 from pathlib import Path
 
 # 将项目根目录添加到Python路径
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from src.gui.main_window import LogFilterGUI
-
 def main():
-    app = LogFilterGUI()
+    from src.utils.startup_timer import StartupTimer
+    timer = StartupTimer()
+    from src.gui.main_window import LogFilterGUI
+    timer.mark("导入界面模块")
+    app = LogFilterGUI(startup_timer=timer)
     app.mainloop()
 
 if __name__ == "__main__":
+    # 打包后的程序启动并行过滤子进程时需要
+    multiprocessing.freeze_support()
+    from src.cli import COMMANDS
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        # 带子命令启动时进入命令行模式，不加载图形界面
+        from src.cli import main as cli_main
+        sys.exit(cli_main())
     main()
\ No newline at end of file
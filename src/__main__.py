@@ -0,0 +1,7 @@
+"""python -m src 命令行入口"""
+import sys
+
+from src.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,442 @@
+"""LogWatch 命令行入口
+
+用法示例:
+    python -m src filter -k "[CHAT]" latest.log > chat.log
+    tail -f latest.log | python -m src filter -k ERROR
+    python -m src search "timeout" a.log b.log
+    python -m src search -C 3 "timeout" a.log
+    python -m src lines latest.log 120000-120050
+    python -m src analyze latest.log --json
+    python -m src tail latest.log -k ERROR
+    python -m src tail 'servers/*/logs/*.log' -k ERROR
+    python -m src batch logs/*.log -d filtered/
+
+过滤参数的默认值来自 ConfigManager 保存的过滤配置，命令行参数优先。
+每个子命令只在执行时导入自己需要的模块，filter 不会加载 tkinter、pandas 或 matplotlib。
+"""
+import os
+import sys
+import json
+import codecs
+import argparse
+import itertools
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+COMMANDS = ('filter', 'search', 'lines', 'analyze', 'tail', 'batch')
+
+
+class ConsoleReporter:
+    """把处理消息输出到标准错误
+
+    提供与 LogFilterGUI 相同的 log_info、log_error、update_progress 接口，
+    可以直接作为 LogProcessor 的 app_instance。
+    """
+
+    def __init__(self, quiet: bool = False):
+        self.quiet = quiet
+        self.errors = 0
+
+    def log_info(self, msg: str):
+        if not self.quiet:
+            print(msg, file=sys.stderr)
+
+    def log_error(self, msg: str):
+        self.errors += 1
+        print(msg, file=sys.stderr)
+
+    def update_progress(self, message: str):
+        if not self.quiet:
+            print(message, file=sys.stderr)
+
+
+def _resolve_encoding(encoding: Optional[str], fallback: Optional[str]) -> Optional[str]:
+    """GUI 默认的 'ANSI' 在非 Windows 平台上没有对应的编码，此时使用 fallback"""
+    if encoding and encoding.upper() == 'ANSI':
+        try:
+            codecs.lookup('ansi')
+        except LookupError:
+            return fallback
+    return encoding
+
+
+def _add_filter_options(parser: argparse.ArgumentParser):
+    """添加过滤相关的参数，未指定的参数使用配置文件中的值"""
+    parser.add_argument('-k', '--keywords', help="关键字，用 | 分隔多个关键字")
+    parser.add_argument('-f', '--fields', dest='filter_fields', help="要删除的字段，用 | 分隔多个字段")
+    parser.add_argument('--no-fields', action='store_true', help="不删除字段")
+    parser.add_argument('-s', '--case-sensitive', action='store_true', help="区分大小写")
+    parser.add_argument('-Q', '--query', action='store_true', help="关键字按查询语法解析（AND/OR/NOT、re:、level:、time:、logger:）")
+    parser.add_argument('--read-enc', help="输入编码，auto 表示自动检测")
+    parser.add_argument('--write-enc', help="输出编码，默认与输入编码相同")
+    parser.add_argument('--no-config', action='store_true', help="不读取配置文件中的过滤配置")
+
+
+def _filter_config(args: argparse.Namespace) -> Dict[str, Any]:
+    """合并配置文件与命令行参数，返回与 ConfigPanel.get_config() 相同键名的配置"""
+    if args.no_config:
+        config = {
+            'keywords': '',
+            'filter_fields': '',
+            'ignore_case': True,
+            'enable_field_filter': False,
+            'read_enc': 'auto',
+            'write_enc': None,
+            'query_mode': False
+        }
+    else:
+        from src.utils.config_manager import ConfigManager
+        config = ConfigManager().get_filter_config()
+
+    if args.keywords is not None:
+        config['keywords'] = args.keywords
+    if args.filter_fields is not None:
+        config['filter_fields'] = args.filter_fields
+        config['enable_field_filter'] = True
+    if args.no_fields:
+        config['enable_field_filter'] = False
+    if args.case_sensitive:
+        config['ignore_case'] = False
+    if args.query:
+        config['query_mode'] = True
+    if args.read_enc:
+        config['read_enc'] = args.read_enc
+    if args.write_enc:
+        config['write_enc'] = args.write_enc
+    config['read_enc'] = _resolve_encoding(config['read_enc'], 'auto')
+    config['write_enc'] = _resolve_encoding(config['write_enc'], None)
+    return config
+
+
+def cmd_filter(args: argparse.Namespace) -> int:
+    """按关键字过滤文件或标准输入，gzip/bz2/xz 压缩文件边解压边过滤"""
+    from src.core.log_processor import LogProcessor
+    from src.core.file_handler import FileHandler
+
+    reporter = ConsoleReporter(args.quiet)
+    processor = LogProcessor(reporter)
+    config = _filter_config(args)
+    if not config['keywords']:
+        reporter.log_error("❌ 错误：未指定关键字")
+        return 2
+
+    count_out = 0
+    if args.output:
+        if len(args.inputs) != 1 or args.inputs[0] == '-':
+            reporter.log_error("❌ 错误：指定 --output 时只能有一个输入文件，多个文件请使用 batch")
+            return 2
+        _, count_out = processor.filter_log(Path(args.inputs[0]), Path(args.output), **config)
+    else:
+        # 结果写入标准输出（见 output_sink.StdoutSink）
+        for name in args.inputs:
+            if name == '-':
+                _, matched = processor.filter_stream(sys.stdin.buffer, None, **config)
+            else:
+                with FileHandler.open_input(Path(name)) as f:
+                    _, matched = processor.filter_stream(f, None, **config)
+            count_out += matched
+
+    if reporter.errors:
+        return 2
+    return 0 if count_out else 1
+
+
+def _line_index(path: Path, encoding: str):
+    """返回文件的行索引，压缩文件或与 ASCII 不兼容的编码无法按字节定位行时返回 None"""
+    from src.core.file_handler import FileHandler
+    from src.core.line_index import LineIndex
+    from src.core.matcher import is_ascii_compatible
+
+    if not is_ascii_compatible(encoding) or FileHandler.is_compressed(path):
+        return None
+    return LineIndex.for_file(path)
+
+
+def _context_groups(line_numbers: Iterable[int], context: int) -> Iterator[Tuple[int, int, Set[int]]]:
+    """把匹配行按上下文窗口分组，重叠或相邻的窗口合并为一组（与 grep -C 相同）
+
+    Yields:
+        (第一行, 最后一行, 组内的匹配行号)，最后一行可能超出文件末尾
+    """
+    group = None
+    for line_no in line_numbers:
+        first = max(line_no - context, 1)
+        if group is not None and first <= group[1] + 1:
+            group[1] = line_no + context
+            group[2].add(line_no)
+            continue
+        if group is not None:
+            yield tuple(group)
+        group = [first, line_no + context, {line_no}]
+    if group is not None:
+        yield tuple(group)
+
+
+def cmd_search(args: argparse.Namespace) -> int:
+    """在文件中搜索文本或正则表达式"""
+    from src.core.log_processor import LogProcessor
+    from src.core.file_handler import FileHandler
+
+    show_name = args.with_filename or len(args.files) > 1
+    total = 0
+    for name in args.files:
+        path = Path(name)
+        encoding = _resolve_encoding(args.encoding, 'auto')
+        if encoding == 'auto':
+            encoding = FileHandler.detect_encoding(path)
+        prefix = f"{name}:" if show_name else ""
+        index = _line_index(path, encoding) if args.context else None
+        if args.context and index is None:
+            print(f"⚠️ {name}: 压缩文件或 {encoding} 编码不支持显示上下文", file=sys.stderr)
+        hits = LogProcessor.iter_search(
+            path, args.pattern, args.regex, args.case_sensitive, encoding, args.query)
+        if args.max_count:
+            hits = itertools.islice(hits, args.max_count - total)
+        if index is None:
+            for line_no, line in hits:
+                print(f"{prefix}{line_no}:{line}")
+                total += 1
+        else:
+            # 重叠的上下文只输出一次，窗口内的匹配行仍标记为 ':'
+            groups = _context_groups((line_no for line_no, _ in hits), args.context)
+            for number, (first, last, matched) in enumerate(groups):
+                if number:
+                    print("--")
+                for context_no, raw in index.iter_lines(first, last - first + 1):
+                    mark = ':' if context_no in matched else '-'
+                    print(f"{prefix}{context_no}{mark}{raw.decode(encoding, 'ignore')}")
+                total += len(matched)
+        if args.max_count and total >= args.max_count:
+            break
+    return 0 if total else 1
+
+
+def _parse_line_range(text: str) -> Tuple[int, int]:
+    """解析行号范围：'120'、'120-150' 或 '120+30'，返回 (起始行, 行数)"""
+    try:
+        if '+' in text:
+            start, count = text.split('+', 1)
+            return int(start), int(count)
+        if '-' in text:
+            start, end = text.split('-', 1)
+            return int(start), int(end) - int(start) + 1
+        return int(text), 1
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的行号范围: {text}")
+
+
+def cmd_lines(args: argparse.Namespace) -> int:
+    """按行号输出文件中的行，借助行索引直接定位，不从文件开头读取"""
+    from src.core.file_handler import FileHandler
+
+    path = Path(args.file)
+    encoding = _resolve_encoding(args.encoding, 'auto')
+    if encoding == 'auto':
+        encoding = FileHandler.detect_encoding(path)
+    index = _line_index(path, encoding)
+    if index is None:
+        print(f"❌ 错误：压缩文件或 {encoding} 编码不支持按行号定位", file=sys.stderr)
+        return 2
+    start, count = args.range
+    found = False
+    for line_no, raw in index.iter_lines(start, count):
+        text = raw.decode(encoding, 'ignore')
+        print(f"{line_no}:{text}" if args.line_numbers else text)
+        found = True
+    return 0 if found else 1
+
+
+def _jsonable(value: Any) -> Any:
+    """把统计结果中的 numpy 标量、时间戳和非字符串键转换为可序列化的形式"""
+    if isinstance(value, dict):
+        return {str(_jsonable(k)): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if hasattr(value, 'item'):
+        return value.item()
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def cmd_analyze(args: argparse.Namespace) -> int:
+    """统计分析日志文件"""
+    from src.core.log_analyzer import LogAnalyzer
+
+    analyzer = LogAnalyzer()
+    analyzer.analyze_file(Path(args.file))
+    stats = _jsonable(analyzer.get_stats())
+    if not stats:
+        print("没有可分析的日志行（未找到时间戳）", file=sys.stderr)
+        return 1
+
+    if args.json:
+        json.dump(stats, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+
+    print(f"总行数: {stats['total_lines']}")
+    print(f"时间范围: {stats['time_range']['start']} ~ {stats['time_range']['end']}")
+    print("日志级别分布:")
+    for level, count in stats['level_distribution'].items():
+        print(f"  {level}: {count}")
+    print("按小时分布:")
+    for hour, count in stats['hourly_distribution'].items():
+        print(f"  {int(hour):02d}: {count}")
+    print("高频词:")
+    for word, count in stats['word_frequency'].items():
+        print(f"  {word}: {count}")
+    return 0
+
+
+def cmd_tail(args: argparse.Namespace) -> int:
+    """实时监控一个或多个文件，输出新增的匹配行"""
+    import glob
+    import time
+    from src.core.file_handler import FileHandler
+    from src.core.log_monitor import LogMonitor
+    from src.core.log_processor import LogProcessor
+
+    config = _filter_config(args)
+    line_filter = LogProcessor().get_line_filter(
+        config['keywords'],
+        config['ignore_case'],
+        config['filter_fields'],
+        config['enable_field_filter'],
+        config['query_mode']
+    )
+
+    # 多个目标或通配符时在每行前输出文件名，与 search 一致
+    show_name = len(args.files) > 1 or any(glob.has_magic(name) for name in args.files)
+
+    def on_update(path: Path, lines: List[str]):
+        # 没有关键字时显示全部内容（由监控器按 line_filter 过滤），与界面的实时监控一致
+        prefix = f"{path.name}:" if show_name else ""
+        print('\n'.join(prefix + line for line in lines), flush=True)
+
+    read_enc = _resolve_encoding(config['read_enc'], 'utf-8')
+    monitor = LogMonitor(on_update, latency=args.latency / 1000, use_events=not args.poll,
+                         on_error=ConsoleReporter().log_error)
+    monitor.start_monitoring([])
+    try:
+        for name in args.files:
+            if not glob.has_magic(name) and not Path(name).is_file():
+                print(f"❌ 错误：文件不存在：{name}", file=sys.stderr)
+                return 2
+            encoding = read_enc
+            if not encoding or encoding == 'auto':
+                # 通配符按第一个匹配的文件检测编码，还没有匹配的文件时使用 UTF-8
+                matches = sorted(p for p in glob.glob(name) if os.path.isfile(p))
+                encoding = FileHandler.detect_encoding(Path(matches[0])) if matches else 'utf-8'
+            try:
+                monitor.add_target(name, encoding, line_filter)
+            except LookupError:
+                print(f"❌ 错误：不支持的编码 '{encoding}'", file=sys.stderr)
+                return 2
+        while True:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.stats:
+            stats = monitor.get_stats()
+            print(' '.join(f"{key}={value}" for key, value in stats.items()), file=sys.stderr)
+        monitor.stop_monitoring()
+    return 0
+
+
+def cmd_batch(args: argparse.Namespace) -> int:
+    """批量过滤多个文件到输出目录"""
+    from src.core.log_processor import LogProcessor
+
+    reporter = ConsoleReporter(args.quiet)
+    config = _filter_config(args)
+    if not config['keywords']:
+        reporter.log_error("❌ 错误：未指定关键字")
+        return 2
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    processor = LogProcessor(reporter)
+    processor.batch_process([Path(f) for f in args.files], output_dir, **config)
+    return 2 if reporter.errors else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """创建命令行参数解析器"""
+    parser = argparse.ArgumentParser(prog='logwatch', description="LogWatch 日志过滤工具（命令行模式）")
+    subparsers = parser.add_subparsers(dest='command', metavar='命令')
+
+    p = subparsers.add_parser('filter', help="按关键字过滤日志，默认从标准输入读取并输出到标准输出")
+    p.add_argument('inputs', nargs='*', default=['-'], help="输入文件，- 表示标准输入")
+    p.add_argument('-o', '--output', help="输出文件（只能有一个输入文件，以 .gz 结尾时压缩输出）")
+    p.add_argument('-q', '--quiet', action='store_true', help="不输出进度信息")
+    _add_filter_options(p)
+    p.set_defaults(func=cmd_filter)
+
+    p = subparsers.add_parser('search', help="搜索文本或正则表达式，输出行号和内容")
+    p.add_argument('pattern', help="搜索文本")
+    p.add_argument('files', nargs='+', help="要搜索的文件")
+    p.add_argument('-r', '--regex', action='store_true', help="使用正则表达式")
+    p.add_argument('-Q', '--query', action='store_true', help="按查询语法解析搜索文本")
+    p.add_argument('-s', '--case-sensitive', action='store_true', help="区分大小写")
+    p.add_argument('-e', '--encoding', default='utf-8', help="文件编码，auto 表示自动检测")
+    p.add_argument('-H', '--with-filename', action='store_true', help="输出文件名")
+    p.add_argument('-m', '--max-count', type=int, default=0, help="最多输出的匹配数")
+    p.add_argument('-C', '--context', type=int, default=0, metavar='N', help="同时输出匹配行前后各 N 行")
+    p.set_defaults(func=cmd_search)
+
+    p = subparsers.add_parser('lines', help="按行号输出指定的行（首次使用时建立行索引）")
+    p.add_argument('file', help="日志文件")
+    p.add_argument('range', type=_parse_line_range, help="行号范围：120、120-150 或 120+30")
+    p.add_argument('-e', '--encoding', default='utf-8', help="文件编码，auto 表示自动检测")
+    p.add_argument('-n', '--line-numbers', action='store_true', help="输出行号")
+    p.set_defaults(func=cmd_lines)
+
+    p = subparsers.add_parser('analyze', help="统计分析日志（需要 pandas）")
+    p.add_argument('file', help="日志文件")
+    p.add_argument('--json', action='store_true', help="以 JSON 格式输出")
+    p.set_defaults(func=cmd_analyze)
+
+    p = subparsers.add_parser('tail', help="实时监控一个或多个文件并输出新增的匹配行")
+    p.add_argument('files', nargs='+', help="日志文件或通配符（如 'logs/*.log'，加引号以便监控之后新建的文件）")
+    p.add_argument('--latency', type=int, default=50, metavar='MS', help="合并文件事件的延迟（毫秒），默认 50")
+    p.add_argument('--poll', action='store_true', help="只轮询文件大小，不使用文件系统事件（网络共享目录等）")
+    p.add_argument('--stats', action='store_true', help="退出时输出事件、读取次数和字节数等计数")
+    _add_filter_options(p)
+    p.set_defaults(func=cmd_tail)
+
+    p = subparsers.add_parser('batch', help="批量过滤多个文件")
+    p.add_argument('files', nargs='+', help="输入文件")
+    p.add_argument('-d', '--output-dir', required=True, help="输出目录")
+    p.add_argument('-q', '--quiet', action='store_true', help="不输出进度信息")
+    _add_filter_options(p)
+    p.set_defaults(func=cmd_batch)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口，返回退出码：0 成功，1 没有匹配，2 出错"""
+    for stream in (sys.stdout, sys.stderr):
+        # 控制台编码无法表示的字符（如 GBK 控制台中的表情符号）不应导致退出
+        if hasattr(stream, 'reconfigure'):
+            stream.reconfigure(errors='replace')
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.command:
+        parser.print_help()
+        return 2
+
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # 输出被提前关闭（如 | head），静默退出
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 0
+    except KeyboardInterrupt:
+        return 130
+    except Exception as e:
+        print(f"❌ 错误：{e}", file=sys.stderr)
+        return 2
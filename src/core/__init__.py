@@ -1,6 +1,30 @@
-"""LogWatch 核心处理模块"""
-from .log_processor import LogProcessor
-from .log_monitor import LogMonitor
-from .file_handler import FileHandler
+"""LogWatch 核心处理模块
 
-__all__ = ['LogProcessor', 'LogMonitor', 'FileHandler']
\ No newline at end of file
+子模块在首次访问时才导入，命令行等只用到部分功能的入口不会加载 watchdog 等依赖。
+"""
+import importlib
+
+_EXPORTS = {
+    'LogProcessor': '.log_processor',
+    'LogMonitor': '.log_monitor',
+    'FileHandler': '.file_handler',
+    'KeywordMatcher': '.matcher',
+    'FilterCache': '.filter_cache',
+    'LineReader': '.line_reader',
+    'OutputSink': '.output_sink',
+    'LineIndex': '.line_index',
+    'PreviewSource': '.preview_source',
+    'TailReader': '.tail_reader',
+    'BoundedQueue': '.bounded_queue',
+}
+
+__all__ = ['LogProcessor', 'LogMonitor', 'FileHandler', 'KeywordMatcher', 'FilterCache', 'LineReader', 'OutputSink', 'LineIndex',
+           'PreviewSource', 'TailReader', 'BoundedQueue']
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
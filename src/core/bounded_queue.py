@@ -0,0 +1,163 @@
+"""按容量限制积压的线程间队列
+
+生产方（读取线程）比消费方（界面）快时，队列的积压按条目权重（通常是行数）限制在
+capacity 以内，满时按策略处理：
+    block        生产方等待消费方取出，不丢失内容（命令行、导出等）
+    drop_oldest  丢弃最早的条目，保留最新的内容（实时监控界面）
+    sample       按权重单位（行）抽样，每 sample_rate 行只保留一行，并丢弃最早的条目
+                 腾出空间，洪峰期间仍能看到各时段的内容
+队列为空时总是接受新条目，因此积压最多为 capacity 加上一个条目的权重。
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, List, Optional, Tuple
+
+BLOCK = 'block'
+DROP_OLDEST = 'drop_oldest'
+SAMPLE = 'sample'
+POLICIES = (BLOCK, DROP_OLDEST, SAMPLE)
+
+
+class BoundedQueue:
+    """按权重限制容量、满时按策略阻塞或丢弃的队列"""
+
+    def __init__(self,
+                 capacity: int,
+                 policy: str = BLOCK,
+                 sample_rate: int = 10,
+                 weigh: Optional[Callable[[Any], int]] = None,
+                 thin: Optional[Callable[[Any, int, int], Any]] = None):
+        """初始化队列
+
+        Args:
+            capacity: 积压的权重上限
+            policy: 队列已满时的策略，见 POLICIES
+            sample_rate: sample 策略下每多少个单位保留一个
+            weigh: 计算条目权重的函数，默认每个条目为 1；权重为 0 的条目不占容量，
+                   也不会被丢弃（如控制消息）
+            thin: sample 策略下抽取条目内部单位的函数 thin(条目, 起始, 间隔)，返回只保留
+                  第 起始、起始 + 间隔、… 个单位的条目（如一批行中的部分行）；
+                  为 None 时整个条目作为一个单位
+
+        Raises:
+            ValueError: 未知的策略或无效的参数
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"未知的队列策略 '{policy}'，可选: {', '.join(POLICIES)}")
+        if capacity < 1 or sample_rate < 1:
+            raise ValueError("capacity 和 sample_rate 必须大于 0")
+        self.capacity = capacity
+        self.policy = policy
+        self.sample_rate = sample_rate
+        self.weigh = weigh or (lambda item: 1)
+        self.thin = thin
+        self.dropped = 0  # 累计丢弃的权重（行数）
+        self.peak = 0  # 积压权重的最大值
+        self._items: Deque[Tuple[Any, int]] = deque()  # (条目, 权重)
+        self._total = 0
+        self._overflows = 0  # 队列已满时到达的单位数，用于抽样
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def __len__(self) -> int:
+        """当前积压的权重"""
+        with self._cond:
+            return self._total
+
+    def put(self, item: Any, timeout: Optional[float] = None) -> bool:
+        """放入条目
+
+        Args:
+            item: 条目
+            timeout: block 策略下最多等待的秒数，None 表示一直等待到有空间或队列关闭
+
+        Returns:
+            条目是否放入队列（被抽样丢弃、等待超时或队列已关闭时为 False）
+        """
+        weight = self.weigh(item)
+        with self._cond:
+            if self._closed:
+                return False
+            if weight and self._is_full(weight):
+                if self.policy == BLOCK:
+                    deadline = None if timeout is None else time.monotonic() + timeout
+                    while self._is_full(weight) and not self._closed:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            return False
+                        self._cond.wait(remaining)
+                    if self._closed:
+                        return False
+                else:
+                    if self.policy == SAMPLE:
+                        item, weight = self._sample(item, weight)
+                        if item is None:
+                            return False
+                    self._drop_oldest(weight)
+            self._items.append((item, weight))
+            self._total += weight
+            self.peak = max(self.peak, self._total)
+            return True
+
+    def _sample(self, item: Any, weight: int) -> Tuple[Any, int]:
+        """队列已满时抽样：在连续到达的单位中每 sample_rate 个保留一个，返回 (保留的条目, 权重)，
+        全部丢弃时条目为 None"""
+        rate = self.sample_rate
+        if self.thin is None:
+            keep = self._overflows % rate == 0
+            self._overflows += 1
+            if not keep:
+                self.dropped += weight
+                return None, 0
+            return item, weight
+        # 单位 _overflows + i 中序号为 rate 整数倍的保留，跨批次保持同一间隔
+        start = -self._overflows % rate
+        self._overflows += weight
+        if start >= weight:
+            self.dropped += weight
+            return None, 0
+        kept = self.thin(item, start, rate)
+        kept_weight = self.weigh(kept)
+        self.dropped += weight - kept_weight
+        return kept, kept_weight
+
+    def _is_full(self, weight: int) -> bool:
+        return self._total > 0 and self._total + weight > self.capacity
+
+    def _drop_oldest(self, weight: int):
+        """丢弃最早的条目，直到放得下 weight（权重为 0 的条目保留）"""
+        kept: List[Tuple[Any, int]] = []
+        while self._items and self._is_full(weight):
+            item = self._items.popleft()
+            if item[1]:
+                self._total -= item[1]
+                self.dropped += item[1]
+            else:
+                kept.append(item)
+        self._items.extendleft(reversed(kept))
+
+    def get_all(self) -> List[Any]:
+        """取出全部条目（不等待），唤醒等待空间的生产方"""
+        with self._cond:
+            items = [item for item, _ in self._items]
+            self._items.clear()
+            self._total = 0
+            self._cond.notify_all()
+        return items
+
+    def close(self):
+        """关闭队列：唤醒等待中的生产方，之后放入的条目被拒绝"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self):
+        """清空队列和计数并重新接受条目"""
+        with self._cond:
+            self._items.clear()
+            self._total = 0
+            self._overflows = 0
+            self.dropped = 0
+            self.peak = 0
+            self._closed = False
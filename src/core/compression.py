@@ -0,0 +1,301 @@
+"""压缩日志的流式读取
+
+按文件开头的魔数识别 gzip、bz2 和 xz，只使用标准库解压，不需要先解压到磁盘。
+由多个成员拼接而成的大 gzip 文件（cat 合并的轮转日志、bgzip 等）按压缩字节范围
+切分给多个线程并行解压（zlib 解压时释放 GIL），解压结果按原始顺序交给读取方，
+每个线程最多预先解压有限的数据，内存占用与文件大小无关。
+"""
+import io
+import os
+import bz2
+import gzip
+import lzma
+import queue
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+GZIP_MAGIC = b'\x1f\x8b'
+_MAGICS = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+)
+COMPRESSED_SUFFIXES = ('.gz', '.bz2', '.xz')
+
+# 超过该大小的 gzip 文件尝试并行解压
+PARALLEL_GZIP_SIZE = 32 * 1024 * 1024  # 32MB
+# 每个并行任务负责的压缩字节范围
+GZIP_RANGE_SIZE = 8 * 1024 * 1024  # 8MB
+# 每次送入解压器的压缩数据大小
+_PIECE_SIZE = 256 * 1024
+# 每个任务最多预先解压的数据块数
+_QUEUE_DEPTH = 8
+# 验证候选成员头时试解压的压缩数据大小
+_PROBE_SIZE = 64 * 1024
+
+
+def detect_compression(path: Path) -> Optional[str]:
+    """按魔数识别压缩格式，返回 'gzip'、'bz2'、'xz' 或 None"""
+    with open(path, 'rb') as f:
+        head = f.read(6)
+    for magic, name in _MAGICS:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def strip_compression_suffix(path: Path) -> Path:
+    """去掉压缩后缀：2026-10-16-1.log.gz → 2026-10-16-1.log"""
+    if path.suffix.lower() in COMPRESSED_SUFFIXES:
+        return path.with_suffix('')
+    return path
+
+
+class _CompressedRaw(io.RawIOBase):
+    """单线程流式解压，记录已消耗的压缩字节位置用于进度计算"""
+
+    def __init__(self, file_obj: BinaryIO, fmt: str):
+        """从 file_obj 的当前位置开始解压，关闭时一并关闭 file_obj"""
+        self._file = file_obj
+        if fmt == 'gzip':
+            self._stream = gzip.GzipFile(fileobj=file_obj, mode='rb')
+        elif fmt == 'bz2':
+            self._stream = bz2.BZ2File(file_obj, 'rb')
+        else:
+            self._stream = lzma.LZMAFile(file_obj, 'rb')
+
+    @property
+    def compressed_position(self) -> int:
+        return self._file.tell()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        return self._stream.readinto(buffer)
+
+    def close(self):
+        if not self.closed:
+            try:
+                self._stream.close()
+            finally:
+                self._file.close()
+        super().close()
+
+
+def _valid_header(data: bytes) -> bool:
+    """gzip 成员头：魔数、deflate 方法，保留标志位为 0"""
+    return len(data) >= 4 and data[:3] == b'\x1f\x8b\x08' and not data[3] & 0xE0
+
+
+class _ParallelGzipRaw(io.RawIOBase):
+    """多成员 gzip 的并行解压
+
+    文件按 range_size 切分为压缩字节范围，每个范围由一个任务负责起始位置落在该范围内的
+    所有成员：任务先在范围内找到第一个成员头（候选位置试解压验证），再逐个成员流式解压，
+    直到下一个成员的起始位置超出范围。前一个任务结束时给出下一个成员的准确位置，
+    与后一个任务找到的起始位置不一致（压缩数据中偶然出现的魔数通过了验证）时，
+    停止并行任务，从准确位置开始顺序解压，输出内容始终与 gzip 模块一致。
+    单成员文件退化为第一个任务顺序解压，其余任务找不到成员头后立即结束。
+    """
+
+    def __init__(self, path: Path, workers: int, range_size: int = GZIP_RANGE_SIZE):
+        self.path = path
+        self.size = path.stat().st_size
+        self.range_size = range_size
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gzip-inflate')
+        self._pending = deque()  # 按顺序排列的 (结果队列, 范围结束位置)
+        self._next_start = 0
+        self._current: Optional[queue.Queue] = None
+        self._buffer = memoryview(b'')
+        self._position = 0
+        self._expected = 0  # 下一个成员的准确起始位置
+        self._ended = False
+        self._fallback: Optional[_CompressedRaw] = None
+        for _ in range(workers):
+            self._submit()
+
+    @property
+    def compressed_position(self) -> int:
+        if self._fallback is not None:
+            return self._fallback.compressed_position
+        return self._position
+
+    def readable(self) -> bool:
+        return True
+
+    def _submit(self):
+        if self._next_start >= self.size:
+            return
+        start = self._next_start
+        end = min(start + self.range_size, self.size)
+        self._next_start = end
+        results = queue.Queue(maxsize=_QUEUE_DEPTH)
+        self._executor.submit(self._inflate_range, start, end, results)
+        self._pending.append((results, end))
+
+    def _put(self, results: queue.Queue, item) -> bool:
+        """放入结果，读取方已关闭时返回 False"""
+        while not self._stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _find_member(self, f: BinaryIO, start: int, end: int) -> Optional[int]:
+        """返回 [start, end) 内第一个成员起始位置的候选"""
+        if start == 0:
+            if not _valid_header(f.read(4)):
+                raise OSError(f"不是有效的 gzip 文件: {self.path.name}")
+            return 0
+        f.seek(start)
+        data = f.read(end - start + 3)
+        pos = data.find(b'\x1f\x8b\x08')
+        while 0 <= pos < end - start:
+            f.seek(start + pos)
+            probe = f.read(_PROBE_SIZE)
+            if _valid_header(probe):
+                try:
+                    zlib.decompressobj(31).decompress(probe)
+                    return start + pos
+                except zlib.error:
+                    pass
+            pos = data.find(b'\x1f\x8b\x08', pos + 1)
+        return None
+
+    def _inflate_range(self, start: int, end: int, results: queue.Queue):
+        """工作线程：解压起始位置落在 [start, end) 内的所有成员
+
+        依次放入 ('start', 第一个成员位置)、若干 ('data', 解压数据, 压缩位置)，
+        最后是 ('done', (下一个成员位置, 是否为成员头或文件末尾)) 或 ('error', 异常)。
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                member = self._find_member(f, start, end)
+                if not self._put(results, ('start', member)):
+                    return
+                if member is None:
+                    self._put(results, ('done', None))
+                    return
+                f.seek(member)
+                offset = member  # data 第一个字节在文件中的位置
+                data = f.read(_PIECE_SIZE)
+                decompressor = zlib.decompressobj(31)
+                while not self._stop.is_set():
+                    if decompressor is None and len(data) < 3:
+                        # 上一个成员已结束，读取足够判断下一个成员头的数据
+                        data += f.read(_PIECE_SIZE)
+                    if not data:
+                        if decompressor is not None:
+                            raise EOFError(f"压缩文件不完整: {self.path.name}")
+                        self._put(results, ('done', (offset, True)))
+                        return
+                    if decompressor is None:
+                        is_member = data.startswith(GZIP_MAGIC)
+                        if offset >= end or not is_member:
+                            # 下一个成员属于后面的范围，或者是文件末尾的填充数据
+                            self._put(results, ('done', (offset, is_member)))
+                            return
+                        decompressor = zlib.decompressobj(31)
+                    chunk = decompressor.decompress(data)
+                    if chunk and not self._put(results, ('data', chunk, offset)):
+                        return
+                    if decompressor.eof:
+                        unused = decompressor.unused_data
+                        offset += len(data) - len(unused)
+                        data = unused
+                        decompressor = None
+                    else:
+                        offset += len(data)
+                        data = f.read(_PIECE_SIZE)
+        except BaseException as e:
+            self._put(results, ('error', e))
+
+    def _start_fallback(self):
+        """停止并行任务，从下一个成员的准确位置开始顺序解压"""
+        self._stop.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        f = open(self.path, 'rb')
+        f.seek(self._expected)
+        self._fallback = _CompressedRaw(f, 'gzip')
+
+    def _next_range(self) -> bool:
+        """切换到下一个范围的结果队列，没有更多数据时返回 False"""
+        if self._ended or not self._pending:
+            return False
+        results, end = self._pending[0]
+        item = results.get()
+        if item[0] == 'error':
+            raise item[1]
+        member = item[1]
+        if member != self._expected and (member is not None or self._expected < end):
+            self._start_fallback()
+        else:
+            self._current = results
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer:
+            if self._fallback is not None:
+                return self._fallback.readinto(buffer)
+            if self._current is None:
+                if not self._next_range():
+                    return 0
+                continue
+            item = self._current.get()
+            if item[0] == 'data':
+                self._buffer = memoryview(item[1])
+                self._position = item[2]
+            elif item[0] == 'done':
+                self._pending.popleft()
+                self._current = None
+                if item[1] is not None:
+                    self._expected, is_member = item[1]
+                    # 成员之后不是新的成员头：与 gzip 模块一样忽略末尾的填充数据
+                    self._ended = not is_member
+                self._position = self._expected
+                self._submit()
+            else:
+                raise item[1]
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            if self._fallback is not None:
+                self._fallback.close()
+        super().close()
+
+
+def open_compressed(path: Path, fmt: str, buffer_size: int = io.DEFAULT_BUFFER_SIZE,
+                    workers: Optional[int] = None) -> BinaryIO:
+    """打开压缩文件，返回解压后的二进制流（支持 read、read1、readinto、peek）
+
+    Args:
+        path: 文件路径
+        fmt: detect_compression 的结果
+        buffer_size: 读取缓冲区大小
+        workers: 并行解压 gzip 的线程数，默认为 CPU 核心数，1 表示不并行
+    """
+    workers = workers or os.cpu_count() or 1
+    if fmt == 'gzip' and workers > 1 and path.stat().st_size > PARALLEL_GZIP_SIZE:
+        raw = _ParallelGzipRaw(path, workers)
+    else:
+        raw = _CompressedRaw(open(path, 'rb'), fmt)
+    return io.BufferedReader(raw, buffer_size)
+
+
+def compressed_position(stream: BinaryIO, default: int) -> int:
+    """open_compressed 返回的流已消耗的压缩字节数；普通文件返回 default"""
+    return getattr(getattr(stream, 'raw', None), 'compressed_position', default)
@@ -1,19 +1,62 @@
-import os
-import chardet
+import mmap
 from pathlib import Path
-from typing import Callable, Generator, Optional, Tuple
+from typing import BinaryIO, Callable, Dict, Generator, Iterable, List, Optional, Tuple
+
+from .compression import compressed_position, detect_compression, open_compressed, strip_compression_suffix
+from .line_reader import LineReader
+from .output_sink import FileSink
+from .matcher import KeywordMatcher
+from .progress import ProgressInfo, ProgressTracker
 
 class FileHandler:
-    CHUNK_SIZE = 8192  # 8KB 块大小
+    BLOCK_SIZE = LineReader.DEFAULT_BUFFER_SIZE  # 1MB 字节块大小
+    MAX_LINE_LENGTH = LineReader.MAX_LINE_LENGTH  # 超过该长度的行被切分
     LARGE_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+    MMAP_WINDOW_SIZE = 16 * 1024 * 1024  # 16MB 内存映射扫描窗口
+    LOG_SUFFIXES = ('.log', '.txt')  # 文件列表中显示的日志文件，也可以带 .gz/.bz2/.xz 压缩后缀
+
+    @staticmethod
+    def is_compressed(file_path: Path) -> bool:
+        """是否是 gzip、bz2 或 xz 压缩文件（按文件内容判断，与扩展名无关）"""
+        return detect_compression(file_path) is not None
+
+    @staticmethod
+    def open_input(file_path: Path, buffer_size: int = BLOCK_SIZE) -> BinaryIO:
+        """以二进制方式打开输入文件，压缩文件返回解压后的数据流"""
+        fmt = detect_compression(file_path)
+        if fmt is None:
+            return open(file_path, 'rb')
+        return open_compressed(file_path, fmt, buffer_size)
+
+    @staticmethod
+    def is_log_file(file_path: Path) -> bool:
+        """按扩展名判断是否是日志文件：latest.log、debug.txt、2026-10-16-1.log.gz 等"""
+        plain = strip_compression_suffix(file_path)
+        return plain.suffix.lower() in FileHandler.LOG_SUFFIXES or plain != file_path
+
+    @staticmethod
+    def filtered_name(file_path: Path, suffix: Optional[str] = None) -> str:
+        """过滤结果的文件名：latest.log → latest_filtered.log
+
+        压缩文件的结果是解压后的文本，去掉压缩后缀：2026-10-16-1.log.gz → 2026-10-16-1_filtered.log。
+        suffix 不为空时替换原扩展名（导出为其他格式）。
+        """
+        plain = strip_compression_suffix(file_path)
+        return f"{plain.stem}_filtered{plain.suffix if suffix is None else suffix}"
 
     @staticmethod
     def detect_encoding(file_path: Path) -> str:
         """检测文件编码"""
-        with open(file_path, 'rb') as f:
+        with FileHandler.open_input(file_path, 4096) as f:
             raw = f.read(4096)  # 读取前4KB用于检测
-            result = chardet.detect(raw)
-            return result['encoding'] or 'utf-8'
+            return FileHandler.detect_encoding_bytes(raw)
+
+    @staticmethod
+    def detect_encoding_bytes(raw: bytes) -> str:
+        """检测一段字节内容的编码（用于无法重新读取的标准输入等数据流）"""
+        import chardet  # 导入较慢，只在需要自动检测时加载
+        result = chardet.detect(raw[:4096])
+        return result['encoding'] or 'utf-8'
 
     @staticmethod
     def is_large_file(file_path: Path) -> bool:
@@ -32,14 +75,28 @@ class FileHandler:
         return size, units[unit_index]
 
     @staticmethod
-    def read_in_chunks(file_path: Path, encoding: str = 'utf-8') -> Generator[str, None, None]:
-        """分块读取文件内容"""
-        with open(file_path, 'r', encoding=encoding, errors='ignore') as f:
-            while True:
-                chunk = f.read(FileHandler.CHUNK_SIZE)
-                if not chunk:
-                    break
-                yield chunk
+    def read_lines(file_path: Path, encoding: str = 'utf-8') -> Generator[str, None, None]:
+        """逐行读取文本文件，返回的行不含换行符"""
+        with FileHandler.open_input(file_path) as f:
+            for _, lines in LineReader(f).text_blocks(encoding):
+                yield from lines
+
+    @staticmethod
+    def read_text_blocks(
+            file_obj: BinaryIO,
+            encoding: str = 'utf-8',
+            block_size: int = BLOCK_SIZE,
+            partial: bool = False
+    ) -> Generator[Tuple[int, List[str]], None, None]:
+        """按块读取并解码，每次返回一批完整的行（见 LineReader.text_blocks）
+
+        Args:
+            partial: 为真时使用 read1，管道中已到达的数据立即处理而不必凑满一块
+
+        Yields:
+            (已读取字节数, 行列表)
+        """
+        return LineReader(file_obj, block_size, partial=partial).text_blocks(encoding)
 
     @staticmethod
     def process_large_file(
@@ -47,34 +104,266 @@ class FileHandler:
             output_path: Path,
             line_processor: Callable[[str], Optional[str]],
             encoding: str = 'utf-8',
-            callback: Optional[Callable[[int, int], None]] = None
+            callback: Optional[Callable[[ProgressInfo], None]] = None,
+            write_encoding: Optional[str] = None
     ) -> Tuple[int, int]:
         """处理大文件，支持进度回调
+
+        只读取一遍文件，进度按已读取的字节位置计算（压缩文件按已解压的压缩数据位置计算）。
         
         Args:
             input_path: 输入文件路径
-            output_path: 输出文件路径
+            output_path: 输出文件路径，结果写完后才替换该文件（见 FileSink）
             line_processor: 行处理函数
             encoding: 文件编码
+            write_encoding: 输出文件编码，默认与输入编码相同
             callback: 进度回调函数
             
         Returns:
             处理的总行数和匹配的行数
         """
-        total_lines = sum(1 for _ in open(input_path, 'r', encoding=encoding, errors='ignore'))
-        count_in = count_out = 0
+        tracker = ProgressTracker(input_path.stat().st_size, callback)
+        count_in = 0
         
-        with open(input_path, 'r', encoding=encoding, errors='ignore') as fin, \
-             open(output_path, 'w', encoding=encoding, errors='ignore') as fout:
+        with FileHandler.open_input(input_path) as fin, \
+             FileSink(output_path, write_encoding or encoding) as sink:
             
-            for line in fin:
-                count_in += 1
+            for bytes_read, lines in FileHandler.read_text_blocks(fin, encoding):
+                sink.write_lines([r for r in map(line_processor, lines) if r is not None])
+                count_in += len(lines)
+                tracker.update(compressed_position(fin, bytes_read), count_in, sink.count)
+                    
+        tracker.finish(count_in, sink.count)
+        return count_in, sink.count
+
+    @staticmethod
+    def read_blocks(file_obj: BinaryIO,
+                    block_size: int = BLOCK_SIZE,
+                    partial: bool = False) -> Generator[Tuple[bytes, int], None, None]:
+        """按块读取二进制内容，每块都以完整的行结尾（最后一块除外，见 LineReader.blocks）
+
+        Args:
+            partial: 为真时使用 read1，管道中已到达的数据立即处理而不必凑满一块
+
+        Yields:
+            (数据块, 本块行数)，超长行被切分时只计一行，见 LineReader.counted_blocks
+        """
+        return LineReader(file_obj, block_size, partial=partial).counted_blocks()
+
+    @staticmethod
+    def process_large_file_bytes(
+            input_path: Path,
+            output_path: Path,
+            block_processor: Callable[[bytes], List[bytes]],
+            write_encoding: str = 'utf-8',
+            callback: Optional[Callable[[ProgressInfo], None]] = None
+    ) -> Tuple[int, int]:
+        """以字节块方式处理大文件，不匹配的行既不解码也不切分
+
+        Args:
+            input_path: 输入文件路径
+            output_path: 输出文件路径
+            block_processor: 块处理函数，返回匹配行的输出字节（不含换行符）
+            write_encoding: 输出编码，block_processor 的结果已按该编码编码
+            callback: 进度回调函数
+
+        Returns:
+            处理的总行数和匹配的行数
+        """
+        tracker = ProgressTracker(input_path.stat().st_size, callback)
+        count_in = bytes_read = 0
+
+        with FileHandler.open_input(input_path) as fin, FileSink(output_path, write_encoding) as sink:
+            for block, lines in FileHandler.read_blocks(fin):
+                bytes_read += len(block)
+                count_in += lines
+                sink.write_encoded(block_processor(block))
+                tracker.update(compressed_position(fin, bytes_read), count_in, sink.count)
+
+        tracker.finish(count_in, sink.count)
+        return count_in, sink.count
+
+    @staticmethod
+    def scan_mmap(
+            input_path: Path,
+            matcher: KeywordMatcher,
+            stats: Optional[Dict[str, int]] = None,
+            window_size: int = MMAP_WINDOW_SIZE,
+            on_window: Optional[Callable[[Dict[str, int]], None]] = None
+    ) -> Generator[Tuple[int, int, bytes], None, None]:
+        """内存映射扫描，只取出包含关键字的行
+
+        文件被映射后按窗口（以换行符对齐）直接在映射上扫描，不复制窗口：
+        关键字由 C 层 find 定位后扩展到所在行的边界，只有命中的行被复制出来，
+        不匹配的行不会被切分出来。忽略大小写时映射不能原地折叠，按行对齐分段
+        （每段至多 KeywordMatcher.FOLD_CHUNK 字节）复制折叠后查找，见 KeywordMatcher.scan_lines。
+
+        Args:
+            input_path: 输入文件路径
+            matcher: 字节模式的关键字匹配器（KeywordMatcher.encode() 的结果）
+            stats: 可选的统计字典，扫描过程中更新 'lines'（已扫描行数）和 'bytes'（已扫描字节数）
+            window_size: 扫描窗口大小
+            on_window: 每个窗口扫描完成后的回调，参数为统计字典
+
+        Yields:
+            (行号, 行起始字节偏移, 行内容)，行号从 1 开始，行内容不含换行符
+        """
+        if stats is None:
+            stats = {}
+        stats['lines'] = stats['bytes'] = 0
+
+        scratch = bytearray(FileHandler.BLOCK_SIZE)
+        for mm, pos, end in FileHandler.iter_mmap_windows(input_path, window_size):
+            line_no = stats['lines']
+            cursor = pos
+            for start, stop in matcher.scan_lines(mm, pos, end):
+                line_no += FileHandler.count_mapped_lines(mm, cursor, start, scratch)
+                cursor = start
+                yield line_no + 1, start, mm[start:stop].rstrip(b'\r')
+
+            stats['lines'] = line_no + FileHandler.count_mapped_lines(mm, cursor, end, scratch)
+            if end == len(mm) and mm[end - 1] != ord('\n'):
+                # 文件末尾没有换行符的最后一行
+                stats['lines'] += 1
+            stats['bytes'] = end
+            if on_window:
+                on_window(stats)
+
+    @staticmethod
+    def iter_lines_at(input_path: Path, offsets: Iterable[int]) -> Generator[Tuple[int, bytes], None, None]:
+        """按字节偏移读取指定的行
+
+        Args:
+            input_path: 输入文件路径
+            offsets: 行起始字节偏移，按文件顺序排列
+
+        Yields:
+            (行起始字节偏移, 行内容)，行内容不含换行符
+        """
+        if input_path.stat().st_size == 0:
+            return
+
+        with open(input_path, 'rb') as f, \
+             mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            max_line = FileHandler.MAX_LINE_LENGTH
+            for offset in offsets:
+                if offset >= size:
+                    break
+                end = mm.find(b'\n', offset, offset + max_line)
+                if end < 0:
+                    end = min(size, offset + max_line)
+                yield offset, mm[offset:end].rstrip(b'\r')
+
+    @staticmethod
+    def count_lines(input_path: Path, start: int, end: int) -> int:
+        """统计 [start, end) 字节范围内的换行符数量"""
+        count = 0
+        with open(input_path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                data = f.read(min(remaining, FileHandler.BLOCK_SIZE))
+                if not data:
+                    break
+                count += data.count(b'\n')
+                remaining -= len(data)
+        return count
+
+    @staticmethod
+    def count_mapped_lines(mm: mmap.mmap, start: int, end: int, scratch: Optional[bytearray] = None) -> int:
+        """统计映射中 [start, end) 范围内的换行符数量
+
+        mmap 没有 count，这里分段复制到可复用的缓冲区后计数，不为每个窗口分配新的 bytes。
+
+        Args:
+            scratch: 复用的缓冲区，默认每次调用时新建
+        """
+        if scratch is None:
+            scratch = bytearray(min(max(end - start, 0), FileHandler.BLOCK_SIZE))
+        chunk = len(scratch)
+        count = 0
+        with memoryview(mm) as view:
+            while start < end:
+                size = min(end - start, chunk)
+                scratch[:size] = view[start:start + size]
+                count += scratch.count(b'\n', 0, size)
+                start += size
+        return count
+
+    @staticmethod
+    def iter_mmap_windows(
+            input_path: Path,
+            window_size: int = MMAP_WINDOW_SIZE,
+            start: int = 0
+    ) -> Generator[Tuple[mmap.mmap, int, int], None, None]:
+        """内存映射文件并依次返回按换行符对齐的窗口范围
+
+        窗口内容不会被复制，调用方直接在映射上查找（mmap 支持 find、rfind 和 re），
+        只复制需要的片段；映射在迭代结束后关闭，不能在迭代之外继续使用。
+
+        Args:
+            input_path: 输入文件路径
+            window_size: 窗口大小
+            start: 开始的字节偏移，应位于行首
+
+        Yields:
+            (映射, 窗口起始字节偏移, 窗口结束字节偏移)，除最后一个窗口和超长行被切分处外，
+            窗口都以换行符结尾
+        """
+        if input_path.stat().st_size == 0:
+            return
+
+        with open(input_path, 'rb') as f, \
+             mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            pos = start
+            while pos < size:
+                limit = pos + window_size
+                if limit >= size:
+                    end = size
+                else:
+                    end = mm.rfind(b'\n', pos, limit) + 1
+                    if end == 0:
+                        # 窗口内没有换行符（超长行），扩展到下一个换行符，最长不超过单行上限
+                        line_limit = pos + max(window_size, FileHandler.MAX_LINE_LENGTH)
+                        end = mm.find(b'\n', limit, line_limit) + 1 or min(size, line_limit)
+                yield mm, pos, end
+                pos = end
+
+    @staticmethod
+    def process_large_file_mmap(
+            input_path: Path,
+            output_path: Path,
+            matcher: KeywordMatcher,
+            line_processor: Callable[[bytes], Optional[bytes]],
+            write_encoding: str = 'utf-8',
+            callback: Optional[Callable[[ProgressInfo], None]] = None
+    ) -> Tuple[int, int]:
+        """使用内存映射扫描处理大文件
+
+        Args:
+            input_path: 输入文件路径
+            output_path: 输出文件路径
+            matcher: 字节模式的关键字匹配器
+            line_processor: 处理已命中行的函数，返回不含换行符的输出字节，None 表示丢弃
+            write_encoding: 输出编码，line_processor 的结果已按该编码编码
+            callback: 进度回调函数
+
+        Returns:
+            处理的总行数和匹配的行数
+        """
+        tracker = ProgressTracker(input_path.stat().st_size, callback)
+        stats: Dict[str, int] = {}
+
+        with FileSink(output_path, write_encoding) as sink:
+            def on_window(current: Dict[str, int]):
+                tracker.update(current['bytes'], current['lines'], sink.count)
+
+            for _, _, line in FileHandler.scan_mmap(input_path, matcher, stats, on_window=on_window):
                 result = line_processor(line)
                 if result is not None:
-                    fout.write(result + '\n')
-                    count_out += 1
-                    
-                if callback and count_in % 1000 == 0:
-                    callback(count_in, total_lines)
-                    
-        return count_in, count_out
\ No newline at end of file
+                    sink.add(result)
+
+        tracker.finish(stats.get('lines', 0), sink.count)
+        return stats.get('lines', 0), sink.count
\ No newline at end of file
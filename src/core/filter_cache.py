@@ -0,0 +1,185 @@
+import codecs
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Hashable, NamedTuple, Optional, Tuple
+
+# 默认内存预算：每个匹配行占 8 字节偏移量，64MB 约可容纳八百万行
+DEFAULT_CACHE_SIZE = 64 * 1024 * 1024
+
+
+class FilterResult(NamedTuple):
+    """一次过滤的结果：匹配行的起始字节偏移和统计信息"""
+    offsets: array  # array('Q')，按文件顺序排列
+    lines: int      # [0, scanned) 范围内的行数
+    matched: int    # 已发现的匹配行数，截断时可能大于 len(offsets)
+    truncated: bool  # 是否因显示上限提前停止
+    scanned: int    # offsets 完整覆盖的字节范围 [0, scanned)，未截断时为文件大小
+
+    @property
+    def nbytes(self) -> int:
+        """结果占用的近似内存字节数"""
+        return self.offsets.itemsize * len(self.offsets) + 64
+
+
+def _normalize_terms(text: str, ignore_case: bool) -> Tuple[str, ...]:
+    """把 | 分隔的关键字或字段规范化为与顺序、重复和大小写（忽略大小写时）无关的元组"""
+    terms = {t.strip() for t in (text or '').split('|') if t.strip()}
+    if ignore_case:
+        terms = {t.lower() for t in terms}
+    return tuple(sorted(terms))
+
+
+def _normalize_encoding(encoding: Optional[str]) -> str:
+    if not encoding or encoding == 'auto':
+        return 'auto'
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return encoding.lower()
+
+
+def narrows(terms: Tuple[str, ...], base_terms: Tuple[str, ...], query_mode: bool = False) -> bool:
+    """判断关键字集合 terms 的匹配结果是否一定是 base_terms 匹配结果的子集
+
+    关键字之间是"或"的关系：terms 中每个关键字都包含 base_terms 中的某个关键字时，
+    命中 terms 的行必然命中 base_terms（例如 [CHAT] → [CHAT] <Steve>，或删去一个关键字）。
+    查询模式下 terms 为查询顶层 AND 的条件，见 query.narrows。
+    """
+    if query_mode:
+        from .query import narrows as query_narrows
+        return query_narrows(terms, base_terms)
+    return bool(terms) and all(any(base in term for base in base_terms) for term in terms)
+
+
+def cache_key(input_path: Path,
+              keywords: str,
+              ignore_case: bool,
+              read_enc: Optional[str] = None,
+              filter_fields: str = "",
+              enable_field_filter: bool = False,
+              query_mode: bool = False) -> Hashable:
+    """根据文件指纹和规范化后的过滤配置生成缓存键
+
+    文件指纹为 (绝对路径, 大小, 修改时间纳秒)，文件被改写或追加后键随之变化。
+    查询模式下关键字部分为编译后查询的规范化顶层条件，写法不同但语义相同的查询共用结果。
+
+    Raises:
+        QueryError: 查询语法错误
+    """
+    stat = input_path.stat()
+    fields = filter_fields if enable_field_filter else ""
+    if query_mode:
+        from .query import compile_query
+        terms = compile_query(keywords, ignore_case).conjuncts
+    else:
+        terms = _normalize_terms(keywords, ignore_case)
+    return (
+        str(input_path.resolve()), stat.st_size, stat.st_mtime_ns,
+        terms,
+        bool(ignore_case),
+        _normalize_terms(fields, ignore_case),
+        _normalize_encoding(read_enc),
+        bool(query_mode)
+    )
+
+
+class FilterCache:
+    """过滤结果的 LRU 缓存
+
+    只保存匹配行的字节偏移（array('Q')）和计数，不保存行内容，
+    命中后按偏移重新读取匹配行即可还原结果。总内存超过预算时淘汰最久未使用的结果。
+    可以在预览线程和 Tk 线程之间共享。
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_SIZE):
+        """初始化缓存
+
+        Args:
+            max_bytes: 内存预算（字节），0 表示禁用缓存
+        """
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, FilterResult]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """当前占用的近似内存字节数"""
+        return self._size
+
+    def get(self, key: Hashable, limit: Optional[int] = None) -> Optional[FilterResult]:
+        """查找可以满足本次请求的结果
+
+        被截断的结果只能满足显示上限不超过已保存行数的请求。
+
+        Args:
+            key: cache_key() 生成的键
+            limit: 本次请求的显示上限，None 表示不限制
+        """
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None and result.truncated and not (limit and limit <= len(result.offsets)):
+                result = None
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def find_base(self, key: Hashable) -> Optional[FilterResult]:
+        """查找可以作为增量过滤基础的完整结果
+
+        要求同一文件指纹、相同的大小写/字段/编码/查询模式配置，且本次关键字收窄了缓存结果的关键字
+        （见 narrows），此时只需重新检查缓存结果中的行；被截断的结果只覆盖 [0, scanned)，
+        之后的部分仍需扫描。有多个候选时返回匹配行最少的一个。
+        """
+        best = None
+        with self._lock:
+            for other, result in self._entries.items():
+                if other[:3] != key[:3] or other[4:] != key[4:]:
+                    continue
+                if not narrows(key[3], other[3], key[7]):
+                    continue
+                if best is None or len(result.offsets) < len(best[1].offsets):
+                    best = (other, result)
+            if best is None:
+                return None
+            self._entries.move_to_end(best[0])
+            return best[1]
+
+    def put(self, key: Hashable, result: FilterResult):
+        """保存结果，超出内存预算时淘汰最久未使用的结果"""
+        size = result.nbytes
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old.nbytes
+            if size > self.max_bytes:
+                return
+            self._entries[key] = result
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.nbytes
+
+    def resize(self, max_bytes: int):
+        """调整内存预算并立即按新预算淘汰"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self._entries and self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.nbytes
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
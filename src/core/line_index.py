@@ -0,0 +1,278 @@
+"""行偏移索引
+
+记录文件中每隔 stride 行的行首字节偏移，保存为 ~/.logwatch/index 下的附属文件。
+有了索引，按行号定位、显示搜索结果的上下文和并行分片都只需要从最近的检查点
+向后读取至多 stride 行，不必从文件开头重新扫描。文件增长（日志追加写入）时
+只扫描新增的部分；文件被替换或截断时重新建立索引。
+
+索引按换行符字节计数，只适用于与 ASCII 兼容的编码（UTF-16 等编码的换行符不是单字节）。
+"""
+import os
+import struct
+import hashlib
+import mmap
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import Generator, List, Optional, Tuple
+
+from .compression import detect_compression
+
+# 索引附属文件所在目录
+INDEX_DIR = Path.home() / '.logwatch' / 'index'
+# 默认每隔多少行记录一个检查点
+DEFAULT_STRIDE = 1024
+# 建立索引时每次扫描的字节数
+SCAN_BLOCK_SIZE = 16 * 1024 * 1024  # 16MB
+# 用于识别文件是否被替换的文件头长度
+HEAD_SIZE = 4096
+
+_MAGIC = b'LWIX'
+_VERSION = 1
+# 魔数、版本、stride、已索引字节数、完整行数、文件头长度、文件头摘要、检查点数量
+_HEADER = struct.Struct('<4sHIQQI8sQ')
+
+
+def _newline_checkpoints(block: bytes, pos: int, lines: int, stride: int) -> array:
+    """返回 block 中行号为 stride 整数倍的行的起始偏移
+
+    Args:
+        block: 数据块
+        pos: 数据块在文件中的起始偏移
+        lines: 数据块之前的完整行数（即数据块第一行的行号，从 0 开始）
+        stride: 检查点间隔
+    """
+    # 第 j 个换行符之后是第 lines + j + 1 行
+    first = (-(lines + 1)) % stride
+    result = array('Q')
+    try:
+        import numpy as np
+    except ImportError:
+        index = -1
+        for _ in range(first + 1):
+            index = block.find(b'\n', index + 1)
+            if index < 0:
+                return result
+        while index >= 0:
+            result.append(pos + index + 1)
+            for _ in range(stride):
+                index = block.find(b'\n', index + 1)
+                if index < 0:
+                    break
+        return result
+    newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == 10)
+    picks = newlines[first::stride].astype('<u8') + (pos + 1)
+    result.frombytes(picks.tobytes())
+    return result
+
+
+class LineIndex:
+    """文件的稀疏行偏移索引
+
+    offsets[k] 是第 k * stride 行（从 0 开始）的起始字节偏移。索引覆盖 [0, indexed_size)，
+    indexed_size 总是位于行首（最后一个换行符之后），末尾不完整的行在文件增长后重新扫描。
+    """
+
+    def __init__(self, path: Path, stride: int = DEFAULT_STRIDE):
+        self.path = Path(path)
+        self.stride = stride
+        self.offsets = array('Q', [0])
+        self.indexed_size = 0
+        self.total_lines = 0  # [0, indexed_size) 内的完整行数
+        self._head = b''  # 文件头摘要
+        self._head_len = 0
+
+    @classmethod
+    def for_file(cls, path: Path, stride: int = DEFAULT_STRIDE, save: bool = True) -> 'LineIndex':
+        """加载文件的索引，文件增长时增量扩展，被替换时重新建立
+
+        Args:
+            path: 日志文件路径
+            stride: 新建索引的检查点间隔（已有索引沿用原来的间隔）
+            save: 索引有变化时是否写回附属文件
+
+        Raises:
+            ValueError: 压缩文件无法建立字节偏移索引
+        """
+        path = Path(path)
+        if detect_compression(path) is not None:
+            raise ValueError(f"压缩文件不支持行索引: {path.name}")
+        index = cls.load(path) or cls(path, stride)
+        if index.update() and save:
+            index.save()
+        return index
+
+    @classmethod
+    def existing(cls, path: Path) -> Optional['LineIndex']:
+        """只使用已经建立过的索引（扩展到文件当前大小），没有时返回 None 而不是扫描整个文件"""
+        index = cls.load(path)
+        if index is not None and index.update():
+            index.save()
+        return index
+
+    @staticmethod
+    def sidecar_path(path: Path) -> Path:
+        """索引附属文件的路径，文件名包含完整路径的摘要，不同目录下的同名日志互不影响"""
+        resolved = str(Path(path).resolve())
+        digest = hashlib.sha1(resolved.encode('utf-8', 'surrogatepass')).hexdigest()[:16]
+        return INDEX_DIR / f"{Path(path).name}.{digest}.lwi"
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['LineIndex']:
+        """读取已保存的索引，不存在或已损坏时返回 None（不检查是否与文件一致，见 update）"""
+        try:
+            with open(cls.sidecar_path(path), 'rb') as f:
+                header = f.read(_HEADER.size)
+                magic, version, stride, indexed_size, total_lines, head_len, head, count = _HEADER.unpack(header)
+                if magic != _MAGIC or version != _VERSION or stride <= 0:
+                    return None
+                offsets = array('Q')
+                offsets.fromfile(f, count)
+        except (OSError, struct.error, EOFError):
+            return None
+        if not offsets or offsets[0] != 0:
+            return None
+        index = cls(path, stride)
+        index.offsets = offsets
+        index.indexed_size = indexed_size
+        index.total_lines = total_lines
+        index._head = head
+        index._head_len = head_len
+        return index
+
+    def save(self):
+        """写入附属文件（先写临时文件再替换，其他进程不会读到写了一半的索引）"""
+        target = self.sidecar_path(self.path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        with open(temp, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.stride, self.indexed_size, self.total_lines,
+                                 self._head_len, self._head, len(self.offsets)))
+            self.offsets.tofile(f)
+        os.replace(temp, target)
+
+    @staticmethod
+    def _digest(data: bytes) -> bytes:
+        return hashlib.blake2b(data, digest_size=8).digest()
+
+    def _is_current(self, f, size: int) -> bool:
+        """已索引的部分是否仍与文件内容一致（文件只在末尾追加过）"""
+        if size < self.indexed_size:
+            return False
+        f.seek(0)
+        if self._digest(f.read(self._head_len)) != self._head:
+            return False
+        if self.indexed_size:
+            f.seek(self.indexed_size - 1)
+            return f.read(1) == b'\n'
+        return True
+
+    def _reset(self):
+        self.offsets = array('Q', [0])
+        self.indexed_size = 0
+        self.total_lines = 0
+        self._head_len = 0
+        self._head = self._digest(b'')
+
+    def update(self) -> bool:
+        """让索引覆盖文件的当前内容，返回索引是否有变化"""
+        size = self.path.stat().st_size
+        with open(self.path, 'rb') as f:
+            changed = False
+            if not self._is_current(f, size):
+                self._reset()
+                changed = True
+            if self._head_len < HEAD_SIZE and size > self._head_len:
+                f.seek(0)
+                head = f.read(HEAD_SIZE)
+                self._head_len, self._head = len(head), self._digest(head)
+                changed = True
+            if size - self.indexed_size > 0:
+                changed = self._scan(f) or changed
+        return changed
+
+    def _scan(self, f) -> bool:
+        """从 indexed_size 开始扫描到文件末尾"""
+        pos = self.indexed_size
+        lines = self.total_lines
+        aligned = pos
+        f.seek(pos)
+        while True:
+            block = f.read(SCAN_BLOCK_SIZE)
+            if not block:
+                break
+            checkpoints = _newline_checkpoints(block, pos, lines, self.stride)
+            self.offsets.extend(checkpoints)
+            lines += block.count(b'\n')
+            last = block.rfind(b'\n')
+            if last >= 0:
+                aligned = pos + last + 1
+            pos += len(block)
+        changed = aligned != self.indexed_size
+        self.indexed_size = aligned
+        self.total_lines = lines
+        return changed
+
+    @property
+    def line_count(self) -> int:
+        """文件的行数（末尾没有换行符的最后一行也计入）"""
+        return self.total_lines + (self.path.stat().st_size > self.indexed_size)
+
+    def line_offset(self, line_no: int) -> int:
+        """第 line_no 行（从 1 开始）的起始字节偏移
+
+        Raises:
+            IndexError: 行号超出索引范围
+        """
+        if line_no < 1 or line_no > self.total_lines + 1:
+            raise IndexError(f"行号超出范围: {line_no}")
+        checkpoint, skip = divmod(line_no - 1, self.stride)
+        offset = self.offsets[checkpoint]
+        if not skip:
+            return offset
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for _ in range(skip):
+                offset = mm.find(b'\n', offset) + 1
+        return offset
+
+    def line_number(self, offset: int) -> int:
+        """字节偏移所在行的行号（从 1 开始）"""
+        checkpoint = bisect_right(self.offsets, offset) - 1
+        start = self.offsets[checkpoint]
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            skipped = f.read(offset - start).count(b'\n')
+        return checkpoint * self.stride + skipped + 1
+
+    def iter_lines(self, first: int, count: int) -> Generator[Tuple[int, bytes], None, None]:
+        """从第 first 行开始读取至多 count 行
+
+        Yields:
+            (行号, 行内容)，行内容不含换行符
+        """
+        from .line_reader import LineReader
+        first = max(first, 1)
+        if count <= 0 or first > self.total_lines + 1:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self.line_offset(first))
+            for line_no, line in enumerate(LineReader(f, 64 * 1024), first):
+                yield line_no, line
+                if line_no - first + 1 >= count:
+                    break
+
+    def shard_bounds(self, shard_count: int) -> List[int]:
+        """把文件切分为 shard_count 份的分界偏移，每个分界都位于行首
+
+        Returns:
+            递增的偏移列表，以 0 开头、以文件大小结尾
+        """
+        size = self.path.stat().st_size
+        bounds = [0]
+        for i in range(1, shard_count):
+            checkpoint = self.offsets[bisect_right(self.offsets, size * i // shard_count) - 1]
+            if checkpoint > bounds[-1]:
+                bounds.append(checkpoint)
+        if size > bounds[-1]:
+            bounds.append(size)
+        return bounds
@@ -0,0 +1,163 @@
+import codecs
+from typing import BinaryIO, Generator, Iterator, List, Tuple
+
+from .matcher import is_ascii_compatible
+
+
+def _split_lines(text: str) -> List[str]:
+    """切分不含末尾换行符的文本，\\r\\n 与 \\n 都视为换行"""
+    if text.endswith('\r'):
+        text = text[:-1]
+    return text.replace('\r\n', '\n').split('\n')
+
+
+class LineReader:
+    """基于大块二进制读取的按行读取器，项目中所有按行读取的入口都经由这里
+
+    数据用 readinto 读入可复用的缓冲区，通过 memoryview 切出以换行符结尾的数据块，
+    块末尾不完整的行留在缓冲区开头与下一次读取拼接，跨块的行不会被拆开，
+    每块数据只复制一次。一行超过 max_line_length 时在该长度处强制切分，
+    没有换行符的超大文件也只占用有限的内存。
+    """
+
+    DEFAULT_BUFFER_SIZE = 1024 * 1024  # 1MB 读取缓冲区
+    MAX_LINE_LENGTH = 16 * 1024 * 1024  # 16MB 单行上限
+
+    def __init__(self,
+                 file_obj: BinaryIO,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 max_line_length: int = MAX_LINE_LENGTH,
+                 partial: bool = False):
+        """初始化读取器
+
+        Args:
+            file_obj: 二进制文件对象，需要支持 read（有 readinto 时优先使用）
+            buffer_size: 每次读取的字节数
+            max_line_length: 单行最大字节数（文本模式下为字符数），超过时切分，不小于 buffer_size
+            partial: 为真时使用 read1/readinto1，管道中已到达的数据立即处理而不必凑满一块
+        """
+        self.file_obj = file_obj
+        self.buffer_size = buffer_size
+        self.max_line_length = max(max_line_length, buffer_size)
+        self.partial = partial
+        self.bytes_read = 0
+        self.split_lines = 0  # 因超长被切分的次数
+        self._read = getattr(file_obj, 'read1', file_obj.read) if partial else file_obj.read
+        self._readinto = getattr(file_obj, 'readinto1' if partial else 'readinto', None)
+
+    def _fill(self, view: memoryview) -> int:
+        """把数据读入 view，返回读取的字节数，0 表示结束"""
+        if self._readinto is not None:
+            return self._readinto(view) or 0
+        data = self._read(len(view))
+        view[:len(data)] = data
+        return len(data)
+
+    def blocks(self) -> Generator[bytes, None, None]:
+        """按块返回二进制内容，每块都以完整的行结尾（最后一块和被切分的超长行除外）"""
+        buf = bytearray(self.buffer_size)
+        view = memoryview(buf)
+        filled = 0  # 缓冲区中的数据长度，开头是上一块遗留的不完整行
+        try:
+            while True:
+                if filled == len(buf):
+                    # 缓冲区被一行占满
+                    if len(buf) >= self.max_line_length:
+                        self.split_lines += 1
+                        yield bytes(view[:filled])
+                        filled = 0
+                    else:
+                        grown = bytearray(min(len(buf) * 2, self.max_line_length))
+                        grown[:filled] = view[:filled]
+                        view.release()
+                        buf, view = grown, memoryview(grown)
+                read = self._fill(view[filled:filled + self.buffer_size])
+                if not read:
+                    break
+                self.bytes_read += read
+                start = filled
+                filled += read
+                # 遗留部分不含换行符，只需在新读入的数据中查找
+                cut = buf.rfind(b'\n', start, filled) + 1
+                if cut == 0:
+                    continue
+                yield bytes(view[:cut])
+                rest = filled - cut
+                if rest:
+                    view[:rest] = view[cut:filled]
+                filled = rest
+            if filled:
+                yield bytes(view[:filled])
+        finally:
+            view.release()
+
+    def counted_blocks(self) -> Generator[Tuple[bytes, int], None, None]:
+        """与 blocks 相同，同时给出每块的行数
+
+        被切分的超长行只在以换行符结尾的最后一段计数，没有换行符的最后一行在文件末尾计数，
+        与内存映射扫描的计数一致。
+
+        Yields:
+            (数据块, 本块行数)
+        """
+        split = self.split_lines
+        cut = None  # 被切分的一段不含换行符，要看到下一块才知道它是否在文件末尾
+        for block in self.blocks():
+            if cut is not None:
+                yield cut, 0
+                cut = None
+            if self.split_lines != split:
+                split = self.split_lines
+                cut = block
+                continue
+            # 只有最后一块可能不以换行符结尾
+            yield block, block.count(b'\n') + (not block.endswith(b'\n'))
+        if cut is not None:
+            yield cut, 1
+
+    def __iter__(self) -> Iterator[bytes]:
+        """逐行返回二进制内容，不含换行符"""
+        for block in self.blocks():
+            if block.endswith(b'\n'):
+                block = block[:-1]
+            for line in block.split(b'\n'):
+                yield line[:-1] if line.endswith(b'\r') else line
+
+    def text_blocks(self, encoding: str = 'utf-8') -> Generator[Tuple[int, List[str]], None, None]:
+        """按块读取并解码，每次返回一批完整的行
+
+        与 ASCII 兼容的编码中换行符字节只可能表示换行，直接解码以换行符对齐的数据块；
+        UTF-16 等编码使用增量解码器，块边界切断的多字节字符也能正确拼接。
+        行尾的 \\r\\n 统一为 \\n，返回的行不含换行符。
+
+        Yields:
+            (已读取字节数, 行列表)
+        """
+        if is_ascii_compatible(encoding):
+            for block in self.blocks():
+                text = block.decode(encoding, 'ignore')
+                if text.endswith('\n'):
+                    text = text[:-1]
+                yield self.bytes_read, _split_lines(text)
+            return
+
+        decoder = codecs.getincrementaldecoder(encoding)(errors='ignore')
+        carry = ''
+        while True:
+            data = self._read(self.buffer_size)
+            self.bytes_read += len(data)
+            text = carry + decoder.decode(data, final=not data)
+            if not data:
+                if text:
+                    yield self.bytes_read, _split_lines(text)
+                break
+            cut = text.rfind('\n')
+            if cut < 0:
+                if len(text) >= self.max_line_length:
+                    self.split_lines += 1
+                    yield self.bytes_read, [text]
+                    text = ''
+                carry = text
+                continue
+            carry = text[cut + 1:]
+            yield self.bytes_read, _split_lines(text[:cut])
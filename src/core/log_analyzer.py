@@ -4,8 +4,14 @@ from pathlib import Path
 from datetime import datetime
 import re
 from collections import Counter
-import matplotlib.pyplot as plt
-import seaborn as sns
+from typing import TYPE_CHECKING
+
+from .file_handler import FileHandler
+
+# matplotlib 和 seaborn 只在绘图时导入，命令行分析不需要加载它们
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+
 
 class LogAnalyzer:
     def __init__(self):
@@ -32,16 +38,12 @@ class LogAnalyzer:
         Returns:
             包含解析后日志数据的DataFrame
         """
-        # 读取日志文件
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            
         # 解析日志行
         data = []
         time_pattern = r'\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2}'
         level_pattern = r'(DEBUG|INFO|WARNING|ERROR|CRITICAL)'
         
-        for line in lines:
+        for line in FileHandler.read_lines(file_path, 'utf-8'):
             try:
                 # 提取时间戳
                 time_match = re.search(time_pattern, line)
@@ -71,7 +73,7 @@ class LogAnalyzer:
         
     def _generate_stats(self):
         """生成统计信息"""
-        if self.df is None:
+        if self.df is None or self.df.empty:
             return
             
         # 基本统计信息
@@ -119,7 +121,7 @@ class LogAnalyzer:
         """
         return self.current_file
         
-    def plot_time_distribution(self) -> plt.Figure:
+    def plot_time_distribution(self) -> 'plt.Figure':
         """生成时间分布图
         
         Returns:
@@ -128,6 +130,8 @@ class LogAnalyzer:
         if self.df is None:
             return None
             
+        import matplotlib.pyplot as plt
+        import seaborn as sns
         plt.figure(figsize=(12, 6))
         sns.set_style("whitegrid")
         sns.histplot(data=self.df, x='hour', bins=24)
@@ -136,7 +140,7 @@ class LogAnalyzer:
         plt.ylabel('数量')
         return plt.gcf()
         
-    def plot_level_distribution(self) -> plt.Figure:
+    def plot_level_distribution(self) -> 'plt.Figure':
         """生成日志级别分布饼图
         
         Returns:
@@ -145,6 +149,7 @@ class LogAnalyzer:
         if self.df is None:
             return None
             
+        import matplotlib.pyplot as plt
         plt.figure(figsize=(8, 8))
         level_counts = self.df['level'].value_counts()
         plt.pie(level_counts.values, labels=level_counts.index, autopct='%1.1f%%')
@@ -1,90 +1,488 @@
+import fnmatch
+import glob
+import logging
+import os
+import threading
+import time
 from pathlib import Path
-from typing import Callable, Optional
-import queue
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler, FileModifiedEvent
+from watchdog.events import FileSystemEventHandler
+
+from .bounded_queue import BLOCK, BoundedQueue
+from .line_reader import _split_lines
+from .matcher import LineFilter
+from .tail_reader import TailReader
+
+# 合并输出流中的一项：(来源文件, 通过过滤的行)
+Update = Tuple[Path, List[str]]
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(path: Union[str, Path]) -> Path:
+    """统一路径写法，与 watchdog 事件中的路径（监控目录 + 文件名）一致"""
+    return Path(os.path.abspath(path))
+
+
+class FileTail:
+    """一个被监控文件的读取器和过滤管道"""
+
+    def __init__(self,
+                 path: Path,
+                 encoding: str,
+                 line_filter: Optional[LineFilter] = None,
+                 from_end: bool = True,
+                 discovered: bool = False):
+        """初始化
+
+        Args:
+            path: 文件路径
+            encoding: 文件编码
+            line_filter: 编译好的行过滤器，None 或没有关键字时输出全部行
+            from_end: 为真时只读取之后新增的内容
+            discovered: 是否由通配符目标匹配得到（被删除或改名后不再跟踪）
+        """
+        self.path = path
+        self.reader = TailReader(path, encoding, from_end)
+        self.line_filter = line_filter
+        self.discovered = discovered
+
+    def poll(self, emit: Callable[[Path, List[str]], None]):
+        """读取所有新增的完整行，过滤后分批交给 emit（文件一次增长很多时分多批）"""
+        while True:
+            position = self.reader.position
+            content = self.reader.read()
+            if content:
+                self._emit(content, emit)
+            elif self.reader.position == position:
+                break
+            if not self.reader.has_more:
+                break
+
+    def flush(self, emit: Callable[[Path, List[str]], None]):
+        """不再跟踪该文件前调用：末尾没有换行符的最后一行不会再写完，作为完整的一行交给 emit"""
+        content = self.reader.flush()
+        if content:
+            self._emit(content, emit)
+
+    def _emit(self, content: str, emit: Callable[[Path, List[str]], None]):
+        # 只按 \n 和 \r\n 切分，与 LineReader 一致（splitlines 还会在 \x0b、\x1c、\u2028 等处切分）
+        lines = _split_lines(content[:-1] if content.endswith('\n') else content)
+        line_filter = self.line_filter
+        if line_filter is not None and line_filter.matcher:
+            lines = [r for r in map(line_filter, lines) if r is not None]
+        if lines:
+            emit(self.path, lines)
+
+    def close(self):
+        self.reader.close()
+
+
+class DirectoryHandler(FileSystemEventHandler):
+    """一个目录的事件处理器，把事件按文件路径转交给监控器（只做标记，读取在读取线程中进行）"""
+
+    def __init__(self, monitor: 'LogMonitor'):
+        self.monitor = monitor
 
-class LogFileHandler(FileSystemEventHandler):
-    """日志文件变化处理器"""
-    def __init__(self, callback: Callable[[str], None], file_path: Path):
-        self.callback = callback
-        self.file_path = file_path
-        self.last_position = self.file_path.stat().st_size if self.file_path.exists() else 0
-        
     def on_modified(self, event):
-        if not isinstance(event, FileModifiedEvent):
-            return
-            
-        if Path(event.src_path) != self.file_path:
-            return
-            
-        try:
-            current_size = self.file_path.stat().st_size
-            if current_size < self.last_position:
-                # 文件被截断，从头开始读取
-                self.last_position = 0
-                
-            if current_size > self.last_position:
-                with self.file_path.open('r', encoding='utf-8', errors='ignore') as f:
-                    f.seek(self.last_position)
-                    new_content = f.read()
-                    if new_content:
-                        self.callback(new_content)
-                self.last_position = current_size
-                
-        except Exception as e:
-            print(f"读取文件更新时出错: {e}")
+        if not event.is_directory:
+            self.monitor._on_changed(_normalize(event.src_path))
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.monitor._on_changed(_normalize(event.src_path), created=True)
+
+    def on_moved(self, event):
+        # 旧文件读完剩余内容后不再跟踪（明确指定的文件除外）；其他文件改名为被监控的文件名时读取新文件
+        if not event.is_directory:
+            self.monitor._on_changed(_normalize(event.src_path), gone=True)
+            self.monitor._on_changed(_normalize(event.dest_path), moved=True)
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self.monitor._on_changed(_normalize(event.src_path), gone=True)
+
 
 class LogMonitor:
-    """实时监控日志文件变化"""
-    def __init__(self, callback: Callable[[str], None]):
+    """实时监控一个或多个日志文件
+
+    所有目标共用一个 Observer，每个目录只注册一次；每个文件有自己的 TailReader 和过滤器。
+    事件按文件路径查表分发，目标数量增加时单个事件的处理代价不变。
+    目标可以是文件路径，也可以是通配符（如 logs/*.log），监控期间新建的匹配文件自动加入。
+
+    文件事件只把文件标记为待读取，由单独的读取线程处理：第一个事件到达后等待 latency 秒，
+    期间同一文件的后续事件合并，每个文件每批只读取一次。读取线程同时按自适应的间隔
+    轮询所有文件（stat 检查大小），弥补网络文件系统等场景下丢失的事件：轮询发现新内容时
+    间隔缩短到 poll_interval[0]，没有新内容时逐次加倍到 poll_interval[1]。
+    use_events 为 False 时不使用 watchdog，只靠轮询。stats 记录事件数、合并数、读取次数
+    和字节数等计数，用于在延迟和系统调用开销之间权衡。
+
+    各文件通过过滤的行汇合为一个标明来源文件的输出流。传入 callback 时直接在读取线程中
+    调用（命令行直接打印）；否则放入有界队列，由使用方在自己的线程中通过 get_updates 取出，
+    界面在 Tk 线程中定时取出并合并为一次更新，不会在监控线程中操作组件。
+    队列按行数限制积压，取用方跟不上时按 overflow 策略等待或丢弃（见 BoundedQueue），
+    丢弃的行数计入 stats['dropped']。超过 queue_lines 行的批次拆开放入，积压的内容
+    不超过 queue_lines 行，读取线程中另有至多一次读取（TailReader.READ_SIZE 字节）的内容，
+    与写入速度无关。
+    """
+
+    # 队列中最多积压的行数
+    QUEUE_LINES = 100000
+    # 合并事件的默认延迟预算（秒）
+    LATENCY = 0.05
+    # 轮询间隔的默认范围（秒）
+    POLL_INTERVAL = (0.25, 5.0)
+
+    def __init__(self,
+                 callback: Optional[Callable[[Path, List[str]], None]] = None,
+                 queue_lines: int = QUEUE_LINES,
+                 overflow: str = BLOCK,
+                 sample_rate: int = 10,
+                 latency: float = LATENCY,
+                 use_events: bool = True,
+                 poll_interval: Tuple[float, float] = POLL_INTERVAL,
+                 on_error: Optional[Callable[[str], None]] = None):
+        """初始化监控器
+
+        Args:
+            callback: 在读取线程中接收 (来源文件, 行) 的回调，为 None 时放入队列
+            queue_lines: 队列最多积压的行数
+            overflow: 队列已满时的策略：'block' 读取线程等待，'drop_oldest' 丢弃最早的行，
+                      'sample' 每 sample_rate 行只保留一行
+            sample_rate: sample 策略的抽样间隔
+            latency: 收到事件后等待合并的时间（秒），越长每次读取的数据越多、读取次数越少
+            use_events: 是否使用 watchdog 的文件事件，为 False 时只轮询
+            poll_interval: 轮询间隔的 (最小值, 最大值)（秒）
+            on_error: 在读取线程中接收错误消息的回调（如 app.log_error），为 None 时写入 logging
+
+        Raises:
+            ValueError: 未知的队列策略
+        """
         self.callback = callback
+        self.on_error = on_error
+        self.latency = latency
+        self.use_events = use_events
+        self.poll_interval = poll_interval
         self.running = False
-        self.current_file: Optional[Path] = None
         self.observer: Optional[Observer] = None # type: ignore
-        self.handler: Optional[LogFileHandler] = None
-        self.queue = queue.Queue()
-        
-    def start_monitoring(self, file_path: Path):
-        """开始监控指定文件"""
+        self.queue = BoundedQueue(queue_lines, overflow, sample_rate,
+                                  weigh=lambda update: len(update[1]),
+                                  thin=lambda update, start, step: (update[0], update[1][start::step]))
+        self.stats: Dict[str, int] = {}
+        self._reset_stats()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # 待读取的文件 -> 读取后是否不再跟踪（文件已被删除或改名）
+        self._dirty: Dict[Path, bool] = {}
+        self._tails: Dict[Path, FileTail] = {}
+        # 目录 -> [(文件名通配符, 编码, 过滤器)]，用于识别监控期间新建的文件
+        self._patterns: Dict[Path, List[Tuple[str, str, Optional[LineFilter]]]] = {}
+        self._watched: Dict[Path, object] = {}  # 目录 -> watchdog 的 ObservedWatch
+
+    @property
+    def files(self) -> List[Path]:
+        """当前跟踪的文件"""
+        with self._lock:
+            return list(self._tails)
+
+    @property
+    def current_file(self) -> Optional[Path]:
+        """只监控一个文件时返回该文件"""
+        files = self.files
+        return files[0] if len(files) == 1 else None
+
+    def start_monitoring(self,
+                         targets: Union[Path, str, Iterable[Union[Path, str]]],
+                         encoding: str = 'utf-8',
+                         line_filter: Optional[LineFilter] = None):
+        """停止当前的监控，开始监控指定的目标
+
+        Args:
+            targets: 一个或多个文件路径或通配符
+            encoding: 文件编码（不能为 'auto'）
+            line_filter: 各文件使用的行过滤器，None 时输出全部行
+
+        Raises:
+            LookupError: 不支持的编码
+        """
         if self.running:
             self.stop_monitoring()
-            
-        self.current_file = file_path
+        if isinstance(targets, (str, Path)):
+            targets = [targets]
+
         self.running = True
-        
-        # 创建文件处理器和观察者
-        self.handler = LogFileHandler(self._on_file_update, file_path)
-        self.observer = Observer()
-        self.observer.schedule(self.handler, str(file_path.parent), recursive=False)
-        self.observer.start()
-        
+        self._stopped.clear()
+        self._reset_stats()
+        self.queue.reopen()
+        if self.use_events:
+            self.observer = Observer()
+            self.observer.start()
+        self._thread = threading.Thread(target=self._reader_loop, name="log-monitor", daemon=True)
+        self._thread.start()
+        try:
+            for target in targets:
+                self.add_target(target, encoding, line_filter)
+        except Exception:
+            self.stop_monitoring()
+            raise
+
+    def add_target(self,
+                   target: Union[Path, str],
+                   encoding: str = 'utf-8',
+                   line_filter: Optional[LineFilter] = None) -> List[Path]:
+        """添加监控目标（需先调用 start_monitoring）
+
+        Args:
+            target: 文件路径或通配符；目录部分的通配符在添加时展开，之后新建的目录不会加入
+            encoding: 文件编码
+            line_filter: 该目标使用的行过滤器
+
+        Returns:
+            目标当前匹配的文件
+        """
+        target = _normalize(target)
+        directory = target.parent
+        if glob.has_magic(str(directory)):
+            paths = []
+            for matched in sorted(glob.glob(str(directory))):
+                if os.path.isdir(matched):
+                    paths.extend(self.add_target(Path(matched) / target.name, encoding, line_filter))
+            return paths
+        if glob.has_magic(target.name):
+            paths = [_normalize(p) for p in sorted(glob.glob(str(target))) if os.path.isfile(p)]
+            discovered = True
+        else:
+            # 单个文件暂时不存在时也跟踪，文件出现后从头读取
+            paths = [target]
+            discovered = False
+
+        with self._lock:
+            for path in paths:
+                if path not in self._tails:
+                    self._tails[path] = FileTail(path, encoding, line_filter, discovered=discovered)
+            self._patterns.setdefault(directory, []).append((target.name, encoding, line_filter))
+            if directory not in self._watched and self.observer is not None:
+                self._watched[directory] = self.observer.schedule(
+                    DirectoryHandler(self), str(directory), recursive=False)
+        return paths
+
+    def set_line_filter(self, line_filter: Optional[LineFilter]):
+        """更换所有文件的行过滤器，之后读取的行按新条件过滤"""
+        with self._lock:
+            for tail in self._tails.values():
+                tail.line_filter = line_filter
+            for directory, patterns in self._patterns.items():
+                self._patterns[directory] = [(name, enc, line_filter) for name, enc, _ in patterns]
+
     def stop_monitoring(self):
         """停止监控"""
         self.running = False
+        self._stopped.set()
+        # 唤醒因队列已满而等待的读取线程
+        self.queue.close()
+        with self._wakeup:
+            self._wakeup.notify()
         if self.observer:
             self.observer.stop()
             self.observer.join(timeout=1.0)
             self.observer = None
-        self.current_file = None
-        self.handler = None
-        
-    def _on_file_update(self, new_content: str):
-        """处理文件更新"""
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        with self._lock:
+            for tail in self._tails.values():
+                tail.close()
+            self._tails.clear()
+            self._patterns.clear()
+            self._watched.clear()
+            self._dirty.clear()
+        # 丢弃停止前尚未取出的内容，下次监控不会显示过期的内容
+        self.get_updates()
+
+    def _match_pattern(self, path: Path) -> Optional[Tuple[str, str, Optional[LineFilter]]]:
+        for pattern in self._patterns.get(path.parent, ()):
+            if fnmatch.fnmatch(path.name, pattern[0]):
+                return pattern
+        return None
+
+    def _on_changed(self, path: Path, created: bool = False, moved: bool = False, gone: bool = False):
+        """文件事件（watchdog 线程）：标记文件待读取，同一批内的重复事件合并
+
+        Args:
+            created: 文件新建
+            moved: 其他文件改名为该路径
+            gone: 文件被删除或改名，读完剩余内容后不再跟踪（明确指定的文件保留，等待重新创建）
+        """
         if not self.running:
             return
-            
-        self.queue.put(new_content)
-        self.callback(new_content)
-        
-    def get_new_content(self) -> str:
-        """获取新的内容"""
-        content = []
-        while not self.queue.empty():
-            content.append(self.queue.get_nowait())
-        return ''.join(content)
-        
+        with self._wakeup:
+            tail = self._tails.get(path)
+            if tail is None and (created or moved):
+                pattern = self._match_pattern(path)
+                if pattern is not None and glob.has_magic(pattern[0]):
+                    # 新建的文件从头读取；改名得到的文件已经由旧路径读过，只读取之后新增的内容
+                    _, encoding, line_filter = pattern
+                    tail = self._tails[path] = FileTail(path, encoding, line_filter,
+                                                        from_end=moved, discovered=True)
+            if tail is None:
+                return
+            self.stats['events'] += 1
+            if path in self._dirty:
+                self.stats['merged'] += 1
+            self._dirty[path] = self._dirty.get(path, False) or gone
+            self._wakeup.notify()
+
+    def _reader_loop(self):
+        """读取线程：处理合并后的事件，并按自适应间隔轮询"""
+        interval = self.poll_interval[0]
+        next_poll = time.monotonic() + interval
+        while self.running:
+            with self._wakeup:
+                timeout = next_poll - time.monotonic()
+                if not self._dirty and timeout > 0:
+                    self._wakeup.wait(timeout)
+                pending = bool(self._dirty)
+            if not self.running:
+                break
+            if pending:
+                # 等待延迟预算，期间到达的事件并入这一批
+                if self._stopped.wait(self.latency):
+                    break
+                with self._lock:
+                    dirty, self._dirty = self._dirty, {}
+                for path, gone in dirty.items():
+                    self._read(path, gone)
+            if time.monotonic() >= next_poll:
+                found = self._poll_all()
+                interval = self.poll_interval[0] if found else min(interval * 2, self.poll_interval[1])
+                next_poll = time.monotonic() + interval
+
+    def _read(self, path: Path, gone: bool = False) -> int:
+        """读取一个文件的新增内容，返回读取的字节数"""
+        with self._lock:
+            tail = self._tails.get(path)
+        if tail is None:
+            return 0
+        before = tail.reader.bytes_read
+        try:
+            tail.poll(self._on_file_update)
+        except Exception as e:
+            self._report_error(f"读取文件更新时出错 {path.name}: {e}")
+        read = tail.reader.bytes_read - before
+        with self._lock:
+            self.stats['reads'] += 1
+            self.stats['bytes'] += read
+            removed = gone and tail.discovered and self._tails.get(path) is tail
+            if removed:
+                del self._tails[path]
+        if removed:
+            tail.flush(self._on_file_update)
+            tail.close()
+        return read
+
+    def _poll_all(self) -> bool:
+        """轮询所有文件，读取有新内容的文件，返回是否发现了新内容"""
+        if not self.use_events:
+            self._discover()
+        with self._lock:
+            self.stats['polls'] += 1
+            tails = list(self._tails.values())
+        found = False
+        for tail in tails:
+            if not self.running:
+                break
+            if tail.reader.has_more and self._read(tail.path):
+                found = True
+        if found:
+            with self._lock:
+                # 启用事件时，轮询读到内容说明有事件丢失或尚未送达
+                self.stats['missed'] += 1
+        return found
+
+    def _discover(self):
+        """只轮询时没有新建和删除文件的事件，扫描目录找出新出现的通配符匹配文件（从头读取）
+        和已经消失的文件"""
+        with self._lock:
+            directories = [d for d, patterns in self._patterns.items()
+                           if any(glob.has_magic(name) for name, _, _ in patterns)]
+        for directory in directories:
+            try:
+                entries = [_normalize(entry.path) for entry in os.scandir(directory) if entry.is_file()]
+            except OSError:
+                continue
+            with self._lock:
+                for path in entries:
+                    if path not in self._tails:
+                        pattern = self._match_pattern(path)
+                        if pattern is not None and glob.has_magic(pattern[0]):
+                            _, encoding, line_filter = pattern
+                            self._tails[path] = FileTail(path, encoding, line_filter,
+                                                         from_end=False, discovered=True)
+                existing = set(entries)
+                removed = [path for path, tail in self._tails.items()
+                           if tail.discovered and path.parent == directory and path not in existing]
+            # 已被删除或改名的文件读完剩余内容后不再跟踪
+            for path in removed:
+                self._read(path, gone=True)
+
+    def _reset_stats(self):
+        self.stats = {
+            'events': 0,  # 收到的文件事件数
+            'merged': 0,  # 被合并到已有待读取标记的事件数
+            'reads': 0,  # 读取文件的次数
+            'bytes': 0,  # 读取的字节数
+            'lines': 0,  # 输出的行数（过滤后）
+            'polls': 0,  # 轮询的轮数
+            'missed': 0,  # 轮询发现新内容的次数
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """返回计数的副本，另含当前跟踪的文件数；使用队列时另含丢弃的行数、当前和最大积压的行数"""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self.stats)
+            stats['files'] = len(self._tails)
+        if self.callback is None:
+            stats['dropped'] = self.queue.dropped
+            stats['queued'] = len(self.queue)
+            stats['peak'] = self.queue.peak
+        return stats
+
+    def _on_file_update(self, path: Path, lines: List[str]):
+        """把一个文件新增的行放入输出流（读取线程）"""
+        if not self.running:
+            return
+        with self._lock:
+            self.stats['lines'] += len(lines)
+
+        if self.callback is not None:
+            self.callback(path, lines)
+            return
+        # 队列已满时按策略等待或丢弃，停止监控时队列关闭，等待随之结束
+        step = self.queue.capacity
+        for start in range(0, len(lines), step):
+            if not self.queue.put((path, lines[start:start + step])) and not self.running:
+                break
+
+    def _report_error(self, message: str):
+        if self.on_error is not None:
+            self.on_error(message)
+        else:
+            logger.error(message)
+
+    def get_updates(self) -> List[Update]:
+        """取出队列中已有的全部内容（不等待），同一文件相邻的批次合并为一项"""
+        updates: List[Update] = []
+        for path, lines in self.queue.get_all():
+            if updates and updates[-1][0] == path:
+                updates[-1][1].extend(lines)
+            else:
+                updates.append((path, lines))
+        return updates
+
     @property
     def is_monitoring(self) -> bool:
         """是否正在监控"""
-        return self.running and self.current_file is not None and self.observer is not None
\ No newline at end of file
+        return self.running and self._thread is not None
@@ -1,12 +1,70 @@
+import os
+import re
+import time
+import itertools
+import threading
 from pathlib import Path
-from typing import List, Tuple, Optional
+from array import array
+from typing import Any, BinaryIO, Dict, Generator, Iterable, List, Tuple, Optional
+from .compression import compressed_position
 from .file_handler import FileHandler
+from .filter_cache import DEFAULT_CACHE_SIZE, FilterCache, FilterResult, cache_key
+from .matcher import BytesLineFilter, FieldStripper, KeywordMatcher, LineFilter, create_matcher, is_ascii_compatible
+from .output_sink import OutputSink, open_sink
+from .preview_source import FilteredSource
+from .progress import ProgressInfo
 
 class LogProcessor:
-    def __init__(self, app_instance=None):
+    # 超过该大小的文件在非预览模式下切分到多个进程并行过滤
+    PARALLEL_FILE_SIZE = 256 * 1024 * 1024  # 256MB
+    # 预览扫描的数据块大小，块越小第一批结果出现得越快
+    PREVIEW_BLOCK_SIZE = 256 * 1024  # 256KB
+    # 预览结果的攒批间隔（秒），第一批结果不等待
+    PREVIEW_BATCH_INTERVAL = 0.05
+    # 增量过滤的基础结果最多占文件行数的比例，超过时直接全量扫描
+    NARROW_MAX_FRACTION = 0.125
+
+    def __init__(self, app_instance=None, cache_size: int = DEFAULT_CACHE_SIZE):
         self.app = app_instance
+        self.filter_cache = FilterCache(cache_size)
         self.processing_stats = {"total": 0, "matched": 0}
         self.file_handler = FileHandler()
+        # 最近一次的 (条件, 实例)，整体替换，多个线程同时读写时条件和实例不会错配
+        self._matcher: Optional[Tuple[Tuple, KeywordMatcher]] = None
+        self._line_filter: Optional[Tuple[Tuple, LineFilter]] = None
+
+    def get_matcher(self, keywords: str, ignore_case: bool, query_mode: bool = False) -> KeywordMatcher:
+        """获取关键字匹配器（查询模式下为 QueryMatcher），条件不变时复用同一个实例
+
+        Raises:
+            QueryError: 查询语法错误
+        """
+        key = (keywords, bool(ignore_case), bool(query_mode))
+        cached = self._matcher
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        matcher = create_matcher(keywords, ignore_case, query_mode)
+        self._matcher = (key, matcher)
+        return matcher
+
+    def get_line_filter(self,
+                        keywords: str,
+                        ignore_case: bool,
+                        filter_fields: str = "",
+                        enable_field_filter: bool = False,
+                        query_mode: bool = False) -> LineFilter:
+        """获取编译好的单行过滤器，条件不变时复用同一个实例"""
+        fields = filter_fields if enable_field_filter else ""
+        key = (keywords, bool(ignore_case), fields, bool(query_mode))
+        cached = self._line_filter
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        line_filter = LineFilter(
+            self.get_matcher(keywords, ignore_case, query_mode),
+            FieldStripper(fields, ignore_case)
+        )
+        self._line_filter = (key, line_filter)
+        return line_filter
 
     def filter_log(self, 
                   input_path: Path, 
@@ -17,8 +75,11 @@ class LogProcessor:
                   write_enc: str = None,
                   filter_fields: str = "",
                   enable_field_filter: bool = False,
-                  preview_mode: bool = False) -> Tuple[int, int]:
-        """处理单个日志文件"""
+                  query_mode: bool = False) -> Tuple[int, int]:
+        """处理单个日志文件
+
+        query_mode 为真时 keywords 按查询语言解析（见 query 模块），否则按 | 分隔的关键字匹配。
+        """
         try:
             if not input_path.exists():
                 if self.app:
@@ -31,72 +92,71 @@ class LogProcessor:
                 if self.app:
                     self.app.log_info(f"📝 检测到文件编码: {read_enc}")
 
-            # 如果是预览模式，使用相同的编码
-            if preview_mode:
-                write_enc = read_enc
-            elif not write_enc:
+            if not write_enc:
                 write_enc = read_enc
 
             if output_path:
                 output_path.parent.mkdir(parents=True, exist_ok=True)
 
-            # 分割关键字和过滤字段
-            keyword_list = [k.strip() for k in keywords.split('|') if k.strip()]
-            fields_to_filter = [field.strip() for field in filter_fields.split('|') if field.strip()]
+            # 编译关键字匹配器和字段处理器
+            process_line = self.get_line_filter(keywords, ignore_case, filter_fields, enable_field_filter, query_mode)
+            # 关键字、字段和编码都与 ASCII 兼容时走字节快速路径，不匹配的行不解码
+            bytes_filter = BytesLineFilter.create(process_line, read_enc, write_enc)
 
-            def process_line(line: str) -> Optional[str]:
-                """处理单行文本"""
-                hay = line.lower() if ignore_case else line
-                if any(k.lower() in hay if ignore_case else k in hay for k in keyword_list):
-                    # 处理\n字符进行转义换行
-                    processed_line = line.replace('\\n', '\n')
-                    
-                    if enable_field_filter and fields_to_filter:
-                        for field in fields_to_filter:
-                            field_pattern = field.lower() if ignore_case else field
-                            hay = processed_line.lower() if ignore_case else processed_line
-                            if field_pattern in hay:
-                                start_idx = hay.find(field_pattern)
-                                if start_idx >= 0:
-                                    end_idx = start_idx + len(field)
-                                    while end_idx < len(processed_line) and processed_line[end_idx] in ' :|\t':
-                                        end_idx += 1
-                                    processed_line = processed_line[:start_idx] + processed_line[end_idx:]
-                    return processed_line
-                return None
-
-            # 检查是否是大文件
+            # 检查是否是大文件，压缩文件只能顺序解压，不使用内存映射和分片并行
             is_large = FileHandler.is_large_file(input_path)
+            compressed = FileHandler.is_compressed(input_path)
             if is_large and self.app:
                 size, unit = FileHandler.get_file_size_info(input_path)
                 self.app.log_info(f"📦 处理大文件: {size:.2f} {unit}")
 
             # 处理进度回调
-            def on_progress(current: int, total: int):
+            def on_progress(info: ProgressInfo):
                 if self.app:
-                    percent = (current / total) * 100 if total > 0 else 0
-                    self.app.update_progress(f"处理进度: {current}/{total} 行 ({percent:.1f}%)")
-
-            # 处理文件
-            if preview_mode and self.app:
-                content = []
-                count_in = count_out = 0
-                for chunk in FileHandler.read_in_chunks(input_path, read_enc):
-                    for line in chunk.splitlines():
-                        count_in += 1
-                        result = process_line(line)
-                        if result is not None:
-                            content.append(result)
-                            count_out += 1
-                
-                preview_content = '\n'.join(content)
-                self.app.update_preview_content(preview_content)
-                if keyword_list:  # 只有在有关键字的情况下才进行高亮
-                    self.app._highlight_keywords(keyword_list, ignore_case)
-                
-                # 更新统计信息
-                self.app._update_system_info(f"预览统计:\n读取: {count_in} 行\n匹配: {count_out} 行")
-                return (count_in, count_out)
+                    self.app.update_progress(info.format())
+
+            # 处理文件（预览由界面通过 iter_preview 增量显示，不经过这里）
+            if (not compressed and input_path.stat().st_size > self.PARALLEL_FILE_SIZE
+                    and self._can_parallelize(read_enc)):
+                # 超大文件切分到进程池并行过滤
+                def on_shard_done(done: int, total: int, info: ProgressInfo):
+                    if self.app:
+                        self.app.update_progress(f"分片 {done}/{total} | {info.format()}")
+
+                from .parallel_filter import filter_file_parallel
+                return filter_file_parallel(
+                    input_path,
+                    output_path,
+                    {
+                        'keywords': keywords,
+                        'ignore_case': ignore_case,
+                        'filter_fields': filter_fields,
+                        'enable_field_filter': enable_field_filter,
+                        'read_enc': read_enc,
+                        'write_enc': write_enc,
+                        'query_mode': query_mode
+                    },
+                    callback=on_shard_done
+                )
+            elif bytes_filter is not None and is_large and not compressed:
+                # 大文件使用内存映射扫描
+                return FileHandler.process_large_file_mmap(
+                    input_path,
+                    output_path,
+                    bytes_filter.matcher,
+                    bytes_filter.process_matched,
+                    write_encoding=write_enc,
+                    callback=on_progress
+                )
+            elif bytes_filter is not None:
+                # 字节快速路径
+                return FileHandler.process_large_file_bytes(
+                    input_path,
+                    output_path,
+                    bytes_filter.filter_block,
+                    write_encoding=write_enc,
+                    callback=on_progress if is_large else None
+                )
             else:
                 # 正常处理模式
                 return FileHandler.process_large_file(
@@ -104,6 +164,7 @@ class LogProcessor:
                     output_path,
                     process_line,
                     encoding=read_enc,
+                    write_encoding=write_enc,
                     callback=on_progress if is_large else None
                 )
 
@@ -115,6 +176,391 @@ class LogProcessor:
                 self.app.log_error(f"❌ 处理出错 {input_path.name}: {e}")
         return (0, 0)
 
+    @staticmethod
+    def _can_parallelize(read_enc: str) -> bool:
+        """是否可以切分到进程池并行过滤（进程池相关模块导入较慢，只在需要时加载）"""
+        from .parallel_filter import can_shard
+        return (os.cpu_count() or 1) > 1 and can_shard(read_enc)
+
+    @staticmethod
+    def iter_search(input_path: Path,
+                    text: str,
+                    use_regex: bool = False,
+                    case_sensitive: bool = False,
+                    encoding: str = 'utf-8',
+                    use_query: bool = False) -> Generator[Tuple[int, str], None, None]:
+        """在文件中搜索文本、正则表达式或查询
+
+        普通 ASCII 文本（或预筛选子串为 ASCII 的查询）搜索大文件时直接在内存映射上定位候选行，
+        只对候选行做完整确认。
+
+        Args:
+            use_query: 为真时 text 按查询语言解析（见 query 模块），忽略 use_regex
+
+        Raises:
+            re.error: 正则表达式无效
+            QueryError: 查询语法错误
+
+        Yields:
+            (行号, 行内容)，行号从 1 开始，行内容不含换行符
+        """
+        if use_query:
+            matcher = create_matcher(text, not case_sensitive, query_mode=True)
+            if not matcher:
+                return
+            test = matcher.matches
+            scan = matcher.is_ascii
+        else:
+            pattern = text if use_regex else re.escape(text)
+            test = re.compile(pattern, 0 if case_sensitive else re.IGNORECASE).search
+            scan = not use_regex and text.strip() and text.isascii()
+            if scan:
+                matcher = KeywordMatcher([text], not case_sensitive)
+
+        if (scan and is_ascii_compatible(encoding) and FileHandler.is_large_file(input_path)
+                and not FileHandler.is_compressed(input_path)):
+            for line_no, _, raw in FileHandler.scan_mmap(input_path, matcher.encode()):
+                line = raw.decode(encoding, errors='ignore')
+                if test(line):
+                    yield line_no, line
+            return
+
+        with FileHandler.open_input(input_path) as f:
+            line_no = 0
+            for _, lines in FileHandler.read_text_blocks(f, encoding):
+                for line in lines:
+                    line_no += 1
+                    if test(line):
+                        yield line_no, line
+
+    def filter_stream(self,
+                      fin: BinaryIO,
+                      fout: Optional[BinaryIO],
+                      keywords: str,
+                      ignore_case: bool,
+                      read_enc: str = None,
+                      write_enc: str = None,
+                      filter_fields: str = "",
+                      enable_field_filter: bool = False,
+                      query_mode: bool = False) -> Tuple[int, int]:
+        """过滤二进制数据流（如标准输入到标准输出）
+
+        数据到达后立即按块处理并刷新输出，适合接在管道中使用。
+        read_enc 为 'auto' 或空值时根据数据流开头的内容检测编码（需要 fin 支持 peek）。
+        fout 为 None 时写入标准输出（StdoutSink）。
+
+        Returns:
+            处理的总行数和匹配的行数
+        """
+        if read_enc == 'auto' or not read_enc:
+            head = fin.peek(4096) if hasattr(fin, 'peek') else b''
+            read_enc = FileHandler.detect_encoding_bytes(head) if head else 'utf-8'
+        write_enc = write_enc or read_enc
+
+        process_line = self.get_line_filter(keywords, ignore_case, filter_fields, enable_field_filter, query_mode)
+        bytes_filter = BytesLineFilter.create(process_line, read_enc, write_enc)
+        count_in = 0
+        # 每批结果立即刷新，管道下游不必等待缓冲区写满
+        if fout is None:
+            sink = open_sink(None, write_enc)
+        else:
+            sink = OutputSink(fout, write_enc, flush_batches=True, owns_stream=False)
+
+        if bytes_filter is not None:
+            for block, lines in FileHandler.read_blocks(fin, partial=True):
+                count_in += lines
+                sink.write_encoded(bytes_filter.filter_block(block))
+        else:
+            for _, lines in FileHandler.read_text_blocks(fin, read_enc, partial=True):
+                count_in += len(lines)
+                sink.write_lines([r for r in map(process_line, lines) if r is not None])
+        sink.close()
+        return count_in, sink.count
+
+    def iter_preview(self,
+                     input_path: Path,
+                     keywords: str,
+                     ignore_case: bool,
+                     read_enc: str = None,
+                     write_enc: str = None,
+                     filter_fields: str = "",
+                     enable_field_filter: bool = False,
+                     query_mode: bool = False,
+                     limit: Optional[int] = None,
+                     cancel_event: Optional[threading.Event] = None,
+                     stats: Optional[Dict[str, Any]] = None,
+                     with_offsets: bool = False) -> Generator[List[str], None, None]:
+        """流式生成预览结果，可在后台线程中调用
+
+        文件按小块扫描，第一批结果立即返回，之后每隔 PREVIEW_BATCH_INTERVAL 秒
+        返回一批，调用方无需等待整个文件处理完即可开始显示。
+        完整扫描的结果以匹配行偏移的形式存入 filter_cache，文件和配置都未变化时
+        只按偏移读取匹配行，不再扫描整个文件；新的关键字收窄了已缓存的查询时
+        （如在关键字后继续输入，或在查询后追加 AND 条件），只重新检查之前匹配的行。
+
+        Args:
+            input_path: 输入文件路径
+            keywords: 关键字
+            ignore_case: 是否忽略大小写
+            read_enc: 输入编码，'auto' 或空值时自动检测
+            write_enc: 预览模式下忽略，保留该参数以便直接传入 get_config() 的结果
+            filter_fields: 要删除的字段
+            enable_field_filter: 是否启用字段删除
+            query_mode: 是否按查询语言解析 keywords
+            limit: 最多返回的匹配行数，达到后提前停止扫描
+            cancel_event: 置位后在下一个数据块处停止
+            stats: 可选的统计字典，更新 'lines'（已读取行数）、'matched'（已发现的匹配行数，
+                   可能大于返回的行数）、'shown'（已返回行数）、'bytes'（已读取字节数）
+                   、'truncated'（是否因 limit 提前停止）和 'cached'（结果是否来自缓存）
+            with_offsets: 为真时每批同时给出各行的起始字节偏移（见 Yields）
+
+        Yields:
+            一批过滤后的行（不含换行符）；with_offsets 为真时为 (行列表, 偏移列表)，
+            无法按字节定位时（UTF-16、压缩文件）偏移列表为 None
+        """
+        if stats is None:
+            stats = {}
+        stats.update(lines=0, matched=0, shown=0, bytes=0, truncated=False, cached=False)
+
+        key = cache_key(input_path, keywords, ignore_case, read_enc, filter_fields, enable_field_filter, query_mode)
+        cached = self.filter_cache.get(key, limit)
+        base = self.filter_cache.find_base(key) if cached is None else None
+        if base is not None and len(base.offsets) > base.lines * self.NARROW_MAX_FRACTION:
+            # 之前的结果过于密集时，逐行按偏移读取反而比整块扫描慢
+            base = None
+
+        if read_enc == 'auto' or not read_enc:
+            read_enc = FileHandler.detect_encoding(input_path)
+        process_line = self.get_line_filter(keywords, ignore_case, filter_fields, enable_field_filter, query_mode)
+        bytes_filter = BytesLineFilter.create(process_line, read_enc, read_enc)
+        total_size = input_path.stat().st_size
+
+        if cached is not None:
+            # 命中缓存：只按偏移读取匹配行
+            stats.update(lines=cached.lines, bytes=cached.scanned)
+            offsets = cached.offsets[:limit] if limit else cached.offsets
+            source = self._offset_blocks(input_path, offsets, cached.scanned, read_enc, process_line, bytes_filter)
+        elif base is not None:
+            # 查询收窄了之前的结果：只重新检查之前匹配的行，之前未扫描到的部分继续扫描
+            stats.update(lines=base.lines, bytes=base.scanned)
+            source = self._offset_blocks(input_path, base.offsets, base.scanned, read_enc, process_line, bytes_filter)
+            if base.scanned < total_size:
+                source = itertools.chain(
+                    source, self._preview_blocks(input_path, read_enc, process_line, bytes_filter, base.scanned))
+        else:
+            source = self._preview_blocks(input_path, read_enc, process_line, bytes_filter)
+
+        pending: List[str] = []
+        pending_offsets: Optional[List[int]] = []
+        shown_offsets: Optional[array] = array('Q')  # 文本路径无法定位偏移时为 None
+        storable = True
+        resume = resume_lines = None  # 截断时结果覆盖到的字节位置及其之前的行数
+        last_flush = None  # 尚未返回过结果
+        for results, offsets, lines, bytes_done in source:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            scanned_before, lines_before = stats['bytes'], stats['lines']
+            stats['lines'] += lines or 0
+            stats['bytes'] = bytes_done
+            stats['matched'] += len(results)
+            if limit and stats['shown'] + len(results) >= limit:
+                keep = limit - stats['shown']
+                stats['truncated'] = stats['matched'] > limit or bytes_done < total_size
+                if stats['truncated'] and offsets is not None:
+                    if lines is None:
+                        # 按偏移重新检查时被截断，无法确定结果覆盖的范围
+                        storable = False
+                    elif keep < len(offsets):
+                        resume = offsets[keep]
+                        resume_lines = lines_before + FileHandler.count_lines(input_path, scanned_before, resume)
+                    else:
+                        resume, resume_lines = bytes_done, stats['lines']
+                results = results[:keep]
+            pending.extend(results)
+            stats['shown'] += len(results)
+            if offsets is None:
+                shown_offsets = pending_offsets = None
+            else:
+                if shown_offsets is not None:
+                    shown_offsets.extend(offsets[:len(results)])
+                if pending_offsets is not None:
+                    pending_offsets.extend(offsets[:len(results)])
+
+            now = time.perf_counter()
+            if pending and (last_flush is None or now - last_flush >= self.PREVIEW_BATCH_INTERVAL):
+                yield (pending, pending_offsets) if with_offsets else pending
+                pending = []
+                if pending_offsets is not None:
+                    pending_offsets = []
+                last_flush = now
+            if limit and stats['shown'] >= limit:
+                break
+
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        if cached is not None:
+            stats.update(matched=cached.matched, cached=True,
+                         truncated=cached.truncated or stats['shown'] < cached.matched)
+        elif shown_offsets is not None and storable:
+            if stats['truncated']:
+                result = FilterResult(shown_offsets, resume_lines, stats['matched'], True, resume)
+            else:
+                result = FilterResult(shown_offsets, stats['lines'], stats['matched'], False, total_size)
+            self.filter_cache.put(key, result)
+        if pending:
+            yield (pending, pending_offsets) if with_offsets else pending
+
+    def preview_source(self,
+                       input_path: Path,
+                       keywords: str,
+                       ignore_case: bool,
+                       read_enc: str = None,
+                       write_enc: str = None,
+                       filter_fields: str = "",
+                       enable_field_filter: bool = False,
+                       query_mode: bool = False) -> FilteredSource:
+        """创建预览区的数据源，参数与 iter_preview 相同
+
+        数据源保存 iter_preview(with_offsets=True) 给出的偏移，显示时按偏移读取匹配行。
+        read_enc 为 'auto' 时在这里检测，调用方应把 source.read_enc 传给 iter_preview，避免重复检测。
+        """
+        if read_enc == 'auto' or not read_enc:
+            read_enc = FileHandler.detect_encoding(input_path)
+        process_line = self.get_line_filter(keywords, ignore_case, filter_fields, enable_field_filter, query_mode)
+        bytes_filter = BytesLineFilter.create(process_line, read_enc, read_enc)
+        return FilteredSource(input_path, read_enc, process_line, bytes_filter)
+
+    def _preview_blocks(self,
+                        input_path: Path,
+                        read_enc: str,
+                        process_line: LineFilter,
+                        bytes_filter: Optional[BytesLineFilter],
+                        start: int = 0
+                        ) -> Generator[Tuple[List[str], Optional[List[int]], int, int], None, None]:
+        """按数据块过滤预览内容
+
+        Args:
+            start: 开始扫描的字节偏移，必须位于行首
+
+        Yields:
+            (本块的过滤结果, 结果所在行的起始字节偏移, 本块行数, 已扫描到的字节位置)，
+            编码与 ASCII 不兼容（如 UTF-16）时无法按字节定位，偏移为 None；
+            压缩文件的偏移同样为 None，已扫描到的位置是压缩数据中的位置
+        """
+        block_size = self.PREVIEW_BLOCK_SIZE
+        if FileHandler.is_compressed(input_path):
+            yield from self._compressed_preview_blocks(input_path, read_enc, process_line, bytes_filter)
+            return
+        if bytes_filter is not None and FileHandler.is_large_file(input_path):
+            # 大文件直接在内存映射上扫描，只复制命中的行
+            scratch = bytearray(block_size)
+            for mm, pos, end in FileHandler.iter_mmap_windows(input_path, block_size, start):
+                results = []
+                offsets = []
+                for line_start, result in bytes_filter.iter_matches(mm, pos, end):
+                    results.append(bytes_filter.decode(result))
+                    offsets.append(line_start)
+                # 超长行被切分时只在文件末尾把没有换行符的最后一段计为一行
+                lines = FileHandler.count_mapped_lines(mm, pos, end, scratch)
+                if end == len(mm) and mm[end - 1] != ord('\n'):
+                    lines += 1
+                yield results, offsets, lines, end
+            return
+        if is_ascii_compatible(read_enc):
+            blocks = self._iter_positioned_blocks(input_path, block_size, start)
+        else:
+            with open(input_path, 'rb') as f:
+                f.seek(start)
+                for bytes_read, lines in FileHandler.read_text_blocks(f, read_enc, block_size):
+                    results = [r for r in map(process_line, lines) if r is not None]
+                    yield results, None, len(lines), start + bytes_read
+            return
+
+        for pos, block, lines in blocks:
+            results = []
+            offsets = []
+            if bytes_filter is not None:
+                for line_start, result in bytes_filter.iter_matches(block):
+                    results.append(bytes_filter.decode(result))
+                    offsets.append(pos + line_start)
+            else:
+                # 以换行符对齐的块可以整体解码，匹配行的偏移按换行符逐个推算
+                text = block.decode(read_enc, 'ignore')
+                if text.endswith('\n'):
+                    text = text[:-1]
+                line_start = index = 0
+                for i, line in enumerate(text.split('\n')):
+                    result = process_line(line[:-1] if line.endswith('\r') else line)
+                    if result is not None:
+                        while index < i:
+                            line_start = block.index(b'\n', line_start) + 1
+                            index += 1
+                        results.append(result)
+                        offsets.append(pos + line_start)
+            yield results, offsets, lines, pos + len(block)
+
+    def _compressed_preview_blocks(self,
+                                   input_path: Path,
+                                   read_enc: str,
+                                   process_line: LineFilter,
+                                   bytes_filter: Optional[BytesLineFilter]
+                                   ) -> Generator[Tuple[List[str], None, int, int], None, None]:
+        """边解压边过滤压缩文件，结果不能按偏移重新读取，因此不进入 filter_cache"""
+        block_size = self.PREVIEW_BLOCK_SIZE
+        with FileHandler.open_input(input_path) as f:
+            if bytes_filter is not None:
+                for block, lines in FileHandler.read_blocks(f, block_size):
+                    results = [bytes_filter.decode(result) for _, result in bytes_filter.iter_matches(block)]
+                    yield results, None, lines, compressed_position(f, 0)
+            else:
+                for _, lines in FileHandler.read_text_blocks(f, read_enc, block_size):
+                    results = [r for r in map(process_line, lines) if r is not None]
+                    yield results, None, len(lines), compressed_position(f, 0)
+
+    @staticmethod
+    def _iter_positioned_blocks(input_path: Path,
+                                block_size: int,
+                                start: int = 0) -> Generator[Tuple[int, bytes, int], None, None]:
+        """从 start 开始按块读取文件，同时给出每块的起始字节偏移和行数"""
+        with open(input_path, 'rb') as f:
+            f.seek(start)
+            pos = start
+            for block, lines in FileHandler.read_blocks(f, block_size):
+                yield pos, block, lines
+                pos += len(block)
+
+    def _offset_blocks(self,
+                       input_path: Path,
+                       offsets: Iterable[int],
+                       scanned: int,
+                       read_enc: str,
+                       process_line: LineFilter,
+                       bytes_filter: Optional[BytesLineFilter],
+                       batch_size: int = 4096
+                       ) -> Generator[Tuple[List[str], List[int], None, int], None, None]:
+        """只对给定偏移处的行重新过滤
+
+        产出格式与 _preview_blocks 相同，但行数为 None（没有按顺序扫描），
+        已扫描位置固定为 scanned（offsets 覆盖的字节范围）。
+        """
+        results: List[str] = []
+        kept: List[int] = []
+        for offset, line in FileHandler.iter_lines_at(input_path, offsets):
+            if bytes_filter is not None:
+                result = bytes_filter.process_matched(line) if bytes_filter.matcher.matches(line) else None
+                if result is not None:
+                    result = bytes_filter.decode(result)
+            else:
+                result = process_line(line.decode(read_enc, 'ignore'))
+            if result is not None:
+                results.append(result)
+                kept.append(offset)
+            if len(results) >= batch_size:
+                yield results, kept, None, scanned
+                results, kept = [], []
+        if results:
+            yield results, kept, None, scanned
+
     def batch_process(self, files: List[Path], output_dir: Path, **kwargs) -> None:
         """批量处理多个文件"""
         try:
@@ -125,7 +571,7 @@ class LogProcessor:
                 if self.app:
                     self.app.log_info(f"📄 处理文件 ({i}/{total_files}): {input_path.name}")
                 
-                output_path = output_dir / f"{input_path.stem}_filtered{input_path.suffix}"
+                output_path = output_dir / FileHandler.filtered_name(input_path)
                 count_in, count_out = self.filter_log(input_path, output_path, **kwargs)
                 
                 # 更新统计信息
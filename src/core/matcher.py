@@ -0,0 +1,423 @@
+import codecs
+import copy
+import re
+from typing import AnyStr, Iterable, Iterator, List, Optional, Tuple, Union
+
+# 字段后面需要一并删除的分隔字符
+_TRAILING_SEPARATORS = re.compile(r'[ :|\t]*')
+_TRAILING_SEPARATORS_BYTES = re.compile(rb'[ :|\t]*')
+
+# 0-127 全部字节，用于判断编码与 ASCII 的兼容性
+_ASCII_BYTES = bytes(range(128))
+_ALL_BYTES = bytes(range(256))
+
+
+def _fold(line: AnyStr) -> AnyStr:
+    """折叠大小写并保证结果与原文逐字符对齐"""
+    hay = line.lower()
+    if len(hay) != len(line):
+        # 极少数字符 lower() 后长度会变化，此时位置无法对应，只折叠单字符映射
+        hay = ''.join(c.lower() if len(c.lower()) == 1 else c for c in line)
+    return hay
+
+
+def is_ascii_compatible(encoding: str) -> bool:
+    """判断编码是否与 ASCII 兼容（ASCII 字符编码后字节不变）"""
+    try:
+        return _ASCII_BYTES.decode('ascii').encode(encoding) == _ASCII_BYTES
+    except (LookupError, UnicodeError):
+        return False
+
+
+def is_self_synchronizing(encoding: str) -> bool:
+    """判断编码中 ASCII 字节是否只会表示 ASCII 字符
+
+    UTF-8 和所有单字节编码满足该条件；GBK 等双字节编码的第二个字节
+    可能落在 ASCII 范围内，按字节匹配只能作为预筛选。
+    """
+    try:
+        if codecs.lookup(encoding).name == 'utf-8':
+            return True
+        return len(_ALL_BYTES.decode(encoding, 'replace')) == len(_ALL_BYTES)
+    except (LookupError, UnicodeError):
+        return False
+
+
+class KeywordMatcher:
+    """多关键字匹配器
+
+    关键字在构造时统一折叠大小写，每行只做一次 lower()，
+    之后对每个关键字执行 C 层的子串查找。CPython 的 re 多分支交替会在每个位置
+    逐个尝试分支，实测在几十个关键字时反而比逐个 find 更慢，因此这里不使用正则。
+    同一个实例可以在过滤、实时监控和高亮之间共享。
+    """
+
+    # 在内存映射上忽略大小写查找时，每次复制并折叠的最大字节数
+    FOLD_CHUNK = 1024 * 1024
+
+    def __init__(self, keywords: Union[str, Iterable[str]], ignore_case: bool = True):
+        """初始化匹配器
+
+        Args:
+            keywords: 关键字列表，或用 | 分隔的关键字字符串
+            ignore_case: 是否忽略大小写
+        """
+        if isinstance(keywords, str):
+            keywords = keywords.split('|')
+        self.keywords: List[str] = [k.strip() for k in keywords if k and k.strip()]
+        self.ignore_case = ignore_case
+        # 预先折叠大小写后的关键字，与 self.keywords 一一对应
+        self._needles: List[AnyStr] = [k.lower() for k in self.keywords] if ignore_case else list(self.keywords)
+
+    def __bool__(self) -> bool:
+        return bool(self.keywords)
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    @property
+    def is_ascii(self) -> bool:
+        """关键字是否全部为 ASCII"""
+        return all(k.isascii() for k in self.keywords)
+
+    @property
+    def is_exact(self) -> bool:
+        """字节匹配的结果是否就是最终结果（查询匹配器只把字节匹配作为预筛选）"""
+        return True
+
+    def encode(self, encoding: str = 'ascii') -> 'KeywordMatcher':
+        """返回按字节匹配的副本
+
+        字节模式下忽略大小写只折叠 ASCII 字母，适用于全部为 ASCII 的关键字。
+        """
+        clone = copy.copy(self)
+        clone._needles = [k.encode(encoding) for k in self._needles]
+        return clone
+
+    def _haystack(self, line: AnyStr) -> AnyStr:
+        return line.lower() if self.ignore_case else line
+
+    def search(self, line: AnyStr) -> Optional[str]:
+        """返回行中命中的第一个关键字，未命中返回 None"""
+        hay = self._haystack(line)
+        for index, needle in enumerate(self._needles):
+            if needle in hay:
+                return self.keywords[index]
+        return None
+
+    def matches(self, line: AnyStr) -> bool:
+        """判断行中是否包含任一关键字"""
+        hay = self._haystack(line)
+        for needle in self._needles:
+            if needle in hay:
+                return True
+        return False
+
+    def matches_folded(self, hay: AnyStr) -> bool:
+        """同 matches，但 hay 已由调用方按本匹配器的规则折叠过大小写"""
+        for needle in self._needles:
+            if needle in hay:
+                return True
+        return False
+
+    def scan_lines(self, block, start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+        """在由多行组成的数据块中查找包含关键字的行
+
+        对整个块只折叠一次大小写，每个关键字用 C 层 find 跳跃查找，
+        只有命中的行才会在 Python 层产生开销，不匹配的行不会被切分出来。
+        block 也可以是 mmap：只在 [start, end) 范围内直接查找，不复制数据；
+        忽略大小写时需要折叠，见 _scan_buffer。
+
+        Args:
+            block: str、bytes 或 mmap
+            start: 查找范围的起始位置，应位于行首
+            end: 查找范围的结束位置，默认到末尾
+
+        Returns:
+            按位置排序的 (行起始位置, 行结束位置) 列表，位置相对于 block，结束位置不含换行符
+        """
+        if end is None:
+            end = len(block)
+        if not self._needles:
+            return []
+        if self.ignore_case and not isinstance(block, (str, bytes, bytearray)):
+            return self._scan_buffer(block, start, end)
+        hay = _fold(block) if self.ignore_case else block
+        return self._find_lines(hay, start, end)
+
+    def _find_lines(self, hay, start: int, end: int) -> List[Tuple[int, int]]:
+        """在已折叠的 hay 的 [start, end) 范围内查找包含关键字的行"""
+        newline = '\n' if isinstance(hay, str) else b'\n'
+        spans = {}
+        for needle in self._needles:
+            pos = hay.find(needle, start, end)
+            while pos >= 0:
+                line_start = hay.rfind(newline, start, pos) + 1 or start
+                line_end = hay.find(newline, pos, end)
+                if line_end < 0:
+                    line_end = end
+                spans[line_start] = line_end
+                pos = hay.find(needle, line_end, end)
+        return sorted(spans.items())
+
+    def _scan_buffer(self, buffer, start: int, end: int) -> List[Tuple[int, int]]:
+        """同 scan_lines，忽略大小写时在 mmap 等缓冲区上查找
+
+        映射不能原地折叠，这里按行对齐分段（每段至多 FOLD_CHUNK 字节）复制并折叠后查找，
+        临时内存与窗口大小无关。re.IGNORECASE 可以直接在映射上查找，但实测比折叠后 find 慢三倍以上。
+        """
+        spans = []
+        pos = start
+        while pos < end:
+            stop = min(pos + self.FOLD_CHUNK, end)
+            if stop < end:
+                cut = buffer.rfind(b'\n', pos, stop) + 1
+                if cut == 0:
+                    # 超长行，延伸到行尾
+                    cut = buffer.find(b'\n', stop, end) + 1 or end
+                stop = cut
+            hay = buffer[pos:stop].lower()
+            spans.extend((pos + a, pos + b) for a, b in self._find_lines(hay, 0, len(hay)))
+            pos = stop
+        return spans
+
+    def finditer(self, line: AnyStr) -> Iterator[Tuple[int, int, int]]:
+        """按位置顺序返回行内所有命中
+
+        Yields:
+            (起始位置, 结束位置, 关键字序号)
+        """
+        hay = _fold(line) if self.ignore_case else line
+        spans = []
+        for index, needle in enumerate(self._needles):
+            size = len(needle)
+            pos = hay.find(needle)
+            while pos >= 0:
+                spans.append((pos, pos + size, index))
+                pos = hay.find(needle, pos + size)
+        spans.sort()
+        return iter(spans)
+
+
+class FieldStripper:
+    """删除字段处理器
+
+    构造时折叠字段大小写，处理时先在同一份折叠文本上定位所有字段
+    （每个字段只删除第一次出现的位置，连同其后的 ' :|\\t' 分隔符），
+    再把保留的片段一次性拼接，每行最多生成一个新字符串。
+    字面量 "\\n" 在同一次拼接中被还原为换行符。
+    """
+
+    def __init__(self, fields: Union[str, Iterable[str]], ignore_case: bool = True, unescape: bool = True):
+        """初始化字段处理器
+
+        Args:
+            fields: 字段列表，或用 | 分隔的字段字符串
+            ignore_case: 是否忽略大小写
+            unescape: 是否把字面量 "\\n" 还原为换行符
+        """
+        if isinstance(fields, str):
+            fields = fields.split('|')
+        self.fields: List[str] = [f.strip() for f in fields if f and f.strip()]
+        self.ignore_case = ignore_case
+        self.unescape = unescape
+        self._needles: List[AnyStr] = [f.lower() for f in self.fields] if ignore_case else list(self.fields)
+        self._separators = _TRAILING_SEPARATORS
+        self._escape = '\\n'
+        self._newline = '\n'
+        self._empty = ''
+
+    def __bool__(self) -> bool:
+        return bool(self.fields)
+
+    @property
+    def is_ascii(self) -> bool:
+        """字段是否全部为 ASCII"""
+        return all(f.isascii() for f in self.fields)
+
+    def encode(self, encoding: str = 'ascii') -> 'FieldStripper':
+        """返回按字节处理的副本"""
+        clone = copy.copy(self)
+        clone._needles = [f.encode(encoding) for f in self._needles]
+        clone._separators = _TRAILING_SEPARATORS_BYTES
+        clone._escape = b'\\n'
+        clone._newline = b'\n'
+        clone._empty = b''
+        return clone
+
+    def strip(self, line: AnyStr) -> AnyStr:
+        """删除行内所有配置的字段，没有需要修改的内容时原样返回"""
+        edits = []
+        if self._needles:
+            hay = _fold(line) if self.ignore_case else line
+            for needle in self._needles:
+                start = hay.find(needle)
+                if start >= 0:
+                    end = self._separators.match(line, start + len(needle)).end()
+                    edits.append((start, end, self._empty))
+        if self.unescape:
+            escape = self._escape
+            pos = line.find(escape)
+            while pos >= 0:
+                edits.append((pos, pos + 2, self._newline))
+                pos = line.find(escape, pos + 2)
+        if not edits:
+            return line
+
+        edits.sort()
+        pieces = []
+        cursor = 0
+        for start, end, replacement in edits:
+            if end <= cursor:
+                continue
+            if start < cursor:
+                # 与前一个删除区间重叠，只删除剩余部分
+                start = cursor
+            else:
+                pieces.append(line[cursor:start])
+            if replacement:
+                pieces.append(replacement)
+            cursor = end
+        pieces.append(line[cursor:])
+        return self._empty.join(pieces)
+
+
+def create_matcher(keywords: str, ignore_case: bool, query_mode: bool = False) -> KeywordMatcher:
+    """创建匹配器：普通模式按 | 分隔关键字，查询模式编译查询语言（见 query 模块）
+
+    Raises:
+        QueryError: 查询语法错误
+    """
+    if query_mode:
+        from .query import compile_query
+        return compile_query(keywords, ignore_case)
+    return KeywordMatcher(keywords, ignore_case)
+
+
+class LineFilter:
+    """单行过滤流水线：关键字匹配 + 字段删除
+
+    实例不依赖 GUI，可以在线程或子进程中直接调用。
+    """
+
+    def __init__(self, matcher: KeywordMatcher, stripper: Optional[FieldStripper] = None):
+        """初始化过滤器
+
+        Args:
+            matcher: KeywordMatcher，或查询模式下的 QueryMatcher
+            stripper: 字段处理器
+        """
+        self.matcher = matcher
+        self.stripper = stripper
+
+    @classmethod
+    def from_config(cls,
+                    keywords: str,
+                    ignore_case: bool,
+                    filter_fields: str = "",
+                    enable_field_filter: bool = False,
+                    query_mode: bool = False) -> 'LineFilter':
+        """根据过滤配置创建过滤器，参数与 LogProcessor.filter_log 一致"""
+        fields = filter_fields if enable_field_filter else ""
+        return cls(create_matcher(keywords, ignore_case, query_mode), FieldStripper(fields, ignore_case))
+
+    def __call__(self, line: str) -> Optional[str]:
+        """处理单行文本，未匹配返回 None"""
+        if not self.matcher.matches(line):
+            return None
+        if self.stripper is not None:
+            return self.stripper.strip(line)
+        return line
+
+    @property
+    def is_ascii(self) -> bool:
+        """关键字和字段是否全部为 ASCII"""
+        return self.matcher.is_ascii and (self.stripper is None or self.stripper.is_ascii)
+
+
+class BytesLineFilter:
+    """字节级单行过滤器
+
+    直接在未解码的 bytes 上匹配关键字、删除字段，匹配成功的行原样写出；
+    只有需要转码的非 ASCII 行才会解码。对 GBK 这类双字节编码，
+    字节匹配只作为预筛选，命中的行会解码后由文本过滤器复核；查询匹配器同样只用
+    其中的子串做字节预筛选，其余条件在解码后复核。
+    """
+
+    def __init__(self, line_filter: LineFilter, read_enc: str, write_enc: Optional[str] = None):
+        self.line_filter = line_filter
+        self.read_enc = codecs.lookup(read_enc).name
+        self.write_enc = codecs.lookup(write_enc or read_enc).name
+        self.matcher = line_filter.matcher.encode()
+        self.stripper = line_filter.stripper.encode() if line_filter.stripper is not None else None
+        self.verify = not is_self_synchronizing(self.read_enc) or not line_filter.matcher.is_exact
+        self.transcode = self.read_enc != self.write_enc
+
+    @classmethod
+    def create(cls,
+               line_filter: LineFilter,
+               read_enc: str,
+               write_enc: Optional[str] = None) -> Optional['BytesLineFilter']:
+        """条件满足时创建字节过滤器，否则返回 None
+
+        要求关键字（查询模式下为预筛选子串）和字段全部为 ASCII，且读写编码都与 ASCII 兼容。
+        """
+        write_enc = write_enc or read_enc
+        if not line_filter.matcher or not line_filter.is_ascii:
+            return None
+        if not (is_ascii_compatible(read_enc) and is_ascii_compatible(write_enc)):
+            return None
+        return cls(line_filter, read_enc, write_enc)
+
+    def __call__(self, line: bytes) -> Optional[bytes]:
+        """处理单行，未匹配返回 None，结果为不含换行符的输出编码字节
+
+        行尾换行符只在匹配成功后才去掉，不匹配的行不产生任何新对象。
+        """
+        if not self.matcher.matches(line):
+            return None
+        return self.process_matched(line.rstrip(b'\r\n'))
+
+    def filter_block(self, block: bytes) -> List[bytes]:
+        """过滤由完整行组成的数据块
+
+        先在整个块上定位关键字，再只处理命中的行，这是字节路径真正的加速来源：
+        逐行调用 bytes 的 in 运算有额外的缓冲区协议开销，反而比 str 慢。
+
+        Returns:
+            匹配行的处理结果（不含换行符）
+        """
+        results = []
+        for start, end in self.matcher.scan_lines(block):
+            result = self.process_matched(block[start:end].rstrip(b'\r'))
+            if result is not None:
+                results.append(result)
+        return results
+
+    def iter_matches(self, block, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+        """同 filter_block，同时给出每个结果所在行在块内的起始位置
+
+        block 可以是 mmap，此时只在 [start, end) 范围内查找，只复制命中的行。
+
+        Yields:
+            (行起始位置, 处理结果)
+        """
+        for start, end in self.matcher.scan_lines(block, start, end):
+            result = self.process_matched(block[start:end].rstrip(b'\r'))
+            if result is not None:
+                yield start, result
+
+    def process_matched(self, line: bytes) -> Optional[bytes]:
+        """处理已由字节匹配器命中的行（不含换行符）"""
+        if self.verify or (self.transcode and not line.isascii()):
+            result = self.line_filter(line.decode(self.read_enc, 'ignore'))
+            if result is None:
+                return None
+            return result.encode(self.write_enc, 'ignore')
+        if self.stripper is not None:
+            return self.stripper.strip(line)
+        return line
+
+    def decode(self, result: bytes) -> str:
+        """把过滤结果解码为文本"""
+        return result.decode(self.write_enc, 'ignore')
@@ -0,0 +1,217 @@
+"""过滤结果的输出端
+
+所有输出端共用同一套攒批逻辑：结果行先收集到列表中，累计超过 buffer_size 后
+用一次 writelines 写入底层的大缓冲区流，不为每一行单独拼接字符串或调用 write。
+文本结果用增量编码器按 write_enc 编码，UTF-16 等带 BOM 的编码只在开头写一次 BOM。
+"""
+import os
+import sys
+import gzip
+import codecs
+import shutil
+import secrets
+from pathlib import Path
+from typing import BinaryIO, List, Optional
+
+# 累计超过该字节数时写入底层流
+SINK_BUFFER_SIZE = 1024 * 1024  # 1MB
+
+
+class OutputSink:
+    """写入二进制流的输出端，也是其他输出端的基类"""
+
+    def __init__(self,
+                 stream: BinaryIO,
+                 encoding: str = 'utf-8',
+                 newline: str = os.linesep,
+                 buffer_size: int = SINK_BUFFER_SIZE,
+                 bom: bool = True,
+                 flush_batches: bool = False,
+                 owns_stream: bool = True):
+        """初始化输出端
+
+        Args:
+            stream: 二进制输出流
+            encoding: 输出编码
+            newline: 每行之后写出的换行符
+            buffer_size: 攒批的字节数
+            bom: 是否在开头写出编码的 BOM（并行分片中除第一个分片外都不应写）
+            flush_batches: 为真时每批结果都立即刷新到 stream，适合管道输出
+            owns_stream: 关闭输出端时是否同时关闭 stream
+        """
+        self.stream = stream
+        self.encoding = encoding
+        self.buffer_size = buffer_size
+        self.flush_batches = flush_batches
+        self.owns_stream = owns_stream
+        self.count = 0  # 已写出的行数
+        self.closed = False
+        self._encoder = codecs.getincrementalencoder(encoding)('ignore')
+        self._bom = self._encoder.encode('')
+        if not bom:
+            self._bom = b''
+        self._newline_text = newline
+        self.newline = self._encoder.encode(newline)  # 编码后的换行符，不含 BOM
+        self._pending: List[bytes] = []
+        self._pending_size = 0
+
+    def _append(self, data: bytes):
+        if self._bom:
+            self._pending.append(self._bom)
+            self._bom = b''
+        self._pending.append(data)
+        self._pending_size += len(data)
+
+    def write_lines(self, lines: List[str]):
+        """写出一批文本行（不含换行符）"""
+        if not lines:
+            return
+        newline = self._newline_text
+        self._append(self._encoder.encode(newline.join(lines) + newline))
+        self.count += len(lines)
+        self._after_batch()
+
+    def write_encoded(self, lines: List[bytes]):
+        """写出一批已按 encoding 编码的行（不含换行符）"""
+        if not lines:
+            return
+        newline = self.newline
+        self._append(newline.join(lines) + newline)
+        self.count += len(lines)
+        self._after_batch()
+
+    def add(self, line: bytes):
+        """写出一行已编码的内容，适合逐行产生结果的扫描"""
+        if self._bom:
+            self._pending.append(self._bom)
+            self._bom = b''
+        self._pending.append(line)
+        self._pending.append(self.newline)
+        self._pending_size += len(line) + len(self.newline)
+        self.count += 1
+        if self._pending_size >= self.buffer_size:
+            self._write_pending()
+
+    def _after_batch(self):
+        if self.flush_batches:
+            self.flush()
+        elif self._pending_size >= self.buffer_size:
+            self._write_pending()
+
+    def _write_pending(self):
+        if self._pending:
+            self.stream.writelines(self._pending)
+            self._pending = []
+            self._pending_size = 0
+
+    def copy_from(self, file_obj: BinaryIO):
+        """把已编码的原始数据原样写入（如按顺序拼接并行分片的输出）"""
+        self._write_pending()
+        shutil.copyfileobj(file_obj, self.stream, self.buffer_size)
+
+    def flush(self):
+        """把收集到的结果写入底层流并刷新"""
+        self._write_pending()
+        self.stream.flush()
+
+    def close(self):
+        """写出剩余结果并关闭"""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.flush()
+        finally:
+            if self.owns_stream:
+                self.stream.close()
+
+    def abort(self):
+        """出错时放弃尚未写出的结果"""
+        if self.closed:
+            return
+        self.closed = True
+        self._pending = []
+        if self.owns_stream:
+            self.stream.close()
+
+    def __enter__(self) -> 'OutputSink':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class FileSink(OutputSink):
+    """写入文件的输出端
+
+    结果先写入同一目录下的临时文件，关闭时原子地替换目标文件，
+    处理出错或被中断时目标文件保持原样。目标以 .gz 结尾时写出 gzip 压缩数据。
+    """
+
+    def __init__(self,
+                 path: Path,
+                 encoding: str = 'utf-8',
+                 compress: Optional[bool] = None,
+                 buffer_size: int = SINK_BUFFER_SIZE,
+                 **kwargs):
+        """初始化输出端
+
+        Args:
+            path: 目标文件路径
+            encoding: 输出编码
+            compress: 是否写出 gzip 压缩数据，默认按扩展名判断
+            buffer_size: 攒批的字节数，同时作为文件缓冲区大小
+            **kwargs: 传给 OutputSink 的其他参数
+        """
+        self.path = Path(path)
+        if compress is None:
+            compress = self.path.suffix.lower() == '.gz'
+        self.temp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.{secrets.token_hex(4)}.tmp")
+        raw = open(self.temp_path, 'xb', buffering=buffer_size)
+        self._raw = raw
+        # 快速压缩：过滤结果的写出速度不应被压缩拖慢
+        stream = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=1) if compress else raw
+        super().__init__(stream, encoding, buffer_size=buffer_size, **kwargs)
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            super().close()
+            if self._raw is not self.stream:
+                self._raw.close()
+            os.replace(self.temp_path, self.path)
+        except BaseException:
+            self._discard()
+            raise
+
+    def abort(self):
+        super().abort()
+        self._discard()
+
+    def _discard(self):
+        if not self._raw.closed:
+            self._raw.close()
+        try:
+            self.temp_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class StdoutSink(OutputSink):
+    """写入标准输出的输出端，每批结果立即刷新，适合接在管道中使用"""
+
+    def __init__(self, encoding: str = 'utf-8', **kwargs):
+        kwargs.setdefault('flush_batches', True)
+        super().__init__(sys.stdout.buffer, encoding, owns_stream=False, **kwargs)
+
+
+def open_sink(target: Optional[Path], encoding: str = 'utf-8', **kwargs) -> OutputSink:
+    """按输出目标创建输出端：None 或 '-' 为标准输出，其他为文件（.gz 自动压缩）"""
+    if target is None or str(target) == '-':
+        return StdoutSink(encoding, **kwargs)
+    return FileSink(Path(target), encoding, **kwargs)
+
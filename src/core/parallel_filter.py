@@ -0,0 +1,181 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .file_handler import FileHandler
+from .line_index import LineIndex
+from .matcher import BytesLineFilter, LineFilter, is_ascii_compatible
+from .output_sink import SINK_BUFFER_SIZE, FileSink, OutputSink
+from .progress import ProgressInfo, ProgressTracker
+
+# 单个分片的最小字节数，分片过小时进程间调度开销会超过收益
+MIN_SHARD_SIZE = 32 * 1024 * 1024  # 32MB
+
+
+class _RangeReader:
+    """只读取文件中 [start, end) 字节范围的读取器"""
+
+    def __init__(self, file_obj, start: int, end: int):
+        self.file_obj = file_obj
+        self.remaining = end - start
+        file_obj.seek(start)
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file_obj.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        if self.remaining <= 0:
+            return 0
+        view = memoryview(buffer)[:self.remaining]
+        read = self.file_obj.readinto(view)
+        self.remaining -= read
+        return read
+
+
+def can_shard(read_enc: str) -> bool:
+    """按换行符字节切分文件要求编码与 ASCII 兼容（UTF-16 等编码不能按字节对齐）"""
+    return is_ascii_compatible(read_enc)
+
+
+def plan_shards(input_path: Path,
+                shard_count: int,
+                min_shard_size: int = MIN_SHARD_SIZE,
+                index: Optional[LineIndex] = None) -> List[Tuple[int, int]]:
+    """把文件切分为以换行符对齐的字节范围
+
+    Args:
+        input_path: 输入文件路径
+        shard_count: 期望的分片数量
+        min_shard_size: 单个分片的最小字节数
+        index: 文件的行索引，提供时直接取检查点作为分界，不必读取文件
+
+    Returns:
+        按文件顺序排列的 (起始偏移, 结束偏移) 列表
+    """
+    size = input_path.stat().st_size
+    shard_count = max(1, min(shard_count, size // max(min_shard_size, 1)))
+    if index is not None:
+        bounds = index.shard_bounds(shard_count)
+        return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+    step = size // shard_count
+    bounds = [0]
+    with open(input_path, 'rb') as f:
+        for i in range(1, shard_count):
+            f.seek(max(i * step, bounds[-1]))
+            f.readline()  # 跳到下一个换行符之后
+            position = f.tell()
+            if position >= size:
+                break
+            if position > bounds[-1]:
+                bounds.append(position)
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i + 1] > bounds[i]]
+
+
+def _filter_shard(task: Tuple[int, str, str, int, int, Dict[str, Any]]) -> Tuple[int, int, int]:
+    """在子进程中过滤一个分片，结果写入分片临时文件
+
+    Returns:
+        (分片序号, 读取行数, 匹配行数)
+    """
+    index, input_path, part_path, start, end, config = task
+    read_enc = config['read_enc']
+    write_enc = config['write_enc']
+    line_filter = LineFilter.from_config(
+        config['keywords'],
+        config['ignore_case'],
+        config['filter_fields'],
+        config['enable_field_filter'],
+        config.get('query_mode', False)
+    )
+    bytes_filter = BytesLineFilter.create(line_filter, read_enc, write_enc)
+    count_in = 0
+
+    # 分片输出按顺序直接拼接，UTF-16 等编码的 BOM 只能出现在第一个分片开头
+    with open(input_path, 'rb') as fin, \
+         OutputSink(open(part_path, 'wb', buffering=SINK_BUFFER_SIZE), write_enc, bom=index == 0) as sink:
+        for block, lines in FileHandler.read_blocks(_RangeReader(fin, start, end)):
+            count_in += lines
+            if bytes_filter is not None:
+                sink.write_encoded(bytes_filter.filter_block(block))
+            else:
+                text = block.decode(read_enc, errors='ignore')
+                if text.endswith('\n'):
+                    text = text[:-1]
+                sink.write_lines([
+                    result for result in (line_filter(line[:-1] if line.endswith('\r') else line)
+                                          for line in text.split('\n'))
+                    if result is not None
+                ])
+
+    return index, count_in, sink.count
+
+
+def filter_file_parallel(
+        input_path: Path,
+        output_path: Path,
+        config: Dict[str, Any],
+        workers: Optional[int] = None,
+        callback: Optional[Callable[[int, int, ProgressInfo], None]] = None
+) -> Tuple[int, int]:
+    """把单个大文件切分后在进程池中并行过滤，并按原始顺序拼接输出
+
+    Args:
+        input_path: 输入文件路径
+        output_path: 输出文件路径
+        config: 过滤配置，包含 keywords、ignore_case、filter_fields、
+                enable_field_filter、read_enc、write_enc，可选 query_mode
+        workers: 进程数，默认为 CPU 核心数
+        callback: 分片完成回调，参数为 (已完成分片数, 分片总数, 进度快照)
+
+    Returns:
+        处理的总行数和匹配的行数
+    """
+    workers = workers or multiprocessing.cpu_count()
+    # 分片数多于进程数，让先完成的进程继续领取任务，进度也更平滑
+    shards = plan_shards(input_path, workers * 4, index=LineIndex.existing(input_path))
+    part_paths = [output_path.with_name(f".{output_path.name}.part{i}") for i in range(len(shards))]
+    tasks = [
+        (i, str(input_path), str(part_paths[i]), start, end, config)
+        for i, (start, end) in enumerate(shards)
+    ]
+
+    counts: Dict[int, Tuple[int, int]] = {}
+    tracker = ProgressTracker(input_path.stat().st_size)
+    bytes_done = 0
+    if not tasks:
+        output_path.write_bytes(b'')
+        return 0, 0
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            futures = [executor.submit(_filter_shard, task) for task in tasks]
+            for future in as_completed(futures):
+                index, count_in, count_out = future.result()
+                counts[index] = (count_in, count_out)
+                bytes_done += shards[index][1] - shards[index][0]
+                if callback:
+                    info = tracker.snapshot(bytes_done,
+                                            sum(c[0] for c in counts.values()),
+                                            sum(c[1] for c in counts.values()))
+                    callback(len(counts), len(tasks), info)
+
+        # 按原始顺序拼接各分片输出，BOM 已由第一个分片写出
+        with FileSink(output_path, config['write_enc'], bom=False) as sink:
+            for part_path in part_paths:
+                with open(part_path, 'rb') as fin:
+                    sink.copy_from(fin)
+    finally:
+        for part_path in part_paths:
+            try:
+                part_path.unlink()
+            except FileNotFoundError:
+                pass
+
+    return sum(c[0] for c in counts.values()), sum(c[1] for c in counts.values())
@@ -0,0 +1,275 @@
+"""预览区的数据源
+
+预览区只绘制可见的几十行，需要时向数据源按行号范围取内容。
+FilteredSource 只保存匹配行的字节偏移（每行 8 字节），显示时才从文件读取并处理
+可见的那一页，预览几百万条匹配和几百条匹配占用的界面资源相同。
+关键字的命中位置在处理每一页时一并计算，以紧凑数组随页缓存，高亮时直接取用。
+"""
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .file_handler import FileHandler
+from .matcher import BytesLineFilter, LineFilter
+
+# 命中位置：(相对行号, 起始列, 结束列, 关键字序号)
+Span = Tuple[int, int, int, int]
+
+
+def find_spans(matcher, lines: List[str]) -> Tuple[array, array]:
+    """计算各行的关键字命中位置
+
+    Returns:
+        (spans, starts)：spans 依次存放每个命中的 (起始列, 结束列, 关键字序号)，
+        第 i 行的命中是 spans[3 * starts[i]:3 * starts[i + 1]]
+    """
+    spans = array('L')
+    starts = array('L', [0])
+    for line in lines:
+        if matcher is not None:
+            for hit in matcher.finditer(line):
+                spans.extend(hit)
+        starts.append(len(spans) // 3)
+    return spans, starts
+
+
+def _collect_spans(spans: array, starts: array, first: int, last: int, row: int, result: List[Span]):
+    """把第 first 到 last - 1 行的命中追加到 result，相对行号从 row 开始"""
+    for i in range(first, last):
+        for k in range(3 * starts[i], 3 * starts[i + 1], 3):
+            result.append((row, spans[k], spans[k + 1], spans[k + 2]))
+        row += 1
+
+
+class RowMap:
+    """绘制的结果行与 Text 行的对应关系
+
+    删除字段时字面量 "\\n" 被还原为换行符（见 FieldStripper），一行结果在 Text 中可能占多行，
+    命中位置和行号都要经过这里换算，不能假设一行结果就是一行 Text。
+    """
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+        # 第 i 行结果在 Text 中的起始行号（从 1 开始），最后一项是总行数 + 1
+        self.starts = array('L', [1])
+        row = 1
+        for line in lines:
+            row += line.count('\n') + 1
+            self.starts.append(row)
+
+    @property
+    def text_rows(self) -> int:
+        """绘制内容在 Text 中占用的行数"""
+        return self.starts[-1] - 1
+
+    def index(self, row: int, column: int) -> str:
+        """第 row 行结果第 column 列在 Text 中的索引（"行.列"）"""
+        first = self.starts[row]
+        if self.starts[row + 1] - first == 1:
+            return f"{first}.{column}"
+        line = self.lines[row]
+        breaks = line.count('\n', 0, column)
+        if breaks:
+            column -= line.rfind('\n', 0, column) + 1
+        return f"{first + breaks}.{column}"
+
+
+class PreviewSource:
+    """按行号取内容的数据源（行号从 0 开始）"""
+
+    # 计算高亮位置使用的匹配器，None 表示不高亮
+    matcher = None
+    # 已从开头丢弃的行数，第 0 行是原来的第 dropped + 1 行（用于显示行号）
+    dropped = 0
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def get_lines(self, start: int, stop: int) -> List[str]:
+        """返回 [start, stop) 范围内的行，超出范围的部分被忽略"""
+        raise NotImplementedError
+
+    def append(self, lines: List[str], offsets: Optional[Iterable[int]] = None):
+        """在末尾追加行，offsets 为这些行在文件中的起始字节偏移（可选）"""
+        raise NotImplementedError
+
+    def get_spans(self, start: int, stop: int) -> List[Span]:
+        """返回 [start, stop) 范围内各行的关键字命中位置，行号相对于 start"""
+        lines = self.get_lines(start, stop)
+        result: List[Span] = []
+        _collect_spans(*find_spans(self.matcher, lines), 0, len(lines), 0, result)
+        return result
+
+    def iter_lines(self, batch_size: int = 4096) -> Iterator[str]:
+        """按顺序返回全部行（导出时使用）"""
+        for start in range(0, len(self), batch_size):
+            yield from self.get_lines(start, start + batch_size)
+
+
+class ListSource(PreviewSource):
+    """直接保存文本行的数据源，用于无法按偏移读取的内容（实时监控、UTF-16、压缩文件）"""
+
+    def __init__(self, lines: Optional[List[str]] = None, matcher=None):
+        self.lines: List[str] = lines if lines is not None else []
+        self.matcher = matcher
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def get_lines(self, start: int, stop: int) -> List[str]:
+        return self.lines[max(start, 0):stop]
+
+    def append(self, lines: List[str], offsets: Optional[Iterable[int]] = None):
+        self.lines.extend(lines)
+
+
+class RingSource(PreviewSource):
+    """只保留最后 capacity 行的数据源（实时监控），超出时覆盖最早的行，内存占用有上限"""
+
+    def __init__(self, capacity: int, matcher=None):
+        self.capacity = max(capacity, 1)
+        self.matcher = matcher
+        self.dropped = 0
+        self._lines: List[str] = []
+        self._head = 0  # 最早的一行在 _lines 中的位置
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def append(self, lines: List[str], offsets: Optional[Iterable[int]] = None):
+        if len(lines) >= self.capacity:
+            self.dropped += len(self._lines) + len(lines) - self.capacity
+            self._lines = list(lines[-self.capacity:])
+            self._head = 0
+            return
+        room = self.capacity - len(self._lines)
+        if room:
+            self._lines.extend(lines[:room])
+            lines = lines[room:]
+        while lines:
+            take = min(len(lines), self.capacity - self._head)
+            self._lines[self._head:self._head + take] = lines[:take]
+            self._head = (self._head + take) % self.capacity
+            self.dropped += take
+            lines = lines[take:]
+
+    def get_lines(self, start: int, stop: int) -> List[str]:
+        start = max(start, 0)
+        stop = min(stop, len(self))
+        if start >= stop:
+            return []
+        size = len(self._lines)
+        first = (self._head + start) % size
+        last = first + stop - start
+        if last <= size:
+            return self._lines[first:last]
+        return self._lines[first:] + self._lines[:last - size]
+
+
+class FilteredSource(PreviewSource):
+    """按匹配行偏移从文件读取的数据源
+
+    行内容在显示时才读取并重新做字段删除，按页缓存最近显示过的内容和命中位置。
+    没有偏移的批次（编码与 ASCII 不兼容或压缩文件）退化为直接保存文本行，排在有偏移的行之后。
+    """
+
+    PAGE_SIZE = 256  # 每页行数
+    MAX_PAGES = 32  # 最多缓存的页数
+
+    def __init__(self,
+                 input_path: Path,
+                 read_enc: str,
+                 line_filter: LineFilter,
+                 bytes_filter: Optional[BytesLineFilter] = None):
+        """初始化数据源
+
+        Args:
+            input_path: 预览的文件
+            read_enc: 已确定的文件编码（不能为 'auto'）
+            line_filter: 过滤时使用的行过滤器，用于重新做字段删除
+            bytes_filter: 字节路径的过滤器，可用时优先使用
+        """
+        self.input_path = input_path
+        self.read_enc = read_enc
+        self.line_filter = line_filter
+        self.bytes_filter = bytes_filter
+        self.matcher = line_filter.matcher
+        self.offsets = array('Q')
+        self.tail: List[str] = []  # 没有偏移的行
+        # 页号 -> (行, 命中位置, 各行命中的起始序号)，见 find_spans
+        self._pages: 'OrderedDict[int, Tuple[List[str], array, array]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.offsets) + len(self.tail)
+
+    def append(self, lines: List[str], offsets: Optional[Iterable[int]] = None):
+        if offsets is None or self.tail:
+            self.tail.extend(lines)
+        else:
+            self.offsets.extend(offsets)
+
+    def get_lines(self, start: int, stop: int) -> List[str]:
+        start = max(start, 0)
+        stop = min(stop, len(self))
+        result: List[str] = []
+        indexed = len(self.offsets)
+        position = start
+        while position < min(stop, indexed):
+            page_no, skip = divmod(position, self.PAGE_SIZE)
+            lines = self._page(page_no)[0]
+            take = lines[skip:skip + stop - position]
+            result.extend(take)
+            position += len(take)
+        if stop > indexed:
+            result.extend(self.tail[max(start - indexed, 0):stop - indexed])
+        return result
+
+    def get_spans(self, start: int, stop: int) -> List[Span]:
+        start = max(start, 0)
+        stop = min(stop, len(self))
+        result: List[Span] = []
+        indexed = len(self.offsets)
+        position = start
+        while position < min(stop, indexed):
+            page_no, skip = divmod(position, self.PAGE_SIZE)
+            lines, spans, starts = self._page(page_no)
+            last = min(skip + stop - position, len(lines))
+            _collect_spans(spans, starts, skip, last, position - start, result)
+            position += last - skip
+        if stop > indexed:
+            first = max(start, indexed)
+            tail = self.tail[first - indexed:stop - indexed]
+            _collect_spans(*find_spans(self.matcher, tail), 0, len(tail), first - start, result)
+        return result
+
+    def _page(self, page_no: int) -> Tuple[List[str], array, array]:
+        page = self._pages.get(page_no)
+        if page is not None:
+            self._pages.move_to_end(page_no)
+            return page
+        first = page_no * self.PAGE_SIZE
+        offsets = self.offsets[first:first + self.PAGE_SIZE]
+        lines = [self._process(line) for _, line in FileHandler.iter_lines_at(self.input_path, offsets)]
+        # 文件被截断时缺少的行以空行占位，行号保持不变
+        lines.extend([''] * (len(offsets) - len(lines)))
+        page = (lines, *find_spans(self.matcher, lines))
+        # 最后一页之后可能还会追加，不完整的页不缓存
+        if len(lines) == self.PAGE_SIZE:
+            self._pages[page_no] = page
+            if len(self._pages) > self.MAX_PAGES:
+                self._pages.popitem(last=False)
+        return page
+
+    def _process(self, line: bytes) -> str:
+        """对已匹配的行重新做字段删除；文件已被修改、该行不再匹配时显示原始内容"""
+        if self.bytes_filter is not None:
+            result = self.bytes_filter.process_matched(line)
+            if result is not None:
+                return self.bytes_filter.decode(result)
+        text = line.decode(self.read_enc, 'ignore')
+        if self.bytes_filter is None:
+            result = self.line_filter(text)
+            if result is not None:
+                return result
+        return text
@@ -0,0 +1,79 @@
+import time
+from typing import Callable, NamedTuple, Optional
+
+
+class ProgressInfo(NamedTuple):
+    """处理进度快照"""
+    bytes_done: int
+    total_bytes: int
+    lines: int
+    matched: int
+    elapsed: float
+
+    @property
+    def percent(self) -> float:
+        """已处理字节百分比"""
+        return self.bytes_done / self.total_bytes * 100 if self.total_bytes > 0 else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        """吞吐量（MB/s）"""
+        return self.bytes_done / 1024 / 1024 / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def lines_per_second(self) -> float:
+        """每秒处理行数"""
+        return self.lines / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """预计剩余秒数，尚无法估计时返回 None"""
+        if self.bytes_done <= 0 or self.elapsed <= 0:
+            return None
+        return (self.total_bytes - self.bytes_done) * self.elapsed / self.bytes_done
+
+    def format(self) -> str:
+        """格式化为控制台显示的进度文本"""
+        eta = self.eta
+        eta_text = f"{int(eta // 60)}:{int(eta % 60):02d}" if eta is not None else "--:--"
+        return (f"处理进度: {self.percent:.1f}% | {self.mb_per_second:.1f} MB/s | "
+                f"{self.lines_per_second:,.0f} 行/s | 已读取 {self.lines} 行 | 剩余 {eta_text}")
+
+
+class ProgressTracker:
+    """按字节位置跟踪处理进度，并限制回调频率"""
+
+    def __init__(self,
+                 total_bytes: int,
+                 callback: Optional[Callable[[ProgressInfo], None]] = None,
+                 interval: float = 0.5):
+        """初始化进度跟踪器
+
+        Args:
+            total_bytes: 总字节数
+            callback: 进度回调函数
+            interval: 两次回调之间的最小间隔（秒）
+        """
+        self.total_bytes = total_bytes
+        self.callback = callback
+        self.interval = interval
+        self.start_time = time.perf_counter()
+        self._last_report = 0.0
+
+    def snapshot(self, bytes_done: int, lines: int, matched: int = 0) -> ProgressInfo:
+        """生成当前进度快照"""
+        return ProgressInfo(bytes_done, self.total_bytes, lines, matched,
+                            time.perf_counter() - self.start_time)
+
+    def update(self, bytes_done: int, lines: int, matched: int = 0, force: bool = False):
+        """更新进度，距上次回调超过间隔或 force 为真时触发回调"""
+        if not self.callback:
+            return
+        now = time.perf_counter()
+        if force or now - self._last_report >= self.interval:
+            self._last_report = now
+            self.callback(self.snapshot(bytes_done, lines, matched))
+
+    def finish(self, lines: int, matched: int = 0):
+        """处理完成时强制回调一次"""
+        self.update(self.total_bytes, lines, matched, force=True)
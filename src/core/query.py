@@ -0,0 +1,741 @@
+"""过滤查询语言
+
+语法（查询模式下关键字输入框的内容）::
+
+    [CHAT] AND NOT "joined the game"
+    level:ERROR OR level:WARN,FATAL
+    logger:ChatComponent re:/<\\w+> .*hello/i
+    time:[12:00,12:30] (Steve | Alex)
+
+- 相邻的条件默认为 AND，OR 也可以写作 |，优先级 NOT > AND > OR，可以用括号分组；
+  运算符只识别大写的 AND、OR、NOT
+- 普通词语按子串匹配；含空格、括号、| 或引号的文本用双引号括起来，\\" 表示引号，不能为空
+- 前缀只识别小写的 re:、level:、time:、logger:，Time:12 等其他写法按普通词语匹配；
+  要按字面查找小写前缀（如 "level:"）时用双引号括起来
+- re:/模式/ 正则表达式，末尾可加 i 强制忽略大小写；/ 需要写作 \\/
+- level:名称 日志级别，逗号分隔多个级别；取行内第一个大写级别词，WARNING 视为 WARN，CRITICAL 视为 FATAL
+- logger:名称 行首方括号中的记录器名，可以是完整名称、最后一段类名或包名前缀
+- time:[开始,结束] 行首时间戳（HH:MM[:SS]，可带 YYYY-MM-DD 日期）在闭区间内，任一端可以留空
+
+查询只解析一次，编译为优化后的谓词树：同类条件合并，AND/OR 的子条件按代价和选择性排序，
+并从树中提取"必然出现的子串"作为预筛选，预筛选不通过的行不会执行任何正则；
+预筛选可以直接用于字节块扫描（见 BytesLineFilter）。
+"""
+import re
+import functools
+from typing import Iterator, List, Optional, Tuple
+
+from .matcher import KeywordMatcher
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre_parse
+
+# 可识别的日志级别及别名
+LEVELS = ('TRACE', 'DEBUG', 'INFO', 'WARN', 'ERROR', 'FATAL')
+_LEVEL_ALIASES = {'WARNING': 'WARN', 'CRITICAL': 'FATAL'}
+_LEVEL_RE = re.compile(r'\b(TRACE|DEBUG|INFO|WARN(?:ING)?|ERROR|FATAL|CRITICAL)\b')
+# 行首时间戳只在开头这么多字符内查找
+_TIME_SEARCH_SPAN = 64
+_TIME_RE = re.compile(r'(?:(\d{4}-\d{2}-\d{2})[ T])?(\d{2}:\d{2}:\d{2})')
+_TIME_BOUND_RE = re.compile(r'^(\d{4}-\d{2}-\d{2})?[ T]*(?:(\d{1,2}):(\d{2})(?::(\d{2}))?)?$')
+_HEADER_SEGMENT_RE = re.compile(r'\s*\[([^\[\]]*)\]')
+# 前缀区分大小写，从日志中复制的 Level:、Time: 等文本按普通词语匹配
+_PREFIX_RE = re.compile(r'(re|level|time|logger):')
+_OPERATORS = {'AND', 'OR', 'NOT'}
+_SPECIAL = '()|"'
+
+# 各类谓词的相对代价，用于排序子条件
+_COST_LITERAL = 1.0
+_COST_LEVEL = 3.0
+_COST_LOGGER = 4.0
+_COST_TIME = 4.0
+_COST_REGEX = 10.0
+
+# 正则中长度不足该值的字面量不作为预筛选
+_MIN_REGEX_LITERAL = 2
+
+
+class QueryError(ValueError):
+    """查询语法错误"""
+
+    def __init__(self, message: str, position: Optional[int] = None):
+        if position is not None:
+            message = f"{message}（位置 {position + 1}）"
+        super().__init__(message)
+
+
+# 必然出现的子串集合：行若匹配，其中至少一个子串必然出现。元素为 (子串, 是否忽略大小写)
+Needles = List[Tuple[str, bool]]
+
+
+class _Node:
+    """谓词树节点"""
+    cost = _COST_LITERAL
+
+    def test(self, line: str, hay: str) -> bool:
+        """判断一行是否满足条件，hay 为按查询规则折叠大小写后的行"""
+        raise NotImplementedError
+
+    def key(self) -> str:
+        """规范化的文本形式，语义相同的节点得到相同的结果"""
+        raise NotImplementedError
+
+    def needles(self) -> Optional[Needles]:
+        """必然出现的子串，无法确定时返回 None"""
+        return None
+
+    def selectivity(self) -> int:
+        """代价相同时的排序依据，越大越可能排除更多的行"""
+        return 0
+
+
+class _Literal(_Node):
+    def __init__(self, text: str, ignore_case: bool):
+        self.text = text
+        self.ignore_case = ignore_case
+        self.needle = text.lower() if ignore_case else text
+
+    def test(self, line, hay):
+        return self.needle in hay
+
+    def key(self):
+        return '"' + self.needle.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+    def needles(self):
+        return [(self.text, self.ignore_case)]
+
+    def selectivity(self):
+        return len(self.needle)
+
+
+class _AnyLiteral(_Node):
+    """多个子串之间的 OR，合并后逐个 in 查找"""
+
+    def __init__(self, literals: List[_Literal]):
+        self.literals = literals
+        self.needle_list = [l.needle for l in literals]
+        self.cost = _COST_LITERAL + 0.25 * len(literals)
+
+    def test(self, line, hay):
+        for needle in self.needle_list:
+            if needle in hay:
+                return True
+        return False
+
+    def key(self):
+        return '(' + ' OR '.join(sorted(l.key() for l in self.literals)) + ')'
+
+    def needles(self):
+        return [n for l in self.literals for n in l.needles()]
+
+    def selectivity(self):
+        return min(len(n) for n in self.needle_list)
+
+
+class _Regex(_Node):
+    cost = _COST_REGEX
+
+    def __init__(self, pattern: str, force_ignore_case: bool, ignore_case: bool, position: int):
+        self.pattern = pattern
+        self.flags = re.IGNORECASE if (force_ignore_case or ignore_case) else 0
+        try:
+            self.regex = re.compile(pattern, self.flags)
+        except re.error as e:
+            raise QueryError(f"正则表达式错误 /{pattern}/: {e}", position) from None
+
+    def test(self, line, hay):
+        return self.regex.search(line) is not None
+
+    def key(self):
+        return 're:/' + self.pattern.replace('/', '\\/') + '/' + ('i' if self.flags else '')
+
+    def needles(self):
+        literal = _regex_literal(self.pattern, self.flags)
+        if literal is None:
+            return None
+        return [literal]
+
+
+class _Level(_Node):
+    cost = _COST_LEVEL
+
+    def __init__(self, names: Tuple[str, ...]):
+        self.names = frozenset(names)
+
+    def test(self, line, hay):
+        match = _LEVEL_RE.search(line)
+        if match is None:
+            return False
+        level = match.group(1)
+        return _LEVEL_ALIASES.get(level, level) in self.names
+
+    def key(self):
+        return 'level:' + ','.join(sorted(self.names))
+
+    def needles(self):
+        # WARN 同时覆盖 WARNING；别名需要单独列出
+        needles = [(name, False) for name in self.names]
+        needles += [(alias, False) for alias, name in _LEVEL_ALIASES.items()
+                    if name in self.names and not alias.startswith(name)]
+        return needles
+
+
+class _Logger(_Node):
+    cost = _COST_LOGGER
+
+    def __init__(self, name: str, ignore_case: bool):
+        self.name = name
+        self.ignore_case = ignore_case
+        self.needle = name.lower() if ignore_case else name
+
+    def test(self, line, hay):
+        needle = self.needle
+        for name in _header_names(line):
+            if self.ignore_case:
+                name = name.lower()
+            if name == needle or name.endswith('.' + needle) or name.startswith(needle + '.'):
+                return True
+        return False
+
+    def key(self):
+        return 'logger:' + self.needle
+
+    def needles(self):
+        return [(self.name, self.ignore_case)]
+
+    def selectivity(self):
+        return len(self.needle)
+
+
+class _Time(_Node):
+    cost = _COST_TIME
+
+    def __init__(self, start: Optional[Tuple[Optional[str], str]], end: Optional[Tuple[Optional[str], str]]):
+        self.start = start
+        self.end = end
+
+    def test(self, line, hay):
+        match = _TIME_RE.search(line, 0, _TIME_SEARCH_SPAN)
+        if match is None:
+            return False
+        date, clock = match.groups()
+        if self.start is not None and _compare_time(date, clock, self.start) < 0:
+            return False
+        if self.end is not None and _compare_time(date, clock, self.end) > 0:
+            return False
+        return True
+
+    def key(self):
+        def fmt(bound):
+            return '' if bound is None else ' '.join(p for p in bound if p)
+        return f'time:[{fmt(self.start)},{fmt(self.end)}]'
+
+
+class _Not(_Node):
+    def __init__(self, child: _Node):
+        self.child = child
+        self.cost = child.cost
+
+    def test(self, line, hay):
+        return not self.child.test(line, hay)
+
+    def key(self):
+        return 'NOT ' + self.child.key()
+
+
+class _And(_Node):
+    def __init__(self, children: List[_Node]):
+        self.children = children
+        self.cost = sum(c.cost for c in children)
+
+    def test(self, line, hay):
+        for child in self.children:
+            if not child.test(line, hay):
+                return False
+        return True
+
+    def key(self):
+        return '(' + ' AND '.join(sorted(c.key() for c in self.children)) + ')'
+
+    def needles(self):
+        return _best_needles(self.children)[0]
+
+    def selectivity(self):
+        return max(c.selectivity() for c in self.children)
+
+
+class _Or(_Node):
+    def __init__(self, children: List[_Node]):
+        self.children = children
+        self.cost = sum(c.cost for c in children)
+
+    def test(self, line, hay):
+        for child in self.children:
+            if child.test(line, hay):
+                return True
+        return False
+
+    def key(self):
+        return '(' + ' OR '.join(sorted(c.key() for c in self.children)) + ')'
+
+    def needles(self):
+        needles = []
+        for child in self.children:
+            child_needles = child.needles()
+            if child_needles is None:
+                return None
+            needles.extend(child_needles)
+        return needles
+
+    def selectivity(self):
+        return min(c.selectivity() for c in self.children)
+
+
+def _header_names(line: str) -> Iterator[str]:
+    """行首连续方括号段中的记录器名，跳过时间戳和 "线程/级别" 段"""
+    pos = 0
+    while True:
+        match = _HEADER_SEGMENT_RE.match(line, pos)
+        if match is None:
+            return
+        pos = match.end()
+        name, _, tail = match.group(1).partition('/')
+        if tail in LEVELS or tail in _LEVEL_ALIASES or not name or name.replace(':', '').isdigit():
+            continue
+        yield name
+
+
+def _compare_time(date: Optional[str], clock: str, bound: Tuple[Optional[str], str]) -> int:
+    """比较行的时间与边界，双方都有日期时连同日期比较，否则只比较时刻"""
+    bound_date, bound_clock = bound
+    if date and bound_date and date != bound_date:
+        return -1 if date < bound_date else 1
+    if bound_date and not bound_clock:
+        return 0
+    if clock == bound_clock:
+        return 0
+    return -1 if clock < bound_clock else 1
+
+
+def _parse_time_bound(text: str, is_end: bool, position: int) -> Optional[Tuple[Optional[str], str]]:
+    """解析时间边界，缺少的秒数按区间端点补齐；只有日期时覆盖当天全部时刻"""
+    text = text.strip()
+    if not text:
+        return None
+    match = _TIME_BOUND_RE.match(text)
+    if match is None or not (match.group(1) or match.group(2)):
+        raise QueryError(f"无法识别的时间 '{text}'，应为 HH:MM[:SS] 或 YYYY-MM-DD [HH:MM[:SS]]", position)
+    date, hour, minute, second = match.groups()
+    if hour is None:
+        return date, ''
+    if second is None:
+        second = '59' if is_end else '00'
+    return date, f"{int(hour):02d}:{minute}:{second}"
+
+
+def _regex_literal(pattern: str, flags: int) -> Optional[Tuple[str, bool]]:
+    """提取正则中必然出现的最长字面量
+
+    只检查顶层的连续字面字符：分支、分组、字符集和重复都会中断字面量，
+    因此结果一定是任何匹配都包含的子串。
+    """
+    try:
+        parsed = _sre_parse.parse(pattern, flags)
+    except Exception:
+        return None
+    ignore_case = bool(parsed.state.flags & re.IGNORECASE)
+    best = current = ''
+    for op, av in parsed.data:
+        if op is _sre_parse.LITERAL:
+            current += chr(av)
+            continue
+        if len(current) > len(best):
+            best = current
+        current = ''
+    if len(current) > len(best):
+        best = current
+    if len(best) < _MIN_REGEX_LITERAL:
+        return None
+    return best, ignore_case
+
+
+def _needle_rank(needles: Needles) -> Tuple[int, int]:
+    """预筛选子串的优劣：子串越少、最短的越长越好"""
+    return len(needles), -min(len(n) for n, _ in needles)
+
+
+def _best_needles(children: List[_Node]) -> Tuple[Optional[Needles], Optional[_Node]]:
+    """在 AND 的子条件中选出最好的预筛选子串，返回 (子串, 提供子串的子条件)"""
+    best = best_child = None
+    for child in children:
+        needles = child.needles()
+        if not needles:
+            continue
+        if best is None or _needle_rank(needles) < _needle_rank(best):
+            best, best_child = needles, child
+    return best, best_child
+
+
+class _Parser:
+    """递归下降解析器：or := and (('OR'|'|') and)*；and := not ('AND'? not)*；not := 'NOT' not | atom"""
+
+    def __init__(self, text: str, ignore_case: bool):
+        self.text = text
+        self.ignore_case = ignore_case
+        self.tokens = list(self._tokenize())
+        self.index = 0
+
+    def parse(self) -> Optional[_Node]:
+        if not self.tokens:
+            return None
+        node = self._parse_or()
+        if self.index < len(self.tokens):
+            kind, _, position = self.tokens[self.index]
+            raise QueryError(f"多余的 '{self.text[position]}'", position)
+        return node
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.index][0] if self.index < len(self.tokens) else None
+
+    def _parse_or(self) -> _Node:
+        children = [self._parse_and()]
+        while self._peek() == 'OR':
+            self.index += 1
+            children.append(self._parse_and())
+        return children[0] if len(children) == 1 else _Or(children)
+
+    def _parse_and(self) -> _Node:
+        children = [self._parse_not()]
+        while self._peek() in ('AND', 'NOT', 'TERM', '('):
+            if self._peek() == 'AND':
+                self.index += 1
+            children.append(self._parse_not())
+        return children[0] if len(children) == 1 else _And(children)
+
+    def _parse_not(self) -> _Node:
+        if self._peek() == 'NOT':
+            self.index += 1
+            return _Not(self._parse_not())
+        return self._parse_atom()
+
+    def _parse_atom(self) -> _Node:
+        if self.index >= len(self.tokens):
+            raise QueryError("查询不完整", len(self.text))
+        kind, value, position = self.tokens[self.index]
+        self.index += 1
+        if kind == 'TERM':
+            return value
+        if kind == '(':
+            node = self._parse_or()
+            if self._peek() != ')':
+                raise QueryError("缺少 ')'", position)
+            self.index += 1
+            return node
+        raise QueryError(f"'{self.text[position:position + 3].strip()}' 前缺少条件", position)
+
+    def _tokenize(self) -> Iterator[Tuple[str, Optional[_Node], int]]:
+        text = self.text
+        i, n = 0, len(text)
+        while i < n:
+            c = text[i]
+            if c.isspace():
+                i += 1
+            elif c in '()':
+                yield c, None, i
+                i += 1
+            elif c == '|':
+                yield 'OR', None, i
+                i += 1
+            elif c == '"':
+                value, end = self._read_quoted(i)
+                if not value:
+                    # 空字符串出现在每一行中，"foo OR \"\"" 会匹配所有行，不符合直觉
+                    raise QueryError('空的引号字符串 ""', i)
+                yield 'TERM', _Literal(value, self.ignore_case), i
+                i = end
+            else:
+                prefix = _PREFIX_RE.match(text, i)
+                if prefix is not None:
+                    node, end = self._read_prefixed(prefix.group(1), prefix.end(), i)
+                    yield 'TERM', node, i
+                    i = end
+                    continue
+                end = self._word_end(i)
+                word = text[i:end]
+                if word in _OPERATORS:
+                    yield word, None, i
+                else:
+                    yield 'TERM', _Literal(word, self.ignore_case), i
+                i = end
+
+    def _word_end(self, i: int) -> int:
+        text = self.text
+        while i < len(text) and not text[i].isspace() and text[i] not in _SPECIAL:
+            i += 1
+        return i
+
+    def _read_quoted(self, start: int) -> Tuple[str, int]:
+        """读取双引号字符串，返回 (内容, 结束位置)"""
+        text = self.text
+        chars = []
+        i = start + 1
+        while i < len(text):
+            c = text[i]
+            if c == '\\' and i + 1 < len(text) and text[i + 1] in '"\\':
+                chars.append(text[i + 1])
+                i += 2
+            elif c == '"':
+                return ''.join(chars), i + 1
+            else:
+                chars.append(c)
+                i += 1
+        raise QueryError("缺少结束的引号", start)
+
+    def _read_value(self, start: int) -> Tuple[str, int]:
+        """读取前缀条件的值：引号字符串或普通词语"""
+        if start < len(self.text) and self.text[start] == '"':
+            return self._read_quoted(start)
+        end = self._word_end(start)
+        return self.text[start:end], end
+
+    def _read_prefixed(self, prefix: str, start: int, position: int) -> Tuple[_Node, int]:
+        text = self.text
+        if prefix == 're':
+            if start < len(text) and text[start] == '"':
+                pattern, end = self._read_quoted(start)
+                return _Regex(pattern, False, self.ignore_case, position), end
+            if start >= len(text) or text[start] != '/':
+                raise QueryError("正则表达式应写作 re:/模式/", position)
+            chars = []
+            i = start + 1
+            while i < len(text) and text[i] != '/':
+                if text[i] == '\\' and i + 1 < len(text) and text[i + 1] == '/':
+                    chars.append('/')
+                    i += 2
+                    continue
+                chars.append(text[i])
+                i += 1
+            if i >= len(text):
+                raise QueryError("正则表达式缺少结束的 /", position)
+            i += 1
+            force_ignore_case = i < len(text) and text[i] == 'i'
+            if force_ignore_case:
+                i += 1
+            return _Regex(''.join(chars), force_ignore_case, self.ignore_case, position), i
+
+        if prefix == 'time':
+            if start >= len(text) or text[start] != '[':
+                raise QueryError("时间范围应写作 time:[开始,结束]", position)
+            end = text.find(']', start)
+            if end < 0:
+                raise QueryError("时间范围缺少 ']'", position)
+            parts = text[start + 1:end].split(',')
+            if len(parts) != 2:
+                raise QueryError("时间范围应写作 time:[开始,结束]", position)
+            node = _Time(_parse_time_bound(parts[0], False, position),
+                         _parse_time_bound(parts[1], True, position))
+            return node, end + 1
+
+        value, end = self._read_value(start)
+        if not value:
+            raise QueryError(f"{prefix}: 后缺少内容（按字面查找请用双引号括起来：\"{prefix}:\"）", position)
+        if prefix == 'level':
+            names = []
+            for name in value.upper().split(','):
+                name = _LEVEL_ALIASES.get(name.strip(), name.strip())
+                if name not in LEVELS:
+                    raise QueryError(f"未知的日志级别 '{name}'，可用：{', '.join(LEVELS)}", position)
+                names.append(name)
+            return _Level(tuple(names)), end
+        return _Logger(value, self.ignore_case), end
+
+
+def _optimize(node: _Node) -> _Node:
+    """化简并排序谓词树：展开嵌套的 AND/OR、消去双重否定、去除重复条件、
+    合并 OR 中的子串，子条件按代价从低到高排列（AND 中代价相同时选择性高的在前）"""
+    if isinstance(node, _Not):
+        child = _optimize(node.child)
+        if isinstance(child, _Not):
+            return child.child
+        return _Not(child)
+    if not isinstance(node, (_And, _Or)):
+        return node
+
+    cls = type(node)
+    children: List[_Node] = []
+    seen = set()
+    for child in node.children:
+        child = _optimize(child)
+        parts = child.children if isinstance(child, cls) else [child]
+        for part in parts:
+            key = part.key()
+            if key not in seen:
+                seen.add(key)
+                children.append(part)
+
+    if cls is _Or:
+        # 子条件中已经合并过的子串（如括号中的 a | b）一并展开，重复的只保留一个
+        literals = {}
+        for child in children:
+            if isinstance(child, _AnyLiteral):
+                for literal in child.literals:
+                    literals.setdefault(literal.key(), literal)
+            elif isinstance(child, _Literal):
+                literals.setdefault(child.key(), child)
+        if len(literals) > 1:
+            children = [c for c in children if not isinstance(c, (_Literal, _AnyLiteral))]
+            children.append(_AnyLiteral(list(literals.values())))
+        # OR 中越容易成立的条件越应该先算
+        children.sort(key=lambda c: (c.cost, c.selectivity()))
+    else:
+        children.sort(key=lambda c: (c.cost, -c.selectivity()))
+    if len(children) == 1:
+        return children[0]
+    return cls(children)
+
+
+def _positive_terms(node: _Node, literals: List[str], regexes: List['re.Pattern']):
+    """收集不在 NOT 之下的子串和正则，用于高亮"""
+    if isinstance(node, _Literal):
+        literals.append(node.text)
+    elif isinstance(node, _AnyLiteral):
+        literals.extend(l.text for l in node.literals)
+    elif isinstance(node, _Regex):
+        regexes.append(node.regex)
+    elif isinstance(node, (_And, _Or)):
+        for child in node.children:
+            _positive_terms(child, literals, regexes)
+
+
+class QueryMatcher:
+    """编译后的查询
+
+    提供与 KeywordMatcher 相同的接口（matches、finditer、encode、is_ascii 等），
+    可以直接放入 LineFilter，过滤、搜索、实时监控和高亮共用同一个实例。
+    """
+
+    def __init__(self, text: str, ignore_case: bool = True):
+        """解析并编译查询
+
+        Args:
+            text: 查询文本
+            ignore_case: 子串、logger 和正则是否忽略大小写
+
+        Raises:
+            QueryError: 查询语法错误
+        """
+        self.text = text
+        self.ignore_case = ignore_case
+        tree = _Parser(text, ignore_case).parse()
+        root = _optimize(tree) if tree is not None else None
+
+        # 顶层 AND 的各个条件，用于判断一个查询是否收窄了另一个查询
+        if root is None:
+            self.conjuncts: Tuple[str, ...] = ()
+        elif isinstance(root, _And):
+            self.conjuncts = tuple(sorted(c.key() for c in root.children))
+        else:
+            self.conjuncts = (root.key(),)
+
+        literals: List[str] = []
+        self._regexes: List['re.Pattern'] = []
+        if root is not None:
+            _positive_terms(root, literals, self._regexes)
+        self.keywords: List[str] = list(dict.fromkeys(literals))
+        self._highlighter = KeywordMatcher(self.keywords, ignore_case)
+
+        # 预筛选：提供子串的条件若本身就是子串匹配，预筛选已经保证了它，从树中删去
+        self.prefilter: Optional[KeywordMatcher] = None
+        if root is not None:
+            if isinstance(root, _And):
+                needles, source = _best_needles(root.children)
+            else:
+                needles, source = root.needles(), root
+            if needles:
+                fold = any(ci for _, ci in needles)
+                self.prefilter = KeywordMatcher([n for n, _ in needles], fold)
+                if isinstance(source, (_Literal, _AnyLiteral)) and fold == ignore_case:
+                    if source is root:
+                        root = None
+                    else:
+                        rest = [c for c in root.children if c is not source]
+                        root = rest[0] if len(rest) == 1 else _And(rest)
+        self.root = root
+        # 预筛选与子串条件的大小写规则一致时，两者共用同一次折叠
+        self._shared_fold = self.prefilter is not None and self.prefilter.ignore_case == ignore_case
+        self._fold = ignore_case
+
+    def __bool__(self) -> bool:
+        return self.root is not None or self.prefilter is not None
+
+    def __len__(self) -> int:
+        """高亮使用的条件数（子串和正则）"""
+        return len(self.keywords) + len(self._regexes)
+
+    def __repr__(self) -> str:
+        return f"QueryMatcher({self.text!r}, ignore_case={self.ignore_case})"
+
+    @property
+    def is_exact(self) -> bool:
+        """预筛选的结果是否就是最终结果（查询只由子串组成）"""
+        return self.root is None and self.prefilter is not None
+
+    @property
+    def is_ascii(self) -> bool:
+        """是否有可以按字节扫描的预筛选（预筛选子串全部为 ASCII）"""
+        return self.prefilter is not None and self.prefilter.is_ascii
+
+    def encode(self, encoding: str = 'ascii') -> KeywordMatcher:
+        """返回按字节匹配的预筛选，命中的行仍需用 matches 复核（除非 is_exact）"""
+        return self.prefilter.encode(encoding)
+
+    def matches(self, line: str) -> bool:
+        """判断行是否满足查询"""
+        prefilter = self.prefilter
+        if self._shared_fold:
+            hay = line.lower() if self._fold else line
+            if not prefilter.matches_folded(hay):
+                return False
+        else:
+            if prefilter is not None and not prefilter.matches(line):
+                return False
+            hay = line.lower() if self._fold else line
+        root = self.root
+        if root is None:
+            return prefilter is not None
+        return root.test(line, hay)
+
+    def finditer(self, line: str) -> Iterator[Tuple[int, int, int]]:
+        """按位置顺序返回行内所有需要高亮的子串和正则命中
+
+        Yields:
+            (起始位置, 结束位置, 条件序号)
+        """
+        spans = list(self._highlighter.finditer(line))
+        base = len(self.keywords)
+        for index, regex in enumerate(self._regexes, base):
+            for match in regex.finditer(line):
+                if match.end() > match.start():
+                    spans.append((match.start(), match.end(), index))
+        spans.sort()
+        return iter(spans)
+
+
+@functools.lru_cache(maxsize=32)
+def compile_query(text: str, ignore_case: bool = True) -> QueryMatcher:
+    """编译查询，相同的查询文本复用同一个实例
+
+    Raises:
+        QueryError: 查询语法错误
+    """
+    return QueryMatcher(text, ignore_case)
+
+
+def narrows(conjuncts: Tuple[str, ...], base_conjuncts: Tuple[str, ...]) -> bool:
+    """判断查询的匹配结果是否一定是基础查询结果的子集
+
+    新查询在基础查询的顶层 AND 条件上追加了条件（如 [CHAT] → [CHAT] AND level:WARN）时成立。
+    """
+    return bool(base_conjuncts) and set(base_conjuncts) <= set(conjuncts)
@@ -0,0 +1,186 @@
+"""增量读取正在写入的日志文件
+
+TailReader 记录已读取到的字节偏移，每次只读取新增的部分。末尾尚未写完的行
+留到换行符到达后再返回，多字节字符被拆在两次写入之间时由增量解码器拼接。
+文件被替换（日志轮转，如 Minecraft 启动时把 latest.log 改名压缩后新建）
+或被截断时，从新文件的开头继续读取，不会重复返回已经读过的内容；
+旧文件末尾没有换行符的行不会再写完，作为完整的一行返回。
+"""
+import codecs
+import os
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple
+
+from .matcher import is_ascii_compatible
+
+
+class TailReader:
+    """按字节偏移增量读取文件末尾新增的完整行"""
+
+    # 每次 read 最多读取的字节数，文件一次增长很多时分多次返回
+    READ_SIZE = 1024 * 1024  # 1MB
+    # 一直没有换行符的行超过该长度（字符数）时直接返回，避免无限积累
+    MAX_PARTIAL = 1024 * 1024
+    # 从末尾开始读取时，向前寻找行首的最大字节数
+    BACKTRACK_SIZE = 64 * 1024
+    # Windows 上保持文件打开会使写入方无法改名轮转，每次读取后关闭
+    KEEP_OPEN = os.name != 'nt'
+
+    def __init__(self, path: Path, encoding: str = 'utf-8', from_end: bool = True):
+        """初始化读取器
+
+        Args:
+            path: 日志文件路径，文件暂时不存在时等到出现后从头读取
+            encoding: 文件编码
+            from_end: 为真时跳过已有内容，只读取之后新增的行
+
+        Raises:
+            LookupError: 不支持的编码
+        """
+        self.path = Path(path)
+        if codecs.lookup(encoding).name == 'ascii':
+            # 自动检测只看文件开头，之后写入的非 ASCII 内容按 UTF-8 解码而不是被丢弃
+            encoding = 'utf-8'
+        self.encoding = encoding
+        self._decoder_factory = codecs.getincrementaldecoder(encoding)
+        self._decoder = self._decoder_factory(errors='ignore')
+        self._file: Optional[BinaryIO] = None
+        self._identity: Optional[Tuple[int, int]] = None  # (设备号, inode)
+        self._partial = ''  # 尚未遇到换行符的行
+        self._flushed = ''  # 轮转或截断时取出的旧文件最后一行，下次 read 时返回
+        self.position = 0  # 已读取到的字节偏移
+        self.rotations = 0  # 检测到文件被替换或截断的次数
+        self.bytes_read = 0  # 累计读取的字节数
+        if from_end and self._open():
+            self.position = self._line_start(os.fstat(self._file.fileno()).st_size)
+            self._file.seek(self.position)
+            self._release()
+
+    @staticmethod
+    def _identity_of(stat: os.stat_result) -> Tuple[int, int]:
+        return stat.st_dev, stat.st_ino
+
+    def _open(self) -> bool:
+        """打开文件并记录其身份，文件不存在时返回 False"""
+        try:
+            self._file = open(self.path, 'rb')
+        except FileNotFoundError:
+            return False
+        self._identity = self._identity_of(os.fstat(self._file.fileno()))
+        return True
+
+    def _release(self):
+        """不保持文件打开时关闭文件（下次读取时按路径重新打开）"""
+        if not self.KEEP_OPEN:
+            self.close()
+
+    def _line_start(self, size: int) -> int:
+        """从末尾开始读取时的起点：最后一行没写完时退回到该行行首，该行写完后完整返回"""
+        if size == 0 or not is_ascii_compatible(self.encoding):
+            return size
+        start = max(size - self.BACKTRACK_SIZE, 0)
+        self._file.seek(start)
+        newline = self._file.read(size - start).rfind(b'\n')
+        if newline >= 0:
+            return start + newline + 1
+        return size if start else 0
+
+    def _take_partial(self) -> str:
+        """取出尚未遇到换行符的内容（解码器中不完整的字节被丢弃），作为完整的一行"""
+        text = self._partial + self._decoder.decode(b'', final=True)
+        self._partial = ''
+        return text + '\n' if text else ''
+
+    def _reset(self, reopen: bool):
+        """文件被替换或截断：未完成的行作为最后一行留待返回，从新文件开头读取"""
+        self.rotations += 1
+        self._flushed += self._take_partial()
+        self._decoder = self._decoder_factory(errors='ignore')
+        self.position = 0
+        if reopen:
+            self.close()
+            self._identity = None
+            self._open()
+        elif self._file is not None:
+            self._file.seek(0)
+
+    def _check_file(self) -> bool:
+        """检查文件是否被替换或截断，返回文件当前是否可以读取"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # 轮转过程中旧文件已改名、新文件尚未创建，继续读完已打开的旧文件
+            return self._file is not None
+        if self._file is None:
+            previous = self._identity
+            if not self._open():
+                return False
+            stat = os.fstat(self._file.fileno())
+            if previous is not None and self._identity != previous:
+                # 关闭期间文件被替换，旧文件剩余的内容已无法读取
+                self._reset(reopen=False)
+            else:
+                self._file.seek(self.position)
+        if self._identity != self._identity_of(stat):
+            return True  # 先读完旧文件剩余的内容，见 read
+        if stat.st_size < self.position:
+            self._reset(reopen=False)
+        return True
+
+    def read(self) -> str:
+        """读取新增的完整行（至多 READ_SIZE 字节）
+
+        Returns:
+            以换行符结尾的若干完整行，没有新的完整行时返回空字符串
+        """
+        if not self._check_file():
+            return self._take_flushed()
+        try:
+            data = self._file.read(self.READ_SIZE)
+            if not data and self._is_replaced():
+                # 旧文件已经读完，从新文件开头读取（旧文件的最后一行随之返回）
+                self._reset(reopen=True)
+                return self.read()
+            self.position += len(data)
+            self.bytes_read += len(data)
+            return self._take_flushed() + self._complete_lines(self._decoder.decode(data))
+        finally:
+            self._release()
+
+    def flush(self) -> str:
+        """取出尚未返回的全部内容（文件不再跟踪时调用），末尾没有换行符的行作为完整的一行"""
+        return self._take_flushed() + self._take_partial()
+
+    def _take_flushed(self) -> str:
+        text, self._flushed = self._flushed, ''
+        return text
+
+    @property
+    def has_more(self) -> bool:
+        """文件中是否还有尚未读取的数据（上一次 read 受 READ_SIZE 限制未读完）"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return self._identity != self._identity_of(stat) or stat.st_size > self.position
+
+    def _is_replaced(self) -> bool:
+        try:
+            return self._identity != self._identity_of(os.stat(self.path))
+        except FileNotFoundError:
+            return False
+
+    def _complete_lines(self, text: str) -> str:
+        text = self._partial + text
+        end = text.rfind('\n') + 1
+        if end == 0 and len(text) > self.MAX_PARTIAL:
+            self._partial = ''
+            return text + '\n'
+        self._partial = text[end:]
+        return text[:end]
+
+    def close(self):
+        """关闭文件"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
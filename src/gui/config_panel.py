@@ -5,9 +5,13 @@ from ttkbootstrap.constants import *
 from src.utils.tooltip import ToolTip
 
 class ConfigPanel:
+    # 输入停止多久后才触发实时预览（毫秒）
+    DEBOUNCE_DELAY = 300
+
     def __init__(self, parent, app):
         self.parent = parent
         self.app = app
+        self._preview_after_id = None
         self._create_widgets()
 
     def _create_widgets(self):
@@ -26,7 +30,7 @@ class ConfigPanel:
         # 绑定关键词变化事件
         self.keyword_var = tk.StringVar()
         self.keyword.config(textvariable=self.keyword_var)
-        self.keyword_var.trace_add("write", self._on_filter_change)
+        self.keyword_var.trace_add("write", self._on_text_change)
         
         # 过滤字段输入框
         filter_frame = ttkb.Frame(config_frame)
@@ -40,7 +44,7 @@ class ConfigPanel:
         # 绑定过滤字段变化事件
         self.filter_var = tk.StringVar()
         self.filter_fields.config(textvariable=self.filter_var)
-        self.filter_var.trace_add("write", self._on_filter_change)
+        self.filter_var.trace_add("write", self._on_text_change)
         
         # 选项区域
         options_frame = ttkb.Frame(config_frame)
@@ -61,6 +65,14 @@ class ConfigPanel:
                         variable=self.hide_fields,
                         command=self._on_filter_change).grid(row=0, column=2, padx=5)
         
+        self.query_mode = ttkb.BooleanVar(value=False)
+        query_check = ttkb.Checkbutton(options_frame, text="查询语法",
+                                       variable=self.query_mode,
+                                       command=self._on_filter_change)
+        query_check.grid(row=0, column=3, padx=5)
+        ToolTip(query_check, "关键字按查询语法解析：AND / OR（或 |）/ NOT、括号、\"带空格的文本\"、\n"
+                             "re:/正则/、level:ERROR、logger:ChatComponent、time:[12:00,12:30]")
+        
         # 编码选择
         ttkb.Label(config_frame, text="输入编码:").grid(row=3, column=0, sticky="w", padx=5, pady=2)
         self.enc_in = ttkb.Combobox(config_frame, values=['ANSI','utf-8', 'gbk', 'gb2312', 'latin1'])
@@ -86,8 +98,18 @@ class ConfigPanel:
         config_frame.columnconfigure(1, weight=1)
         config_frame.pack(fill="x", padx=5, pady=5)
 
+    def _on_text_change(self, *args):
+        """输入框内容变化时的处理：连续输入只在停顿后预览一次"""
+        if self._preview_after_id is not None:
+            self.parent.after_cancel(self._preview_after_id)
+        self._preview_after_id = self.parent.after(self.DEBOUNCE_DELAY, self._on_filter_change)
+
     def _on_filter_change(self, *args):
         """过滤条件变化时的处理"""
+        if self._preview_after_id is not None:
+            self.parent.after_cancel(self._preview_after_id)
+            self._preview_after_id = None
+        self.app.update_monitor_filter()
         if hasattr(self.app, 'current_file') and self.live_preview.get():
             self.app.preview_filtered()
 
@@ -99,5 +121,6 @@ class ConfigPanel:
             'ignore_case': self.ignore_case.get(),
             'enable_field_filter': self.hide_fields.get(),
             'read_enc': self.enc_in.get(),
-            'write_enc': self.enc_out.get()
+            'write_enc': self.enc_out.get(),
+            'query_mode': self.query_mode.get()
         }
\ No newline at end of file
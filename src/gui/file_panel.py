@@ -5,6 +5,7 @@ from ttkbootstrap.constants import *
 from tkinter import filedialog
 import datetime
 
+from src.core.file_handler import FileHandler
 from src.utils.tooltip import ToolTip
 
 class FilePanel:
@@ -85,7 +86,7 @@ class FilePanel:
             for item in sorted(self.current_dir.iterdir()):
                 if item.is_dir():
                     self.file_list.insert("end", f"📁 {item.name}")
-                elif item.suffix.lower() in ['.log', '.txt']:
+                elif FileHandler.is_log_file(item):
                     self.file_list.insert("end", item.name)
                     
         except Exception as e:
@@ -109,7 +110,7 @@ class FilePanel:
                 if search_text in item.name.lower():
                     if item.is_dir():
                         self.file_list.insert("end", f"📁 {item.name}")
-                    elif item.suffix.lower() in ['.log', '.txt']:
+                    elif FileHandler.is_log_file(item):
                         self.file_list.insert("end", item.name)
                         
         except Exception as e:
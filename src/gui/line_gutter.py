@@ -0,0 +1,99 @@
+import tkinter as tk
+import tkinter.font as tkfont
+from typing import List, Optional, Sequence
+
+
+class LineGutter(tk.Canvas):
+    """画在 Canvas 上的行号栏
+
+    只为 Text 组件中当前显示的行绘制行号，纵向位置取自 Text.dlineinfo，
+    自动换行的长行也能与行号对齐。行号项在重绘时复用，只修改文字和位置，
+    多出来的项隐藏，不需要复制 Text 的内容或重建全部行号。
+    """
+
+    def __init__(self,
+                 master,
+                 text: tk.Text,
+                 font=("Cascadia Code", 10),
+                 background: str = '#f0f0f0',
+                 foreground: str = '#606060',
+                 padx: int = 3,
+                 min_digits: int = 4):
+        """初始化行号栏
+
+        Args:
+            master: 父组件
+            text: 显示内容的 Text 组件
+            font: 行号字体
+            background: 背景色
+            foreground: 行号颜色
+            padx: 左右留白（像素）
+            min_digits: 行号栏至少容纳的位数
+        """
+        super().__init__(master, background=background, highlightthickness=0, border=0, takefocus=0)
+        self.text = text
+        self.font = tkfont.Font(font=font)
+        self.foreground = foreground
+        self.padx = padx
+        self.min_digits = min_digits
+        self._items: List[int] = []  # 复用的行号项
+        self._first = 1
+        self._count = 0
+        self._starts: Optional[Sequence[int]] = None
+        self._digits = 0
+        self._draw_pending = False
+        self._set_digits(min_digits)
+        # 窗口大小改变时自动换行的位置随之变化
+        text.bind('<Configure>', lambda e: self.schedule_draw(), add='+')
+
+    def show(self, first_line: int, count: int, starts: Optional[Sequence[int]] = None):
+        """显示 count 行内容的行号 first_line ~ first_line + count - 1
+
+        Args:
+            starts: 第 i 行内容在 Text 中的起始行号（见 RowMap.starts），
+                    一行内容占多行 Text 时行号只标在第一行；默认每行内容为一行 Text
+        """
+        self._first = first_line
+        self._count = count
+        self._starts = starts
+        self._set_digits(len(str(first_line + count - 1)))
+        self.schedule_draw()
+
+    def clear(self):
+        """清空行号"""
+        self.show(1, 0)
+
+    def schedule_draw(self):
+        """在空闲时重绘（Text 完成布局后 dlineinfo 才有效）"""
+        if not self._draw_pending:
+            self._draw_pending = True
+            self.after_idle(self._draw)
+
+    def _set_digits(self, digits: int):
+        digits = max(digits, self.min_digits)
+        if digits != self._digits:
+            self._digits = digits
+            self.configure(width=self.font.measure('0' * digits) + 2 * self.padx)
+
+    def _draw(self):
+        self._draw_pending = False
+        x = self.font.measure('0' * self._digits) + self.padx
+        shown = 0
+        for row in range(self._count):
+            line = self._starts[row] if self._starts is not None else row + 1
+            info = self.text.dlineinfo(f"{line}.0")
+            if info is None:
+                # 之后的行都在窗口之外
+                break
+            y = info[1]
+            label = str(self._first + row)
+            if row < len(self._items):
+                item = self._items[row]
+                self.coords(item, x, y)
+                self.itemconfigure(item, text=label, state='normal')
+            else:
+                self._items.append(self.create_text(x, y, anchor='ne', text=label,
+                                                    font=self.font, fill=self.foreground))
+            shown += 1
+        for item in self._items[shown:]:
+            self.itemconfigure(item, state='hidden')
@@ -1,6 +1,5 @@
 import os
 import sys
-import queue
 import threading
 from pathlib import Path
 import tkinter as tk
@@ -9,26 +8,43 @@ import ttkbootstrap as ttkb
 from ttkbootstrap.constants import *
 import re
 from datetime import datetime
-from typing import List
+from typing import List, Optional, Tuple
 import multiprocessing
 
 # 导入其他模块
+# 分析、导出、线程池、搜索和正则测试对话框依赖 pandas、matplotlib、jinja2 等较重的模块，
+# 在首次使用时才导入，见各调用处
 from src.gui.file_panel import FilePanel
 from src.gui.config_panel import ConfigPanel
 from src.core.log_processor import LogProcessor
-from src.core.log_monitor import LogMonitor
+from src.core.file_handler import FileHandler
 from src.utils.tooltip import ToolTip
 from src.utils.config_manager import ConfigManager
-from src.utils.exporter import LogExporter
 from src.utils.recent_files import RecentFiles
-from src.gui.search_dialog import SearchDialog
-from src.utils.thread_pool import ThreadPoolManager
-from src.gui.regex_tester import RegexTester
-from src.core.log_analyzer import LogAnalyzer
+from src.utils.startup_timer import StartupTimer
+from src.gui.preview_worker import PreviewWorker
+from src.gui.virtual_preview import VirtualPreview
+from src.gui.line_gutter import LineGutter
+from src.core.preview_source import ListSource, PreviewSource, RingSource
+from src.core.bounded_queue import BoundedQueue, DROP_OLDEST
+from src.core.query import QueryError
 
 class LogFilterGUI(tk.Tk):
-    def __init__(self):
+    # 实时监控取出新内容并更新预览区的间隔（毫秒）
+    MONITOR_POLL_INTERVAL = 50
+    # 控制台消息队列最多积压的消息数，超出时丢弃最早的消息（进度结束等控制消息不丢弃）
+    MESSAGE_QUEUE_SIZE = 10000
+
+    def __init__(self, startup_timer: Optional[StartupTimer] = None):
+        """初始化主窗口
+
+        Args:
+            startup_timer: 启动计时器，由 main.py 在导入界面模块之前创建，
+                           未提供时从此处开始计时
+        """
+        self.startup_timer = startup_timer or StartupTimer()
         super().__init__()
+        self.startup_timer.mark("创建 Tk 根窗口")
         
         # 加载配置
         self.config_manager = ConfigManager()
@@ -40,14 +56,28 @@ class LogFilterGUI(tk.Tk):
         
         self.title("日志过滤工具")
         self.geometry(config.get('window_size', "1500x750"))
+        self.startup_timer.mark("加载配置和主题")
         
         # 初始化处理器和队列
-        self.log_processor = LogProcessor(self)
-        self.log_monitor = LogMonitor(self.on_log_update)
-        self.processing_queue = queue.Queue()
-        
-        # 初始化线程池
-        self.thread_pool = ThreadPoolManager(max_workers=multiprocessing.cpu_count())
+        self.log_processor = LogProcessor(self, cache_size=config.get('filter_cache_mb', 64) * 1024 * 1024)
+        self._log_monitor = None
+        self.processing_queue = BoundedQueue(
+            self.MESSAGE_QUEUE_SIZE, DROP_OLDEST,
+            weigh=lambda message: 0 if message[0] == 'progress_done' else 1
+        )
+        self._messages_dropped = 0
+        self.preview_worker = PreviewWorker(self)
+        # 预览最多显示的匹配行数，0 表示不限制
+        self.preview_limit = config.get('preview_limit', 50000)
+        # 实时监控在预览区保留的最新行数，更早的行被丢弃
+        self.monitor_buffer_lines = config.get('monitor_buffer_lines', 10000)
+        self._monitor_source: Optional[RingSource] = None
+        self._monitor_matcher = None
+        self._monitor_poll_id = None  # 等待执行的 _poll_monitor（after 返回的编号）
+        
+        # 线程池在第一次批量处理时创建
+        self._thread_pool = None
+        self.startup_timer.mark("初始化处理器")
         
         # 初始化颜色方案
         self.custom_colors = {
@@ -67,10 +97,56 @@ class LogFilterGUI(tk.Tk):
         # 创建主界面
         self._create_widgets()
         self._setup_bindings()
+        self.startup_timer.mark("创建界面部件")
         self.after(100, self.process_queue)
         
         # 窗口居中显示
         self.center_window()
+        # 空闲回调在第一帧绘制完成后执行
+        self.after_idle(self._report_startup_time)
+
+    @property
+    def log_monitor(self):
+        """文件监控器，第一次开启实时监控时创建（导入 watchdog）"""
+        if self._log_monitor is None:
+            from src.core.log_monitor import LogMonitor
+            config = self.config_manager.load_config()
+            # 新内容放入监控器的有界队列，由 _poll_monitor 在 Tk 线程中取出，
+            # 界面跟不上时按 monitor_overflow 策略丢弃，默认保留最新的内容
+            options = dict(
+                queue_lines=config.get('monitor_queue_lines', 100000),
+                overflow=config.get('monitor_overflow', DROP_OLDEST),
+                sample_rate=config.get('monitor_sample_rate', 10),
+                latency=config.get('monitor_latency_ms', 50) / 1000,
+                use_events=not config.get('monitor_polling', False),
+                on_error=self.log_error
+            )
+            try:
+                self._log_monitor = LogMonitor(**options)
+            except ValueError as e:
+                self.log_error(f"实时监控配置无效，使用默认设置: {e}")
+                options.update(queue_lines=100000, overflow=DROP_OLDEST, sample_rate=10)
+                self._log_monitor = LogMonitor(**options)
+        return self._log_monitor
+
+    @property
+    def thread_pool(self):
+        """批量处理使用的线程池，第一次使用时创建"""
+        if self._thread_pool is None:
+            from src.utils.thread_pool import ThreadPoolManager
+            self._thread_pool = ThreadPoolManager(max_workers=multiprocessing.cpu_count())
+        return self._thread_pool
+
+    def _report_startup_time(self):
+        """输出启动耗时，设置 LOGWATCH_STARTUP_TIMING 环境变量时输出逐阶段报告"""
+        timer = self.startup_timer
+        timer.mark("绘制第一帧")
+        self.log_info(timer.summary())
+        if timer.enabled:
+            report = timer.report()
+            print(report, file=sys.stderr)
+            for line in report.splitlines():
+                self.log_info(line)
 
     def toggle_live_preview(self):
         """处理实时预览切换"""
@@ -79,9 +155,8 @@ class LogFilterGUI(tk.Tk):
                 self.preview_filtered()
                 self._update_system_info("已开启实时预览")
             else:
-                self.dst_preview.config(state="normal")
-                self.dst_preview.delete("1.0", "end")
-                self.dst_preview.config(state="disabled")
+                self.preview_worker.cancel()
+                self.preview_view.clear()
                 self._update_system_info("已关闭实时预览")
 
     def _set_icon(self):
@@ -99,7 +174,7 @@ class LogFilterGUI(tk.Tk):
             self.log_error("请先选择要过滤的文件")
             return
 
-        output_path = self.current_file.parent / f"{self.current_file.stem}_filtered{self.current_file.suffix}"
+        output_path = self.current_file.parent / FileHandler.filtered_name(self.current_file)
         self.show_progress()
 
         def do_filter():
@@ -108,7 +183,6 @@ class LogFilterGUI(tk.Tk):
                 count_in, count_out = self.log_processor.filter_log(
                     self.current_file,
                     output_path,
-                    preview_mode=False,
                     **config
                 )
                 self.log_info(f"✅ 过滤完成")
@@ -245,6 +319,7 @@ class LogFilterGUI(tk.Tk):
         # 开始分析按钮
         def start_analysis():
             try:
+                from src.core.log_analyzer import LogAnalyzer
                 analyzer = LogAnalyzer()
                 
                 # 创建输出目录
@@ -332,6 +407,7 @@ class LogFilterGUI(tk.Tk):
 
     def show_regex_tester(self):
         """显示正则表达式测试工具"""
+        from src.gui.regex_tester import RegexTester
         RegexTester.show_dialog(self)
 
     def _build_preview_panel(self, parent):
@@ -362,23 +438,8 @@ class LogFilterGUI(tk.Tk):
         content_frame = ttkb.Frame(preview_frame)
         content_frame.pack(fill=BOTH, expand=True)
 
-        # 创建行号文本框
-        self.line_numbers = tk.Text(
-            content_frame,
-            width=6,
-            padx=3,
-            takefocus=0,
-            border=0,
-            background='#f0f0f0',
-            foreground='#606060',
-            wrap=NONE,
-            font=("Cascadia Code", 10)
-        )
-        self.line_numbers.pack(side=LEFT, fill=Y)
-
         # 创建预览文本框
         preview_container = ttkb.Frame(content_frame)
-        preview_container.pack(side=LEFT, fill=BOTH, expand=True)
 
         # 使用Text组件替换ScrolledText，手动添加滚动条
         self.dst_preview = tk.Text(
@@ -392,83 +453,55 @@ class LogFilterGUI(tk.Tk):
             undo=True,
             maxundo=0
         )
-        scrollbar = ttkb.Scrollbar(preview_container, command=self._on_preview_scroll)
+        scrollbar = ttkb.Scrollbar(preview_container)
         scrollbar.pack(side=RIGHT, fill=Y)
         
         self.dst_preview.pack(side=LEFT, fill=BOTH, expand=True)
-        self.dst_preview.configure(yscrollcommand=scrollbar.set)
-
-        # 禁用行号编辑
-        self.line_numbers.config(state='disabled')
-
-        # 绑定文本变化事件
-        self.dst_preview.bind('<<Modified>>', self._on_text_modified)
-        self.dst_preview.edit_modified(False)  # 重置修改标志
-
-    def _on_text_modified(self, event=None):
-        """处理文本变化事件"""
-        if self.dst_preview.edit_modified():
-            self._update_line_numbers()
-            self.dst_preview.edit_modified(False)  # 重置修改标志
-
-    def _on_preview_scroll(self, *args):
-        """同步滚动预览区域和行号"""
-        if len(args) > 0:
-            self.dst_preview.yview(*args)
-            self.line_numbers.yview(*args)
-
-    def _update_line_numbers(self, event=None):
-        """更新行号显示"""
-        if not hasattr(self, 'line_numbers'):
-            return
-            
-        # 获取总行数
-        text = self.dst_preview.get('1.0', 'end-1c')
-        line_count = text.count('\n') + 1
-        
-        # 更新行号文本
-        self.line_numbers.config(state='normal')
-        self.line_numbers.delete('1.0', 'end')
-        lines = '\n'.join(str(i).rjust(4) for i in range(1, line_count + 1))
-        self.line_numbers.insert('1.0', lines)
-        self.line_numbers.config(state='disabled')
-        
-        # 同步滚动位置
-        self.line_numbers.yview_moveto(self.dst_preview.yview()[0])
-
-    def _highlight_keywords(self, keywords, ignore_case=True):
-        """高亮关键字"""
-        if not keywords:
+
+        # 创建行号栏，只绘制预览区中可见行的行号
+        self.line_numbers = LineGutter(
+            content_frame,
+            self.dst_preview,
+            font=("Cascadia Code", 10),
+            background='#f0f0f0',
+            foreground='#606060'
+        )
+        self.line_numbers.pack(side=LEFT, fill=Y)
+        preview_container.pack(side=LEFT, fill=BOTH, expand=True)
+
+        # 预览区只绘制可见的行，滚动条和行号由 VirtualPreview 统一管理
+        self.preview_view = VirtualPreview(self.dst_preview, self.line_numbers, scrollbar,
+                                           on_render=self._highlight_visible)
+
+    def _highlight_keywords(self, matcher):
+        """设置高亮使用的匹配器并重新绘制预览区
+
+        Args:
+            matcher: 过滤时使用的 KeywordMatcher，保证高亮与过滤结果一致
+        """
+        self.preview_view.source.matcher = matcher
+        self.preview_view.render()
+
+    def _highlight_visible(self, top: int, lines: List[str]):
+        """高亮当前绘制的行（预览区每次重新绘制后调用）
+
+        命中位置由数据源随页缓存，这里按关键字分组，每个关键字只调用一次 tag_add。
+        结果行中可能含有还原的换行符，行列位置经 row_map 换算为 Text 索引。
+        """
+        source = self.preview_view.source
+        if not source.matcher:
             return
-            
-        # 移除现有的高亮标签
-        for tag in self.dst_preview.tag_names():
-            if tag.startswith("keyword_"):
-                self.dst_preview.tag_delete(tag)
-                
-        content = self.dst_preview.get("1.0", "end-1c")
-        
         # 为每个关键字创建不同的高亮颜色
         colors = ['#ffeb3b', '#ffa726', '#4caf50', '#03a9f4', '#e91e63']
-        
-        for i, keyword in enumerate(keywords):
-            color = colors[i % len(colors)]
-            tag_name = f"keyword_{i}"
-            self.dst_preview.tag_configure(tag_name, background=color)
-            
-            start = "1.0"
-            while True:
-                if ignore_case:
-                    pos = self.dst_preview.search(keyword, start, "end", nocase=True)
-                else:
-                    pos = self.dst_preview.search(keyword, start, "end")
-                    
-                if not pos:
-                    break
-                    
-                end = f"{pos}+{len(keyword)}c"
-                self.dst_preview.tag_add(tag_name, pos, end)
-                start = end
+        for i in range(len(source.matcher)):
+            self.dst_preview.tag_configure(f"keyword_{i}", background=colors[i % len(colors)])
+
+        row_map = self.preview_view.row_map
+        ranges = {}
+        for row, start, end, index in source.get_spans(top, top + len(lines)):
+            ranges.setdefault(index, []).extend((row_map.index(row, start), row_map.index(row, end)))
+        for index, indices in ranges.items():
+            self.dst_preview.tag_add(f"keyword_{index}", *indices)
 
     def _build_status_bar(self):
         """创建状态栏"""
@@ -499,6 +532,10 @@ class LogFilterGUI(tk.Tk):
         self.console.insert("1.0", "准备就绪...\n")
         self.console.config(state="disabled")
 
+        # 实时监控的状态（积压和丢弃的行数），监控时显示
+        self.monitor_status = ttkb.Label(status_frame, font=("Segoe UI", 9))
+        self._monitor_status_text = ''
+
     def _setup_bindings(self):
         """设置快捷键绑定"""
         self.bind("<Control-o>", lambda e: self.file_panel.load_directory())
@@ -583,13 +620,37 @@ class LogFilterGUI(tk.Tk):
             return
             
         config = self.config_panel.get_config()
-        # 直接使用从 config_panel 获取的配置，不需要重新映射参数名
-        self.log_processor.filter_log(
-            self.current_file,
-            None,  # 预览模式不需要输出文件
-            preview_mode=True,
-            **config
-        )
+        # 在后台线程中流式过滤，新的预览会取消尚未完成的旧预览
+        self.preview_worker.start(self.current_file, config, limit=self.preview_limit)
+
+    def begin_preview(self, matcher):
+        """清空预览区，准备接收新的流式预览结果"""
+        self.preview_view.set_source(ListSource(matcher=matcher))
+
+    def set_preview_source(self, source: PreviewSource):
+        """切换预览区的数据源（后台预览开始时由 PreviewWorker 调用）"""
+        self.preview_view.set_source(source)
+
+    def append_preview_lines(self, lines: List[str], offsets=None):
+        """向预览数据源追加一批过滤结果，只有可见区域受影响时才重新绘制
+
+        Args:
+            lines: 处理后的行
+            offsets: 这些行在文件中的起始字节偏移，有偏移时数据源只保存偏移
+        """
+        if not lines:
+            return
+        self.preview_view.source.append(lines, offsets)
+        self.preview_view.refresh()
+
+    def finish_preview(self, stats: dict):
+        """预览完成后更新统计信息"""
+        info = f"预览统计:\n读取: {stats['lines']} 行\n匹配: {stats['matched']} 行"
+        if stats.get('cached'):
+            info += "（缓存）"
+        if stats.get('truncated'):
+            info += f"\n显示前 {stats['shown']} 条，共 ≥{stats['matched']} 条"
+        self._update_system_info(info)
 
     def batch_process(self):
         """批量处理文件"""
@@ -611,11 +672,10 @@ class LogFilterGUI(tk.Tk):
         def process_file(file_path):
             """处理单个文件"""
             try:
-                output_path = output_dir / f"{file_path.stem}_filtered{file_path.suffix}"
+                output_path = output_dir / FileHandler.filtered_name(file_path)
                 return self.log_processor.filter_log(
                     file_path,
                     output_path,
-                    preview_mode=False,
                     **config
                 )
             except Exception as e:
@@ -678,8 +738,13 @@ class LogFilterGUI(tk.Tk):
 
     def process_queue(self):
         """处理消息队列"""
-        while not self.processing_queue.empty():
-            msg_type, msg = self.processing_queue.get()
+        messages = self.processing_queue.get_all()
+        dropped = self.processing_queue.dropped - self._messages_dropped
+        if dropped:
+            # 消息产生得比显示快时丢弃了较早的消息
+            self._messages_dropped += dropped
+            messages.insert(0, ('info', f"…… 省略了 {dropped} 条消息"))
+        for msg_type, msg in messages:
             if msg_type == 'progress_done':
                 self.stop_progress()
             else:
@@ -708,13 +773,15 @@ class LogFilterGUI(tk.Tk):
 
     def on_close(self):
         """窗口关闭处理"""
-        if self.thread_pool.is_running:
+        if self._thread_pool is not None and self._thread_pool.is_running:
             if not messagebox.askyesno("确认", "有正在进行的处理任务，确定要退出吗？"):
                 return
             self.thread_pool.shutdown(wait=False)
+        self.preview_worker.cancel()
         self._save_current_config()  # 保存配置
-        if self.log_monitor.is_monitoring:
+        if self._log_monitor is not None and self._log_monitor.is_monitoring:
             self.log_monitor.stop_monitoring()
+        self._cancel_monitor_poll()
         for widget in self.winfo_children():
             if isinstance(widget, tk.Toplevel):
                 widget.destroy()
@@ -722,20 +789,20 @@ class LogFilterGUI(tk.Tk):
 
     def _load_filter_config(self):
         """加载过滤器配置"""
-        filters = self.config_manager.get_value('filters', {})
-        if filters:
-            self.config_panel.keyword.delete(0, tk.END)
-            self.config_panel.keyword.insert(0, filters.get('keyword', '[CHAT]'))
-            
-            self.config_panel.filter_fields.delete(0, tk.END)
-            self.config_panel.filter_fields.insert(0, filters.get('filter_fields', ''))
-            
-            self.config_panel.ignore_case.set(filters.get('ignore_case', True))
-            self.config_panel.hide_fields.set(filters.get('hide_fields', True))
-            
-            self.config_panel.enc_in.set(filters.get('enc_in', 'ANSI'))
-            self.config_panel.enc_out.set(filters.get('enc_out', 'ANSI'))
-            
+        filters = self.config_manager.get_filter_config()
+        self.config_panel.keyword.delete(0, tk.END)
+        self.config_panel.keyword.insert(0, filters['keywords'])
+        
+        self.config_panel.filter_fields.delete(0, tk.END)
+        self.config_panel.filter_fields.insert(0, filters['filter_fields'])
+        
+        self.config_panel.ignore_case.set(filters['ignore_case'])
+        self.config_panel.hide_fields.set(filters['enable_field_filter'])
+        
+        self.config_panel.enc_in.set(filters['read_enc'])
+        self.config_panel.enc_out.set(filters['write_enc'])
+        self.config_panel.query_mode.set(filters['query_mode'])
+
     def _save_current_config(self):
         """保存当前配置"""
         # 保存窗口大小
@@ -751,13 +818,13 @@ class LogFilterGUI(tk.Tk):
     # 工具栏功能函数
     def switch_to_search(self):
         """切换到搜索模式"""
+        from src.gui.search_dialog import SearchDialog
         search_config = SearchDialog.show_dialog(self)
         if not search_config:
             return
             
         # 清空预览区域
-        self.dst_preview.config(state="normal")
-        self.dst_preview.delete("1.0", "end")
+        self.preview_view.clear()
         
         # 根据搜索范围获取文件列表
         files_to_search = []
@@ -766,8 +833,8 @@ class LogFilterGUI(tk.Tk):
         elif search_config['range'] == 'selected':
             files_to_search = self.file_panel.get_selected_files()
         elif search_config['range'] == 'all' and self.file_panel.current_dir:
-            files_to_search = list(self.file_panel.current_dir.glob('*.log')) + \
-                            list(self.file_panel.current_dir.glob('*.txt'))
+            files_to_search = sorted(f for f in self.file_panel.current_dir.iterdir()
+                                     if f.is_file() and FileHandler.is_log_file(f))
                             
         if not files_to_search:
             self.log_error("没有找到要搜索的文件")
@@ -783,22 +850,17 @@ class LogFilterGUI(tk.Tk):
         """执行搜索"""
         try:
             total_matches = 0
-            pattern = config['text']
-            if not config['use_regex']:
-                pattern = re.escape(pattern)
-            
-            flags = 0 if config['case_sensitive'] else re.IGNORECASE
-            regex = re.compile(pattern, flags)
-            
             for file in files:
                 try:
-                    with file.open('r', encoding='utf-8', errors='ignore') as f:
-                        for i, line in enumerate(f, 1):
-                            if regex.search(line):
-                                self.processing_queue.put(('info', 
-                                    f"[{file.name}:{i}] {line.strip()}"))
-                                total_matches += 1
+                    for i, line in self.log_processor.iter_search(
+                            file, config['text'], config['use_regex'], config['case_sensitive'],
+                            use_query=config.get('use_query', False)):
+                        self.processing_queue.put(('info', 
+                            f"[{file.name}:{i}] {line.strip()}"))
+                        total_matches += 1
                                 
+                except (re.error, QueryError):
+                    raise
                 except Exception as e:
                     self.log_error(f"处理文件 {file.name} 时出错: {e}")
                     
@@ -806,27 +868,117 @@ class LogFilterGUI(tk.Tk):
             
         except re.error as e:
             self.log_error(f"正则表达式错误: {e}")
+        except QueryError as e:
+            self.log_error(f"查询语法错误: {e}")
         except Exception as e:
             self.log_error(f"搜索过程出错: {e}")
         finally:
             self.processing_queue.put(('progress_done', None))
             
     def switch_to_monitor(self):
-        """切换到实时监控模式"""
-        if not hasattr(self, 'current_file'):
-            self.log_error("请先选择要监控的文件")
-            return
-            
-        if self.log_monitor.is_monitoring:
+        """切换到实时监控模式
+
+        选中了多个文件时同时监控这些文件，否则监控当前文件。
+        """
+        if self._log_monitor is not None and self._log_monitor.is_monitoring:
+            stats = self.log_monitor.get_stats()
             self.log_monitor.stop_monitoring()
-            self.log_info("停止监控")
+            self._cancel_monitor_poll()
+            self.log_info(f"停止监控（文件事件 {stats['events']} 个，合并 {stats['merged']} 个，"
+                          f"读取 {stats['reads']} 次共 {stats['bytes']} 字节，输出 {stats['lines']} 行，"
+                          f"丢弃 {stats['dropped']} 行）")
+            self._set_monitor_status('')
             # 更新工具栏按钮状态
             self.toolbar_buttons[1].configure(text="📡")
-        else:
-            self.log_monitor.start_monitoring(self.current_file)
-            self.log_info(f"开始监控: {self.current_file.name}")
-            # 更新工具栏按钮状态
-            self.toolbar_buttons[1].configure(text="⏹️")
+            return
+
+        targets = self.file_panel.get_selected_files()
+        if len(targets) < 2:
+            if not hasattr(self, 'current_file'):
+                self.log_error("请先选择要监控的文件")
+                return
+            targets = [self.current_file]
+        line_filter = self._monitor_line_filter()
+        if line_filter is None:
+            return
+
+        read_enc = self.config_panel.get_config()['read_enc']
+        self.log_monitor.start_monitoring([])
+        for path in targets:
+            encoding = FileHandler.detect_encoding(path) if read_enc == 'auto' else read_enc
+            try:
+                self.log_monitor.add_target(path, encoding, line_filter)
+            except LookupError:
+                self.log_monitor.stop_monitoring()
+                self.log_error(f"不支持的编码 '{encoding}'")
+                return
+        self._monitor_matcher = line_filter.matcher
+        self.log_info(f"开始监控: {', '.join(path.name for path in targets)}")
+        # 更新工具栏按钮状态
+        self.toolbar_buttons[1].configure(text="⏹️")
+        self._monitor_source = None
+        self._schedule_monitor_poll()
+
+    def _monitor_line_filter(self):
+        """按当前过滤配置获取实时监控使用的行过滤器，查询语法错误时返回 None"""
+        config = self.config_panel.get_config()
+        try:
+            return self.log_processor.get_line_filter(
+                config['keywords'],
+                config['ignore_case'],
+                config['filter_fields'],
+                config['enable_field_filter'],
+                config['query_mode']
+            )
+        except QueryError as e:
+            self.log_error(f"查询语法错误: {e}")
+            return None
+
+    def update_monitor_filter(self):
+        """过滤条件变化时更新实时监控的过滤器，之后新增的行按新条件过滤"""
+        if self._log_monitor is None or not self._log_monitor.is_monitoring:
+            return
+        line_filter = self._monitor_line_filter()
+        if line_filter is not None:
+            self._log_monitor.set_line_filter(line_filter)
+            self._monitor_matcher = line_filter.matcher
+
+    def _poll_monitor(self):
+        """Tk 线程：取出监控期间积累的新内容，每个周期只更新一次预览区"""
+        self._monitor_poll_id = None
+        if self._log_monitor is None or not self._log_monitor.is_monitoring:
+            return
+        updates = self._log_monitor.get_updates()
+        if updates:
+            self.on_log_update(updates)
+        stats = self._log_monitor.get_stats()
+        text = f"📡 实时监控 {stats['files']} 个文件，输出 {stats['lines']} 行"
+        if stats['dropped']:
+            text += f"，来不及显示丢弃 {stats['dropped']} 行"
+        self._set_monitor_status(text)
+        self._schedule_monitor_poll()
+
+    def _schedule_monitor_poll(self):
+        """安排下一次 _poll_monitor，已经安排过时不重复（快速停止再开始时只保留一个轮询）"""
+        if self._monitor_poll_id is None:
+            self._monitor_poll_id = self.after(self.MONITOR_POLL_INTERVAL, self._poll_monitor)
+
+    def _cancel_monitor_poll(self):
+        """取消尚未执行的 _poll_monitor"""
+        if self._monitor_poll_id is not None:
+            self.after_cancel(self._monitor_poll_id)
+            self._monitor_poll_id = None
+
+    def _set_monitor_status(self, text: str):
+        """更新状态栏中的实时监控状态，text 为空时隐藏"""
+        if text == self._monitor_status_text:
+            return
+        if not text:
+            self.monitor_status.pack_forget()
+        elif not self._monitor_status_text:
+            self.monitor_status.pack(anchor="w", padx=5, pady=(0, 2))
+        self._monitor_status_text = text
+        self.monitor_status.configure(text=text)
             
     def switch_to_settings(self):
         """切换到设置界面"""
@@ -876,54 +1028,29 @@ class LogFilterGUI(tk.Tk):
         y = (self.winfo_y() + (self.winfo_height() - settings_window.winfo_height()) // 2)
         settings_window.geometry(f"+{x}+{y}")
             
-    def on_log_update(self, new_content: str):
-        """处理新的日志内容"""
-        config = self.config_panel.get_config()
-        keywords = [k.strip() for k in config['keyword'].split('|') if k.strip()]
-        
-        # 应用过滤条件
-        if keywords:
-            lines = new_content.splitlines()
-            filtered_lines = []
-            for line in lines:
-                if any(k.lower() in line.lower() if config['ignore_case'] else k in line 
-                      for k in keywords):
-                    if config['hide_fields'] and config['filter_fields']:
-                        # 应用字段过滤
-                        fields = [f.strip() for f in config['filter_fields'].split('|')]
-                        for field in fields:
-                            if config['ignore_case']:
-                                field_pattern = field.lower()
-                                line_lower = line.lower()
-                                if field_pattern in line_lower:
-                                    start_idx = line_lower.find(field_pattern)
-                                    if start_idx >= 0:
-                                        end_idx = start_idx + len(field)
-                                        while end_idx < len(line) and line[end_idx] in ' :|\t':
-                                            end_idx += 1
-                                        line = line[:start_idx] + line[end_idx:]
-                            else:
-                                if field in line:
-                                    start_idx = line.find(field)
-                                    if start_idx >= 0:
-                                        end_idx = start_idx + len(field)
-                                        while end_idx < len(line) and line[end_idx] in ' :|\t':
-                                            end_idx += 1
-                                        line = line[:start_idx] + line[end_idx:]
-                    filtered_lines.append(line)
-            
-            if filtered_lines:
-                self.dst_preview.config(state="normal")
-                for line in filtered_lines:
-                    self.dst_preview.insert("end", line + "\n")
-                self.dst_preview.see("end")
-                self.dst_preview.config(state="disabled")
-        else:
-            # 没有关键字时显示所有新内容
-            self.dst_preview.config(state="normal")
-            self.dst_preview.insert("end", new_content)
-            self.dst_preview.see("end")
-            self.dst_preview.config(state="disabled")
+    def on_log_update(self, updates: List[Tuple[Path, List[str]]]):
+        """处理新的日志内容（Tk 线程）
+
+        监控器已按过滤条件过滤，这里把各文件的行追加到只保留最新 monitor_buffer_lines 行的
+        数据源，同时监控多个文件时在行首标明来源文件。
+        预览区显示最后一行时保持跟随，向上滚动查看时不会被新内容打断。
+        """
+        show_name = len(self.log_monitor.files) > 1
+        new_lines = []
+        for path, lines in updates:
+            if show_name:
+                new_lines.extend(f"[{path.name}] {line}" for line in lines)
+            else:
+                new_lines.extend(lines)
+
+        source = self._monitor_source
+        if source is None or self.preview_view.source is not source:
+            # 第一次收到内容，或预览区已被其他内容替换时，切换到监控的数据源
+            source = self._monitor_source = RingSource(self.monitor_buffer_lines)
+            self.preview_view.set_source(source)
+            self.preview_view.see_end()
+        source.matcher = self._monitor_matcher
+        self.preview_view.append(new_lines)
 
     def show_help(self):
         """显示帮助文档"""
@@ -944,7 +1071,7 @@ class LogFilterGUI(tk.Tk):
 
 1. 文件管理
    - 点击"打开目录"选择日志文件所在目录
-   - 支持.log和.txt格式的文件
+   - 支持.log和.txt格式的文件，以及 gzip/bz2/xz 压缩的日志（如 .log.gz），无需先解压
    - 可以选择多个文件进行批量处理
 
 2. 过滤配置
@@ -1087,9 +1214,9 @@ https://github.com/CatStack-pixe/LogWatcher
         def do_export():
             """执行导出操作"""
             try:
-                # 获取文本内容
-                content = self.dst_preview.get("1.0", "end-1c")
-                lines = content.split('\n')
+                # 获取全部预览内容（预览区只绘制了可见的行）
+                lines = list(self.preview_view.source.iter_lines())
+                content = '\n'.join(lines)
                 
                 # 根据选择的格式确定文件扩展名
                 format_type = format_var.get()
@@ -1101,10 +1228,11 @@ https://github.com/CatStack-pixe/LogWatcher
                 }
                 
                 # 构造输出文件名
-                base_name = self.current_file.stem
-                output_path = self.current_file.parent / f"{base_name}_filtered{extensions[format_type]}"
+                output_path = self.current_file.parent / FileHandler.filtered_name(
+                    self.current_file, extensions[format_type])
                 
                 # 导出
+                from src.utils.exporter import LogExporter
                 success = False
                 if format_type == 'txt':
                     success = LogExporter.export_text(content, output_path)
@@ -1259,25 +1387,6 @@ https://github.com/CatStack-pixe/LogWatcher
         if self.config_panel.live_preview.get():
             self.preview_filtered()
 
-    def update_preview_content(self, content: str):
-        """更新预览区域的内容"""
-        if hasattr(self, 'dst_preview'):
-            self.dst_preview.config(state="normal")
-            self.dst_preview.delete("1.0", "end")
-            self.dst_preview.insert("1.0", content)
-            self.dst_preview.config(state="disabled")
-            
-            # 更新行号
-            self.line_numbers.config(state="normal")
-            self.line_numbers.delete("1.0", "end")
-            lines = content.split('\n')
-            line_numbers = '\n'.join(f"{i+1:4d}" for i in range(len(lines)))
-            self.line_numbers.insert("1.0", line_numbers)
-            self.line_numbers.config(state="disabled")
-            
-            # 同步滚动位置
-            self.dst_preview.yview_moveto(0)
-
     def update_stats(self, count_in: int, count_out: int):
         """更新预览统计信息"""
         # 计算匹配率
@@ -0,0 +1,146 @@
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from src.core.query import QueryError
+
+
+class PreviewWorker:
+    """后台流式预览
+
+    过滤在唯一的工作线程中进行，结果分批放入队列，由 Tk 线程通过 after 定时取出绘制，
+    界面在扫描大文件时保持响应。待执行的请求只保留最新的一个：每次 start 都会
+    取消正在进行的预览并替换尚未开始的请求，过期任务已经放入队列的结果
+    按任务编号（generation）丢弃，不会画到预览区。
+    """
+
+    # 轮询结果队列的间隔（毫秒）
+    POLL_INTERVAL = 20
+    # 每次轮询最多占用 Tk 线程的时间（秒）
+    POLL_BUDGET = 0.03
+
+    def __init__(self, app):
+        """初始化预览任务
+
+        Args:
+            app: 主窗口，需要提供 log_processor、after、begin_preview、set_preview_source、
+                 append_preview_lines、finish_preview 和 log_error
+        """
+        self.app = app
+        self.queue = queue.Queue()
+        self._generation = 0
+        self._cancel_event: Optional[threading.Event] = None
+        self._condition = threading.Condition()
+        self._request: Optional[Tuple] = None  # 等待执行的最新请求
+        self._busy = False
+        self._thread: Optional[threading.Thread] = None
+        self._polling = False
+
+    @property
+    def is_running(self) -> bool:
+        """是否有正在进行或等待执行的预览"""
+        with self._condition:
+            return self._busy or self._request is not None
+
+    def start(self, input_path: Path, config: Dict[str, Any], limit: Optional[int] = None):
+        """开始新的预览，取消正在进行的预览
+
+        Args:
+            input_path: 预览的文件
+            config: ConfigPanel.get_config() 返回的过滤配置
+            limit: 最多显示的匹配行数，None 或 0 表示不限制
+        """
+        self.cancel()
+        try:
+            matcher = self.app.log_processor.get_matcher(
+                config['keywords'], config['ignore_case'], config.get('query_mode', False))
+        except QueryError as e:
+            # 查询输入到一半时经常不完整，只提示错误，保留上一次的预览
+            self.app.log_error(f"查询语法错误: {e}")
+            return
+        self.app.begin_preview(matcher)
+
+        with self._condition:
+            self._generation += 1
+            self._cancel_event = threading.Event()
+            self._request = (self._generation, self._cancel_event, input_path, config, limit or None)
+            self._condition.notify()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="preview-worker", daemon=True)
+            self._thread.start()
+        if not self._polling:
+            self._polling = True
+            self.app.after(self.POLL_INTERVAL, self._poll)
+
+    def cancel(self):
+        """取消正在进行的预览，并丢弃尚未开始的请求"""
+        with self._condition:
+            if self._cancel_event is not None:
+                self._cancel_event.set()
+                self._cancel_event = None
+            self._request = None
+            # 使已经放入队列的结果全部过期
+            self._generation += 1
+
+    def _loop(self):
+        """工作线程主循环：每次只取最新的请求执行"""
+        while True:
+            with self._condition:
+                while self._request is None:
+                    self._condition.wait()
+                request = self._request
+                self._request = None
+                self._busy = True
+            try:
+                self._run(*request)
+            finally:
+                with self._condition:
+                    self._busy = False
+
+    def _run(self, generation: int, cancel_event: threading.Event,
+             input_path: Path, config: Dict[str, Any], limit: Optional[int]):
+        """工作线程：逐批过滤并放入结果队列"""
+        if cancel_event.is_set():
+            return
+        stats: Dict[str, Any] = {}
+        try:
+            # 数据源只保存匹配行的偏移，预览区按需读取可见的行
+            source = self.app.log_processor.preview_source(input_path, **config)
+            self.queue.put((generation, 'source', source))
+            for batch in self.app.log_processor.iter_preview(
+                    input_path, limit=limit, cancel_event=cancel_event, stats=stats,
+                    with_offsets=True, **dict(config, read_enc=source.read_enc)):
+                self.queue.put((generation, 'batch', batch))
+        except LookupError:
+            self.queue.put((generation, 'error', f"不支持的编码 '{config.get('read_enc')}'"))
+        except Exception as e:
+            self.queue.put((generation, 'error', f"预览出错 {input_path.name}: {e}"))
+        else:
+            if not cancel_event.is_set():
+                self.queue.put((generation, 'done', dict(stats)))
+
+    def _poll(self):
+        """Tk 线程：取出结果并绘制，超出时间预算的部分留到下一次"""
+        deadline = time.perf_counter() + self.POLL_BUDGET
+        while time.perf_counter() < deadline:
+            try:
+                generation, kind, payload = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._generation:
+                continue
+            if kind == 'source':
+                self.app.set_preview_source(payload)
+            elif kind == 'batch':
+                self.app.append_preview_lines(*payload)
+            elif kind == 'done':
+                self.app.finish_preview(payload)
+            else:
+                self.app.log_error(payload)
+
+        if self.is_running or not self.queue.empty():
+            self.app.after(self.POLL_INTERVAL, self._poll)
+        else:
+            self._polling = False
@@ -46,6 +46,12 @@ class SearchDialog:
                         variable=self.use_regex).grid(row=2, column=0,
                         columnspan=2, sticky="w", pady=5)
         
+        # 使用查询语法
+        self.use_query = ttkb.BooleanVar()
+        ttkb.Checkbutton(search_frame, text="使用查询语法（AND/OR/NOT、re:、level:、time:、logger:）",
+                        variable=self.use_query).grid(row=3, column=0,
+                        columnspan=2, sticky="w", pady=5)
+        
         # 搜索范围
         range_frame = ttkb.Labelframe(self.dialog, text="搜索范围", padding=10)
         range_frame.pack(fill="x", padx=10, pady=5)
@@ -85,6 +91,7 @@ class SearchDialog:
             'text': self.search_text.get(),
             'case_sensitive': self.case_sensitive.get(),
             'use_regex': self.use_regex.get(),
+            'use_query': self.use_query.get(),
             'range': self.search_range.get()
         }
         self.dialog.destroy()
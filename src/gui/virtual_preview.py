@@ -0,0 +1,176 @@
+import tkinter as tk
+import tkinter.font as tkfont
+from typing import Callable, List, Optional
+
+from src.core.preview_source import ListSource, PreviewSource, RowMap
+from src.gui.line_gutter import LineGutter
+
+
+class VirtualPreview:
+    """只绘制可见行的预览区
+
+    预览内容保存在数据源（PreviewSource）中，Text 组件里只有当前窗口可见的几十行
+    和少量余量。滚动条、鼠标滚轮和翻页键都由这里换算成第一行的行号后重新绘制，
+    绘制代价只与窗口高度有关，与结果总行数无关。含有换行符的结果行占 Text 中的多行，
+    绘制内容中的位置通过 row_map 换算为 Text 索引。
+    """
+
+    # 可见行之外多绘制的行数，自动换行或窗口高度不是整行时最后一行也能完整显示
+    MARGIN = 5
+
+    def __init__(self,
+                 text: tk.Text,
+                 gutter: LineGutter,
+                 scrollbar,
+                 on_render: Optional[Callable[[int, List[str]], None]] = None):
+        """初始化预览区
+
+        Args:
+            text: 显示内容的 Text 组件
+            gutter: 行号栏
+            scrollbar: 纵向滚动条
+            on_render: 每次绘制后的回调，参数为第一行的行号（从 0 开始）和绘制的行
+        """
+        self.text = text
+        self.gutter = gutter
+        self.scrollbar = scrollbar
+        self.on_render = on_render
+        self.source: PreviewSource = ListSource()
+        self.top = 0  # 窗口第一行在数据源中的行号
+        self.follow = False  # 追加内容时是否保持显示最后一行
+        self._drawn = (0, 0)  # 上次绘制的 [起始行, 结束行)
+        self.row_map = RowMap([])  # 上次绘制的结果行与 Text 行的对应关系
+        self._dropped = 0  # 上次绘制时数据源已丢弃的行数
+        self._render_pending = False
+        self._line_height = max(tkfont.Font(font=text.cget('font')).metrics('linespace'), 1)
+
+        scrollbar.configure(command=self.yview)
+        text.configure(yscrollcommand='')
+        for widget in (text, gutter):
+            widget.bind('<MouseWheel>', self._on_mousewheel)
+            widget.bind('<Button-4>', lambda e: self._scroll_by(-3))
+            widget.bind('<Button-5>', lambda e: self._scroll_by(3))
+        text.bind('<Configure>', lambda e: self.schedule_render(), add='+')
+        text.bind('<Prior>', lambda e: self._scroll_by(-self.visible_rows))
+        text.bind('<Next>', lambda e: self._scroll_by(self.visible_rows))
+        text.bind('<Up>', lambda e: self._scroll_by(-1))
+        text.bind('<Down>', lambda e: self._scroll_by(1))
+        text.bind('<Control-Home>', lambda e: self._scroll_to(0))
+        text.bind('<Control-End>', lambda e: self.see_end())
+
+    @property
+    def visible_rows(self) -> int:
+        """窗口能显示的行数"""
+        return max(self.text.winfo_height() // self._line_height, 1)
+
+    def set_source(self, source: PreviewSource):
+        """切换数据源并回到第一行"""
+        self.source = source
+        self.top = 0
+        self.follow = False
+        self._dropped = source.dropped
+        self.render()
+
+    def clear(self):
+        """清空预览区"""
+        self.set_source(ListSource())
+
+    def append(self, lines: List[str]):
+        """在末尾追加文本行（实时监控），显示最后一行时保持跟随"""
+        self.source.append(lines)
+        self.refresh()
+
+    def refresh(self):
+        """数据源追加了内容：可见窗口受影响或正在跟随末尾时重绘，否则只更新滚动条
+
+        数据源丢弃了开头的行时窗口随之上移，继续显示原来的内容。
+        """
+        shift = self.source.dropped - self._dropped
+        self._dropped = self.source.dropped
+        if self.follow:
+            self.top = self._max_top()
+        elif shift:
+            self.top = max(self.top - shift, 0)
+        start, stop = self._drawn
+        if self.follow or shift or stop - start < self.visible_rows + self.MARGIN:
+            self.schedule_render()
+        else:
+            self._update_scrollbar()
+
+    def schedule_render(self):
+        """在空闲时重绘，连续的多次追加只绘制一次"""
+        if not self._render_pending:
+            self._render_pending = True
+            self.text.after_idle(self.render)
+
+    def render(self):
+        """绘制当前窗口"""
+        self._render_pending = False
+        self.top = min(self.top, self._max_top())
+        lines = self.source.get_lines(self.top, self.top + self.visible_rows + self.MARGIN)
+        self._drawn = (self.top, self.top + len(lines))
+        self.row_map = RowMap(lines)
+
+        self.text.config(state='normal')
+        self.text.delete('1.0', 'end')
+        self.text.insert('1.0', '\n'.join(lines))
+        self.text.config(state='disabled')
+        self.text.yview_moveto(0)
+
+        self.gutter.show(self.source.dropped + self.top + 1, len(lines), self.row_map.starts)
+
+        self._update_scrollbar()
+        if self.on_render:
+            self.on_render(self.top, lines)
+
+    def _max_top(self) -> int:
+        """最后一页的第一行：末尾的结果行含有换行符时占多行，最后一行仍要完整显示"""
+        total = len(self.source)
+        visible = self.visible_rows
+        count = 0
+        used = 0
+        for line in reversed(self.source.get_lines(max(total - visible, 0), total)):
+            used += line.count('\n') + 1
+            if used > visible and count:
+                break
+            count += 1
+        return total - count
+
+    def _update_scrollbar(self):
+        total = len(self.source)
+        if total <= self.visible_rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.top / total, min((self.top + self.visible_rows) / total, 1.0))
+
+    def _scroll_to(self, top: int) -> str:
+        top = min(max(top, 0), self._max_top())
+        self.follow = top >= self._max_top() and len(self.source) > self.visible_rows
+        if top != self.top:
+            self.top = top
+            self.render()
+        return 'break'
+
+    def _scroll_by(self, rows: int) -> str:
+        return self._scroll_to(self.top + rows)
+
+    def _on_mousewheel(self, event) -> str:
+        # Windows 每格为 120，macOS 为 1
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self._scroll_by(-delta * 3)
+
+    def see_end(self) -> str:
+        """滚动到最后一行并保持跟随"""
+        self._scroll_to(self._max_top())
+        self.follow = True
+        return 'break'
+
+    def yview(self, *args):
+        """滚动条命令：('moveto', 比例) 或 ('scroll', 数量, 'units'|'pages')"""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self._scroll_to(int(float(args[1]) * len(self.source)))
+        elif args[0] == 'scroll':
+            step = self.visible_rows if args[2] == 'pages' else 1
+            self._scroll_by(int(args[1]) * step)
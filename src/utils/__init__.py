@@ -1,7 +1,23 @@
-"""LogWatch 工具模块"""
-from .tooltip import ToolTip
-from .config_manager import ConfigManager
-from .recent_files import RecentFiles
-from .exporter import LogExporter
+"""LogWatch 工具模块
 
-__all__ = ['ToolTip', 'ConfigManager', 'RecentFiles', 'LogExporter']
\ No newline at end of file
+子模块在首次访问时才导入，避免导入 ConfigManager 时连带加载 pandas、tkinter 等依赖。
+"""
+import importlib
+
+_EXPORTS = {
+    'ToolTip': '.tooltip',
+    'ConfigManager': '.config_manager',
+    'RecentFiles': '.recent_files',
+    'LogExporter': '.exporter',
+    'StartupTimer': '.startup_timer',
+}
+
+__all__ = ['ToolTip', 'ConfigManager', 'RecentFiles', 'LogExporter', 'StartupTimer']
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
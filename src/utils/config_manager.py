@@ -1,6 +1,6 @@
 import json
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 class ConfigManager:
     """配置管理类，用于保存和加载用户配置"""
@@ -12,15 +12,26 @@ class ConfigManager:
             'theme': 'litera',
             'window_size': '1500x750',
             'last_directory': str(Path.home()),
+            'preview_limit': 50000,  # 预览最多显示的匹配行数，0 表示不限制
+            'monitor_buffer_lines': 10000,  # 实时监控在预览区保留的最新行数
+            'monitor_latency_ms': 50,  # 实时监控合并文件事件的延迟（毫秒）
+            'monitor_polling': False,  # 实时监控只轮询，不使用文件系统事件（网络共享目录等）
+            'monitor_queue_lines': 100000,  # 实时监控等待显示的最多行数
+            'monitor_overflow': 'drop_oldest',  # 等待显示的行超出上限时：block / drop_oldest / sample
+            'monitor_sample_rate': 10,  # sample 策略下每多少行保留一行
+            'filter_cache_mb': 64,  # 过滤结果缓存的内存预算（MB），0 表示禁用
             'filters': {
                 'keyword': '[CHAT]',
                 'filter_fields': '[Render thread/INFO] [net.minecraft.client.gui.components.ChatComponent/]:',
                 'ignore_case': True,
                 'hide_fields': True,
                 'enc_in': 'ANSI',
-                'enc_out': 'ANSI'
+                'enc_out': 'ANSI',
+                'query_mode': False  # 关键字是否按查询语法解析
             }
         }
+        # 已加载的配置，避免每次读取配置项都重新解析文件
+        self._config: Optional[Dict[str, Any]] = None
         self._ensure_config_dir()
         
     def _ensure_config_dir(self):
@@ -29,12 +40,21 @@ class ConfigManager:
         if not self.config_file.exists():
             self.save_config(self.default_config)
             
-    def load_config(self) -> Dict[str, Any]:
-        """加载配置"""
+    def load_config(self, reload: bool = False) -> Dict[str, Any]:
+        """加载配置
+
+        配置文件只在第一次调用时读取，之后返回内存中的配置，save_config 会同步更新。
+
+        Args:
+            reload: 为真时重新读取配置文件
+        """
+        if self._config is not None and not reload:
+            return self._config
         try:
             if self.config_file.exists():
                 with self.config_file.open('r', encoding='utf-8') as f:
-                    return json.load(f)
+                    self._config = json.load(f)
+                return self._config
             return self.default_config
         except Exception as e:
             print(f"加载配置失败: {e}")
@@ -45,6 +65,7 @@ class ConfigManager:
         try:
             with self.config_file.open('w', encoding='utf-8') as f:
                 json.dump(config, f, ensure_ascii=False, indent=4)
+            self._config = config
             return True
         except Exception as e:
             print(f"保存配置失败: {e}")
@@ -77,4 +98,21 @@ class ConfigManager:
                     return default
                 current = current[part]
             return current
-        return config.get(key, default)
\ No newline at end of file
+        return config.get(key, default)
+
+    def get_filter_config(self) -> Dict[str, Any]:
+        """获取过滤配置，键名与 ConfigPanel.get_config() 一致
+
+        兼容旧版本保存的键名（keyword、hide_fields、enc_in、enc_out）。
+        """
+        filters = self.get_value('filters', {}) or {}
+        defaults = self.default_config['filters']
+        return {
+            'keywords': filters.get('keywords', filters.get('keyword', defaults['keyword'])),
+            'filter_fields': filters.get('filter_fields', defaults['filter_fields']),
+            'ignore_case': filters.get('ignore_case', defaults['ignore_case']),
+            'enable_field_filter': filters.get('enable_field_filter', filters.get('hide_fields', defaults['hide_fields'])),
+            'read_enc': filters.get('read_enc', filters.get('enc_in', defaults['enc_in'])),
+            'write_enc': filters.get('write_enc', filters.get('enc_out', defaults['enc_out'])),
+            'query_mode': filters.get('query_mode', defaults['query_mode'])
+        }
@@ -0,0 +1,42 @@
+import os
+import time
+from typing import List, Tuple
+
+# 设置该环境变量后输出逐阶段的启动耗时报告
+TIMING_ENV = 'LOGWATCH_STARTUP_TIMING'
+
+
+class StartupTimer:
+    """记录程序启动各阶段的耗时"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._last = self.start
+        self.stages: List[Tuple[str, float, float]] = []  # (阶段, 阶段耗时, 累计耗时)，单位秒
+
+    @property
+    def enabled(self) -> bool:
+        """是否需要输出详细报告"""
+        return bool(os.environ.get(TIMING_ENV))
+
+    @property
+    def total(self) -> float:
+        """到最后一个阶段为止的总耗时（秒）"""
+        return self._last - self.start
+
+    def mark(self, stage: str):
+        """记录从上一个阶段结束到现在的耗时"""
+        now = time.perf_counter()
+        self.stages.append((stage, now - self._last, now - self.start))
+        self._last = now
+
+    def summary(self) -> str:
+        """一行启动耗时摘要"""
+        return f"启动耗时 {self.total:.2f}s"
+
+    def report(self) -> str:
+        """格式与 python -X importtime 类似的逐阶段报告"""
+        lines = ["启动耗时 | 阶段耗时 (ms) | 累计 (ms) | 阶段"]
+        for stage, elapsed, cumulative in self.stages:
+            lines.append(f"启动耗时 | {elapsed * 1000:12.1f} | {cumulative * 1000:9.1f} | {stage}")
+        return '\n'.join(lines)
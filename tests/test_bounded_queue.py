@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from src.core.bounded_queue import BoundedQueue
+
+
+def _line_queue(capacity, policy, sample_rate=10):
+    """与 LogMonitor 相同：条目为 (来源, 行列表)，权重为行数"""
+    return BoundedQueue(capacity, policy, sample_rate,
+                        weigh=lambda batch: len(batch[1]),
+                        thin=lambda batch, start, step: (batch[0], batch[1][start::step]))
+
+
+def test_sample_keeps_one_line_in_n_inside_batches():
+    queue = _line_queue(200, 'sample', sample_rate=10)
+    for i in range(200):
+        assert queue.put(('a', [-1]))
+    # 队列已满后到达的 1000 行分成大小不一的批次，按行而不是按批抽样
+    lines = list(range(1000))
+    for size in (1, 7, 250, 3, 500, 239):
+        queue.put(('a', lines[:size]))
+        lines = lines[size:]
+    kept = [line for _, batch in queue.get_all() for line in batch if line >= 0]
+    assert kept == list(range(0, 1000, 10))
+    # 未被抽中的 900 行，加上为抽中的 100 行腾出空间丢弃的最早 100 行
+    assert queue.dropped == 900 + 100
+
+
+def test_sample_keeps_part_of_a_single_large_batch():
+    queue = _line_queue(10, 'sample', sample_rate=4)
+    queue.put(('a', ['x'] * 10))
+    assert queue.put(('a', list(range(8))))
+    assert queue.get_all() == [('a', [0, 4])]
+    assert queue.dropped == 10 + 6
+
+
+def test_drop_oldest_stays_within_capacity():
+    queue = _line_queue(10, 'drop_oldest')
+    for i in range(10):
+        queue.put(('a', [i] * 3))
+    assert len(queue) <= 10
+    assert queue.peak <= 10
+    assert queue.dropped == 30 - len(queue)
+    assert queue.get_all()[-1] == ('a', [9] * 3)
+
+
+def test_zero_weight_items_are_never_dropped():
+    queue = BoundedQueue(3, 'drop_oldest', weigh=lambda message: 0 if message == 'done' else 1)
+    queue.put('done')
+    for i in range(10):
+        queue.put(i)
+    assert queue.get_all() == ['done', 7, 8, 9]
+
+
+def test_block_waits_for_room_and_close_releases_producer():
+    queue = BoundedQueue(2, 'block')
+    queue.put(1)
+    queue.put(2)
+    assert queue.put(3, timeout=0.01) is False
+
+    results = []
+    producer = threading.Thread(target=lambda: results.append(queue.put(4)))
+    producer.start()
+    assert queue.get_all() == [1, 2]
+    producer.join(1)
+    assert results == [True]
+
+    queue.put(5)
+    producer = threading.Thread(target=lambda: results.append(queue.put(6)))
+    producer.start()
+    queue.close()
+    producer.join(1)
+    assert results == [True, False]
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        BoundedQueue(1, 'newest')
@@ -0,0 +1,35 @@
+from src.cli import main
+
+
+def _search(tmp_path, capsys, content, *options):
+    path = tmp_path / 'test.log'
+    path.write_bytes(content)
+    status = main(['search', *options, 'HIT', str(path)])
+    return status, capsys.readouterr().out.splitlines()
+
+
+def test_context_marks_adjacent_matches(tmp_path, capsys):
+    status, lines = _search(tmp_path, capsys, b'x HIT\ny HIT\nz\n', '-C', '1')
+    assert status == 0
+    assert lines == ['1:x HIT', '2:y HIT', '3-z']
+
+
+def test_context_marks_match_inside_previous_context(tmp_path, capsys):
+    _, lines = _search(tmp_path, capsys, b'HIT\na\nHIT\nb\nc\nd\ne\nHIT\n', '-C', '2')
+    assert lines == ['1:HIT', '2-a', '3:HIT', '4-b', '5-c', '6-d', '7-e', '8:HIT']
+
+
+def test_context_separates_distant_groups(tmp_path, capsys):
+    _, lines = _search(tmp_path, capsys, b'HIT\na\nb\nc\nHIT\n', '-C', '1')
+    assert lines == ['1:HIT', '2-a', '--', '4-c', '5:HIT']
+
+
+def test_context_respects_max_count(tmp_path, capsys):
+    _, lines = _search(tmp_path, capsys, b'HIT\nHIT\na\nHIT\n', '-C', '1', '-m', '2')
+    assert lines == ['1:HIT', '2:HIT', '3-a']
+
+
+def test_no_match(tmp_path, capsys):
+    status, lines = _search(tmp_path, capsys, b'a\nb\n', '-C', '1')
+    assert status == 1
+    assert lines == []
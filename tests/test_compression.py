@@ -0,0 +1,72 @@
+import gzip
+import io
+import random
+
+import pytest
+
+from src.core import compression
+from src.core.compression import _ParallelGzipRaw, compressed_position, open_compressed
+
+
+def _members(seed=1, count=40):
+    """多个 gzip 成员拼接成的文件内容，部分成员的压缩数据中含有成员头魔数"""
+    rng = random.Random(seed)
+    fake = gzip.compress(b'not a member of this file\n', mtime=0)
+    parts = []
+    for i in range(count):
+        lines = b''.join(b'%d %d %s\n' % (i, n, b'x' * rng.randrange(0, 200)) for n in range(rng.randrange(1, 300)))
+        if i % 3 == 0:
+            # 不压缩的成员原样保存数据，其中完整的 gzip 成员能通过候选位置的试解压验证
+            parts.append(gzip.compress(lines + fake + b'\x1f\x8b\x08\x00' + lines, compresslevel=0, mtime=0))
+        else:
+            parts.append(gzip.compress(lines, mtime=0))
+    return b''.join(parts)
+
+
+def _read_all(raw, size=4096):
+    with io.BufferedReader(raw, size) as stream:
+        chunks = []
+        while True:
+            chunk = stream.read(size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return b''.join(chunks)
+
+
+@pytest.mark.parametrize('range_size', [1000, 4096, 65536, 10 ** 9])
+@pytest.mark.parametrize('workers', [2, 5])
+def test_parallel_gzip_matches_gzip_module(tmp_path, range_size, workers):
+    data = _members()
+    path = tmp_path / 'app.log.gz'
+    path.write_bytes(data)
+    assert _read_all(_ParallelGzipRaw(path, workers, range_size)) == gzip.decompress(data)
+
+
+def test_parallel_gzip_single_member_and_trailing_padding(tmp_path):
+    content = b''.join(b'line %d\n' % i for i in range(20000))
+    path = tmp_path / 'app.log.gz'
+    path.write_bytes(gzip.compress(content) + gzip.compress(b'tail\n') + b'\x00' * 100)
+    assert _read_all(_ParallelGzipRaw(path, 4, 1000)) == content + b'tail\n'
+
+
+def test_parallel_gzip_truncated_file(tmp_path):
+    data = _members(count=5)
+    path = tmp_path / 'app.log.gz'
+    path.write_bytes(data[:-20])
+    with pytest.raises((EOFError, OSError)):
+        _read_all(_ParallelGzipRaw(path, 3, 1000))
+
+
+def test_open_compressed_uses_parallel_reader(tmp_path, monkeypatch):
+    monkeypatch.setattr(compression, 'PARALLEL_GZIP_SIZE', 1000)
+    data = _members(seed=2, count=10)
+    path = tmp_path / 'app.log.gz'
+    path.write_bytes(data)
+    with open_compressed(path, 'gzip', workers=3) as stream:
+        assert isinstance(stream.raw, _ParallelGzipRaw)
+        assert stream.read() == gzip.decompress(data)
+        assert compressed_position(stream, 0) == len(data)
+    with open_compressed(path, 'gzip', workers=1) as stream:
+        assert not isinstance(stream.raw, _ParallelGzipRaw)
+        assert stream.read() == gzip.decompress(data)
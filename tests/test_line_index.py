@@ -0,0 +1,112 @@
+import random
+import sys
+
+import pytest
+
+from src.core import line_index
+from src.core.line_index import LineIndex, _newline_checkpoints
+
+
+def _line_starts(data):
+    """逐字节扫描得到每一行的起始偏移（末尾没有换行符的最后一行也计入）"""
+    starts = [0] + [i + 1 for i, byte in enumerate(data) if byte == 10]
+    if starts[-1] == len(data):
+        starts.pop()
+    return starts or [0]
+
+
+def _sample_data(seed=1, lines=500):
+    rng = random.Random(seed)
+    return b''.join(b'x' * rng.randrange(0, 40) + b'\n' for _ in range(lines)) + b'tail'
+
+
+@pytest.fixture
+def small_blocks(monkeypatch, tmp_path):
+    """索引写到临时目录，扫描块小到每块只有几行，检查跨块的增量扫描"""
+    monkeypatch.setattr(line_index, 'INDEX_DIR', tmp_path / 'index')
+    monkeypatch.setattr(line_index, 'SCAN_BLOCK_SIZE', 37)
+
+
+def _expected_checkpoints(block, pos, lines, stride):
+    starts = [pos + i + 1 for i, byte in enumerate(block) if byte == 10]
+    return [offset for line, offset in enumerate(starts, lines + 1) if line % stride == 0]
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_newline_checkpoints_match_brute_force(monkeypatch, use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setitem(sys.modules, 'numpy', None)
+    block = _sample_data(lines=200)
+    for lines in (0, 1, 6, 7, 123):
+        for stride in (1, 2, 7, 64, 1000):
+            assert list(_newline_checkpoints(block, 1000, lines, stride)) == \
+                _expected_checkpoints(block, 1000, lines, stride)
+    assert list(_newline_checkpoints(b'no newline', 0, 0, 1)) == []
+
+
+def test_index_matches_brute_force_across_blocks(small_blocks, tmp_path):
+    path = tmp_path / 'app.log'
+    data = _sample_data()
+    path.write_bytes(data)
+    starts = _line_starts(data)
+    index = LineIndex.for_file(path, stride=7, save=False)
+    assert list(index.offsets) == starts[::7]
+    assert index.total_lines == data.count(b'\n')
+    assert index.indexed_size == data.rfind(b'\n') + 1
+    assert index.line_count == len(starts)
+    for line_no in (1, 2, 7, 8, 100, len(starts)):
+        assert index.line_offset(line_no) == starts[line_no - 1]
+    for line_no, (start, end) in enumerate(zip(starts, starts[1:] + [len(data)]), 1):
+        assert index.line_number(start) == line_no
+        assert index.line_number(end - 1) == line_no
+
+
+def test_incremental_scan_after_append(small_blocks, tmp_path):
+    path = tmp_path / 'app.log'
+    data = _sample_data(lines=100)
+    path.write_bytes(data)
+    LineIndex.for_file(path, stride=5)
+    # 追加时末尾不完整的行被补全，只扫描索引之后的部分
+    more = _sample_data(seed=2, lines=100)
+    with open(path, 'ab') as f:
+        f.write(more)
+    data += more
+    index = LineIndex.for_file(path, stride=5)
+    assert list(index.offsets) == _line_starts(data)[::5]
+    assert index.total_lines == data.count(b'\n')
+    assert LineIndex.load(path).offsets == index.offsets
+
+
+def test_rebuild_after_truncation(small_blocks, tmp_path):
+    path = tmp_path / 'app.log'
+    path.write_bytes(_sample_data(lines=100))
+    LineIndex.for_file(path, stride=5)
+    data = _sample_data(seed=3, lines=20)
+    path.write_bytes(data)
+    index = LineIndex.for_file(path, stride=5)
+    assert list(index.offsets) == _line_starts(data)[::5]
+
+
+def test_shard_bounds_start_lines(small_blocks, tmp_path):
+    path = tmp_path / 'app.log'
+    data = _sample_data()
+    path.write_bytes(data)
+    index = LineIndex.for_file(path, stride=3, save=False)
+    starts = set(_line_starts(data))
+    for shards in (1, 2, 5, 16):
+        bounds = index.shard_bounds(shards)
+        assert bounds[0] == 0 and bounds[-1] == len(data)
+        assert bounds == sorted(set(bounds))
+        assert all(bound in starts for bound in bounds[:-1])
+
+
+def test_iter_lines(small_blocks, tmp_path):
+    path = tmp_path / 'app.log'
+    data = _sample_data()
+    path.write_bytes(data)
+    index = LineIndex.for_file(path, stride=4, save=False)
+    lines = data.split(b'\n')
+    assert list(index.iter_lines(10, 3)) == [(10, lines[9]), (11, lines[10]), (12, lines[11])]
+    assert list(index.iter_lines(len(lines), 5)) == [(len(lines), b'tail')]
@@ -0,0 +1,42 @@
+import io
+
+import pytest
+
+from src.core.file_handler import FileHandler
+from src.core.line_reader import LineReader
+from src.core.log_processor import LogProcessor
+
+
+def _line_count(data):
+    """按换行符计数，末尾没有换行符的最后一行也计入"""
+    return data.count(b'\n') + (bool(data) and not data.endswith(b'\n'))
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'a\nb\n',
+    b'a\nb',
+    b'x' * 50,
+    b'a\n' + b'x' * 50 + b'\nb\n',
+    b'a\n' + b'x' * 50 + b'\n' + b'y' * 33,
+    b'x' * 16 + b'\n' + b'y' * 32,
+])
+def test_counted_blocks_count_split_lines_once(data):
+    reader = LineReader(io.BytesIO(data), buffer_size=4, max_line_length=8)
+    blocks = list(reader.counted_blocks())
+    assert b''.join(block for block, _ in blocks) == data
+    assert sum(lines for _, lines in blocks) == _line_count(data)
+
+
+def test_long_line_counted_once_by_every_path(tmp_path):
+    data = b'a HIT\n' + b'x' * (LineReader.MAX_LINE_LENGTH + 100) + b'\nb HIT'
+    path = tmp_path / 'app.log'
+    path.write_bytes(data)
+
+    count_in, matched = FileHandler.process_large_file_bytes(
+        path, tmp_path / 'out.log', lambda block: [b'' for _ in range(block.count(b'HIT'))])
+    assert (count_in, matched) == (3, 2)
+
+    count_in, matched = LogProcessor().filter_stream(
+        io.BufferedReader(io.BytesIO(data)), io.BytesIO(), 'HIT', False, 'utf-8')
+    assert (count_in, matched) == (3, 2)
@@ -0,0 +1,46 @@
+from src.core.matcher import FieldStripper, KeywordMatcher, LineFilter
+from src.core.preview_source import ListSource, RowMap
+
+
+def _text_rows(lines):
+    """预览区 Text 中实际显示的各行（结果行以换行符连接后插入）"""
+    return '\n'.join(lines).split('\n')
+
+
+def _position(index):
+    line, column = map(int, index.split('.'))
+    return line - 1, column
+
+
+def test_row_map_counts_embedded_newlines():
+    row_map = RowMap(['a', 'b\nc\nd', 'e'])
+    assert list(row_map.starts) == [1, 2, 5, 6]
+    assert row_map.text_rows == 5
+    assert row_map.index(0, 1) == '1.1'
+    assert row_map.index(1, 0) == '2.0'
+    assert row_map.index(1, 2) == '3.0'
+    assert row_map.index(1, 5) == '4.1'
+    assert row_map.index(2, 0) == '5.0'
+
+
+def test_spans_after_unescaped_newline_land_on_keyword():
+    # 删除字段时字面量 \n 被还原为换行符，之后的行和同一行中换行符之后的命中位置不能错位
+    line_filter = LineFilter(KeywordMatcher('ERROR|warn'), FieldStripper('[main]'))
+    raw = [
+        '[main] ERROR first\\nsecond ERROR\\nwarn third',
+        '[main] plain warn',
+        '[main] ERROR last',
+    ]
+    lines = [line_filter(line) for line in raw]
+    assert '\n' in lines[0]
+
+    source = ListSource(lines, matcher=line_filter.matcher)
+    row_map = RowMap(source.get_lines(0, len(source)))
+    rows = _text_rows(lines)
+    spans = source.get_spans(0, len(source))
+    assert len(spans) == 5
+    for row, start, end, index in spans:
+        line, begin = _position(row_map.index(row, start))
+        end_line, finish = _position(row_map.index(row, end))
+        assert end_line == line
+        assert rows[line][begin:finish].lower() == line_filter.matcher.keywords[index].lower()
@@ -0,0 +1,92 @@
+import pytest
+
+from src.core.query import QueryError, QueryMatcher, _AnyLiteral, _Literal, _Not, _Or, _Parser, _optimize
+
+
+def _matching(query, lines, ignore_case=True):
+    matcher = QueryMatcher(query, ignore_case)
+    return [line for line in lines if matcher.matches(line)]
+
+
+def test_not_binds_tighter_than_and_tighter_than_or():
+    lines = ['a b', 'a', 'b', 'c', 'a c', 'b c']
+    # a OR (b AND (NOT c))
+    assert _matching('a OR b NOT c', lines) == ['a b', 'a', 'b', 'a c']
+    assert _matching('a OR b AND NOT c', lines) == ['a b', 'a', 'b', 'a c']
+    assert _matching('(a OR b) NOT c', lines) == ['a b', 'a', 'b']
+    assert _matching('a | b c', lines) == ['a b', 'a', 'a c', 'b c']
+    assert _matching('NOT NOT a', lines) == ['a b', 'a', 'a c']
+
+
+def test_operators_are_uppercase_only():
+    lines = ['x and y', 'x', 'y', 'x or y']
+    assert _matching('x and y', lines) == ['x and y']
+    assert _matching('x or y', lines) == ['x or y']
+    assert _matching('x OR y', lines) == lines
+    assert _matching('not x', lines) == []
+
+
+def test_prefixes_are_lowercase_only():
+    lines = ['[12:00:00] [Server thread/ERROR]: Level:ERROR boom', '[12:00:01] [Server thread/INFO]: ok']
+    assert _matching('level:ERROR', lines) == lines[:1]
+    assert _matching('level:error', lines) == lines[:1]
+    # 大写前缀按普通词语匹配
+    assert _matching('Level:ERROR', lines, ignore_case=False) == lines[:1]
+    assert _matching('Time:12', lines) == []
+    # 引号中的小写前缀按字面查找
+    assert _matching('"level:"', lines) == lines[:1]
+    with pytest.raises(QueryError):
+        QueryMatcher('level:')
+
+
+@pytest.mark.parametrize('query', ['""', 'foo OR ""', '"unterminated', 'a OR', '(a', 'a)', 're:/x', 'level:NOPE'])
+def test_invalid_queries(query):
+    with pytest.raises(QueryError):
+        QueryMatcher(query)
+
+
+def test_optimize_merges_or_literals():
+    tree = _optimize(_Parser('a OR re:/b+/ OR "c d" OR (a | e)', True).parse())
+    assert isinstance(tree, _Or)
+    merged = [c for c in tree.children if isinstance(c, _AnyLiteral)]
+    assert len(merged) == 1
+    # 重复的 a 只保留一个，嵌套的 OR 被展开
+    assert sorted(merged[0].needle_list) == ['a', 'c d', 'e']
+    assert not any(isinstance(c, _Literal) for c in tree.children)
+
+
+def test_optimize_removes_double_negation_and_duplicates():
+    tree = _optimize(_Parser('NOT NOT a AND a AND (a)', True).parse())
+    assert isinstance(tree, _Literal) and tree.needle == 'a'
+    tree = _optimize(_Parser('NOT NOT NOT a', True).parse())
+    assert isinstance(tree, _Not) and isinstance(tree.child, _Literal)
+
+
+def test_literal_prefilter_is_removed_from_tree():
+    matcher = QueryMatcher('error OR warn')
+    assert matcher.is_exact and matcher.root is None
+    assert sorted(matcher.prefilter.keywords) == ['error', 'warn']
+
+    matcher = QueryMatcher('chat re:/<\\w+> hi/')
+    assert not matcher.is_exact
+    assert matcher.prefilter.keywords == ['chat']
+    # 子串条件已由预筛选保证，只剩正则需要复核
+    assert matcher.root.key() == 're:/<\\w+> hi/i'
+    assert matcher.matches('[CHAT] <Steve> hi') and not matcher.matches('[CHAT] hi')
+
+
+def test_prefilter_with_different_case_rule_stays_in_tree():
+    # 正则强制忽略大小写，而子串区分大小写：预筛选按正则的字面量折叠，子串条件仍需复核
+    matcher = QueryMatcher('re:/hello/i', ignore_case=False)
+    assert matcher.prefilter.ignore_case and matcher.root is not None
+    assert matcher.matches('HELLO') and not matcher.matches('help')
+    matcher = QueryMatcher('Steve re:/joined/i', ignore_case=False)
+    assert matcher.matches('Steve JOINED') and not matcher.matches('steve joined')
+
+
+def test_regex_literal_prefilter_requires_regex():
+    matcher = QueryMatcher('re:/abc+d/')
+    assert matcher.prefilter.keywords == ['ab']
+    assert matcher.matches('xabcccd') and not matcher.matches('xab')
+    # 不足两个字符的字面量不作为预筛选
+    assert QueryMatcher('re:/ab+c/').prefilter is None
@@ -0,0 +1,177 @@
+import pytest
+
+from src.core.tail_reader import TailReader
+
+
+@pytest.fixture(params=[True, False], ids=['keep_open', 'reopen'])
+def keep_open(request, monkeypatch):
+    monkeypatch.setattr(TailReader, 'KEEP_OPEN', request.param)
+    return request.param
+
+
+def _append(path, data):
+    with open(path, 'ab') as f:
+        f.write(data)
+
+
+def test_from_end_skips_existing_lines(tmp_path, keep_open):
+    path = tmp_path / 'latest.log'
+    path.write_bytes(b'old 1\nold 2\nhalf')
+    reader = TailReader(path)
+    # 最后一行没写完时退回到该行行首，写完后完整返回
+    assert reader.read() == ''
+    _append(path, b' done\nnew\n')
+    assert reader.read() == 'half done\nnew\n'
+    reader.close()
+
+
+def test_from_start_and_missing_file(tmp_path, keep_open):
+    path = tmp_path / 'latest.log'
+    reader = TailReader(path, from_end=False)
+    assert reader.read() == ''
+    path.write_bytes(b'a\nb\n')
+    assert reader.read() == 'a\nb\n'
+    assert reader.read() == ''
+    reader.close()
+
+
+def test_partial_line_held_back(tmp_path, keep_open):
+    path = tmp_path / 'latest.log'
+    path.write_bytes(b'')
+    reader = TailReader(path)
+    _append(path, b'first\nsec')
+    assert reader.read() == 'first\n'
+    _append(path, b'ond')
+    assert reader.read() == ''
+    _append(path, b'\r\nthird\n')
+    assert reader.read() == 'second\r\nthird\n'
+    _append(path, b'tail')
+    assert reader.read() == ''
+    assert reader.flush() == 'tail\n'
+    assert reader.flush() == ''
+    reader.close()
+
+
+def test_multibyte_character_split_between_writes(tmp_path, keep_open):
+    path = tmp_path / 'latest.log'
+    path.write_bytes(b'')
+    reader = TailReader(path)
+    data = '玩家加入了游戏\n'.encode('utf-8')
+    for i in range(len(data)):
+        _append(path, data[i:i + 1])
+        text = reader.read()
+        assert text == ('' if i < len(data) - 1 else '玩家加入了游戏\n')
+    reader.close()
+
+
+def test_utf16_split_between_writes(tmp_path, keep_open):
+    path = tmp_path / 'latest.log'
+    path.write_bytes(b'')
+    reader = TailReader(path, encoding='utf-16-le')
+    data = 'a\n字\n'.encode('utf-16-le')
+    _append(path, data[:3])
+    assert reader.read() == ''
+    _append(path, data[3:5])
+    assert reader.read() == 'a\n'
+    _append(path, data[5:])
+    assert reader.read() == '字\n'
+    reader.close()
+
+
+def test_ascii_encoding_widened_to_utf8(tmp_path):
+    path = tmp_path / 'latest.log'
+    path.write_bytes(b'')
+    reader = TailReader(path, encoding='ascii')
+    _append(path, 'é\n'.encode('utf-8'))
+    assert reader.read() == 'é\n'
+    reader.close()
+
+
+def test_truncation_restarts_and_flushes_partial(tmp_path, keep_open):
+    path = tmp_path / 'latest.log'
+    path.write_bytes(b'')
+    reader = TailReader(path)
+    _append(path, b'one\ntwo\nunfinished')
+    assert reader.read() == 'one\ntwo\n'
+    path.write_bytes(b'x\n')
+    assert reader.read() == 'unfinished\nx\n'
+    assert reader.rotations == 1
+    assert reader.position == 2
+    reader.close()
+
+
+def test_rotation_reads_rest_of_old_file_then_new(tmp_path, monkeypatch):
+    monkeypatch.setattr(TailReader, 'KEEP_OPEN', True)
+    path = tmp_path / 'latest.log'
+    path.write_bytes(b'')
+    reader = TailReader(path)
+    _append(path, b'old 1\n')
+    assert reader.read() == 'old 1\n'
+    _append(path, b'old 2\nlast old')
+    path.rename(tmp_path / '2024-01-01-1.log')
+    path.write_bytes(b'new 1\n')
+    text = ''
+    while True:
+        chunk = reader.read()
+        if not chunk:
+            break
+        text += chunk
+    assert text == 'old 2\nlast old\nnew 1\n'
+    assert reader.rotations == 1
+    reader.close()
+
+
+def test_rotation_while_closed_starts_new_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(TailReader, 'KEEP_OPEN', False)
+    path = tmp_path / 'latest.log'
+    path.write_bytes(b'')
+    reader = TailReader(path)
+    _append(path, b'old 1\nlast old')
+    assert reader.read() == 'old 1\n'
+    assert reader._file is None
+    path.rename(tmp_path / '2024-01-01-1.log')
+    path.write_bytes(b'new 1\n')
+    # 文件关闭期间被替换，旧文件剩余的内容无法读取，未完成的行作为完整的一行返回
+    assert reader.read() == 'last old\nnew 1\n'
+    assert reader.rotations == 1
+    reader.close()
+
+
+def test_read_size_limit_and_has_more(tmp_path, monkeypatch, keep_open):
+    monkeypatch.setattr(TailReader, 'READ_SIZE', 4)
+    path = tmp_path / 'latest.log'
+    path.write_bytes(b'')
+    reader = TailReader(path)
+    _append(path, b'ab\ncd\nef\n')
+    text = reader.read()
+    assert text == 'ab\n' and reader.has_more
+    while reader.has_more:
+        text += reader.read()
+    assert text == 'ab\ncd\nef\n'
+    assert reader.bytes_read == 9
+    reader.close()
+
+
+def test_overlong_partial_line_returned(tmp_path, monkeypatch):
+    monkeypatch.setattr(TailReader, 'MAX_PARTIAL', 8)
+    path = tmp_path / 'latest.log'
+    path.write_bytes(b'')
+    reader = TailReader(path)
+    _append(path, b'0123456789')
+    assert reader.read() == '0123456789\n'
+    _append(path, b'ab\n')
+    assert reader.read() == 'ab\n'
+    reader.close()
+
+
+def test_file_tail_splits_only_on_newlines(tmp_path):
+    pytest.importorskip('watchdog')
+    from src.core.log_monitor import FileTail
+    path = tmp_path / 'latest.log'
+    path.write_bytes(b'')
+    tail = FileTail(path, 'utf-8', None, from_end=True)
+    _append(path, 'a\x0bb c\r\nd\x1ce\n'.encode('utf-8'))
+    batches = []
+    tail.poll(lambda source, lines: batches.append(lines))
+    assert batches == [['a\x0bb c', 'd\x1ce']]
+    tail.close()